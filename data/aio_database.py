@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from data.database import DB_CONFIG, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_TIMEOUT, PoolTimeoutError
+
+try:
+    import aiomysql
+except ImportError:  # Solo hace falta con DATABASE_BACKEND=aiomysql
+    aiomysql = None
+
+# Segundos que puede vivir una conexión antes de reciclarla (evita cortes por wait_timeout)
+POOL_RECYCLE = 3600
+
+
+class AsyncConnectionPool:
+    """Pool asíncrono sobre aiomysql con la misma configuración que el pool síncrono"""
+
+    def __init__(self, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 timeout: float = POOL_TIMEOUT):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool = None
+        # Se crea en iniciar(), ya dentro del event loop que va a usar el pool
+        self._lock = None
+
+    async def iniciar(self) -> None:
+        if aiomysql is None:
+            raise RuntimeError("El backend aiomysql necesita el paquete 'aiomysql'")
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pool is None:
+                self._pool = await aiomysql.create_pool(
+                    host=DB_CONFIG["host"],
+                    port=DB_CONFIG["port"],
+                    user=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    db=DB_CONFIG["database"],
+                    minsize=self.min_size,
+                    maxsize=self.max_size,
+                    pool_recycle=POOL_RECYCLE,
+                    autocommit=False,
+                )
+
+    async def obtener_conexion(self):
+        """Presta una conexión, esperando como mucho `timeout` segundos"""
+        if self._pool is None:
+            await self.iniciar()
+        pool = self._pool
+        # En una tarea aparte y no con wait_for: si el acquire termina justo cuando vence el
+        # plazo (o se cancela la petición), la conexión que consiga se devuelve al pool
+        tarea = asyncio.ensure_future(pool.acquire())
+        try:
+            hechas, _ = await asyncio.wait({tarea}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            self._abandonar(pool, tarea)
+            raise
+        if not hechas:
+            self._abandonar(pool, tarea)
+            raise PoolTimeoutError(
+                f"No hay conexiones libres tras {self.timeout}s (máximo {self.max_size})"
+            )
+        conexion = tarea.result()
+        try:
+            # Validación al prestar: reabre la conexión si el servidor la ha cerrado
+            await conexion.ping(reconnect=True)
+        except Exception:
+            self._pool.release(conexion)
+            raise
+        return conexion
+
+    @staticmethod
+    def _abandonar(pool, tarea) -> None:
+        """Cancela un acquire que ya no espera nadie; si llegó a obtener conexión, la devuelve"""
+        def devolver(tarea):
+            if not tarea.cancelled() and tarea.exception() is None:
+                pool.release(tarea.result())
+
+        tarea.cancel()
+        tarea.add_done_callback(devolver)
+
+    async def liberar_conexion(self, conexion) -> None:
+        try:
+            await conexion.rollback()
+        except Exception:
+            conexion.close()
+        self._pool.release(conexion)
+
+    @asynccontextmanager
+    async def conexion(self):
+        """Uso: async with aio_pool.conexion() as db: ..."""
+        db = await self.obtener_conexion()
+        try:
+            yield db
+        finally:
+            await self.liberar_conexion(db)
+
+    async def cerrar(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def estadisticas(self) -> dict:
+        abiertas = self._pool.size if self._pool else 0
+        libres = self._pool.freesize if self._pool else 0
+        return {
+            "min": self.min_size,
+            "max": self.max_size,
+            "abiertas": abiertas,
+            "libres": libres,
+            "prestadas": abiertas - libres,
+        }
+
+
+aio_pool = AsyncConnectionPool()
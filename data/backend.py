@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
+from data.database import DATABASE_BACKEND, pool
+from data.aio_database import aio_pool
+from data.executor import db_executor
+from data.sentencias import metricas as sentencias
+
+BACKENDS = ("mysql", "aiomysql", "sqlite")
+
+if DATABASE_BACKEND not in BACKENDS:
+    raise RuntimeError(f"DATABASE_BACKEND no válido: {DATABASE_BACKEND!r} (opciones: {', '.join(BACKENDS)})")
+
+ES_ASYNC = DATABASE_BACKEND == "aiomysql"
+
+
+def repositorio(clase):
+    """Instancia el repositorio adecuado al backend configurado.
+    Con aiomysql se usa la clase Async<Nombre> definida en el mismo módulo."""
+    if ES_ASYNC:
+        return getattr(sys.modules[clase.__module__], "Async" + clase.__name__)()
+    return clase()
+
+
+@asynccontextmanager
+async def conexion():
+    """Presta una conexión del backend activo sin bloquear el event loop"""
+    if ES_ASYNC:
+        async with aio_pool.conexion() as db:
+            yield db
+    else:
+        # El préstamo puede esperar a que quede una conexión libre: lo hacemos en otro hilo
+        db = await asyncio.to_thread(pool.obtener_conexion)
+        try:
+            yield db
+        finally:
+            await asyncio.to_thread(pool.liberar_conexion, db)
+
+
+def _preparar_sqlite() -> None:
+    from data.sqlite_backend import preparar_base_de_datos
+    with pool.conexion() as db:
+        preparar_base_de_datos(db)
+
+
+async def iniciar() -> None:
+    if ES_ASYNC:
+        await aio_pool.iniciar()
+    else:
+        if DATABASE_BACKEND == "sqlite":
+            # Crea las tablas a partir de los scripts de sql/ si aún no existen
+            await asyncio.to_thread(_preparar_sqlite)
+        await asyncio.to_thread(pool.iniciar)
+
+
+async def cerrar() -> None:
+    if ES_ASYNC:
+        await aio_pool.cerrar()
+    else:
+        db_executor.cerrar()
+        pool.cerrar()
+
+
+def estadisticas() -> dict:
+    if ES_ASYNC:
+        return {"backend": DATABASE_BACKEND, "pool": aio_pool.estadisticas()}
+    return {
+        "backend": DATABASE_BACKEND,
+        "pool": pool.estadisticas(),
+        "executor": db_executor.estadisticas(),
+        # aiomysql no tiene sentencias preparadas: solo las usa el backend síncrono
+        "sentencias": sentencias.estadisticas()
+    }
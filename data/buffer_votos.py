@@ -0,0 +1,141 @@
+import asyncio
+import os
+from typing import List, Optional
+
+from data import backend
+from data.backend import repositorio
+from data.cache import paginas
+from data.comentario_repository import ComentarioRepository, _diferencia_votos
+from data.executor import run_db
+from domain.model.Comentario import Comentario
+
+# Cada cuántos segundos se escriben los votos pendientes
+VOTOS_INTERVALO = float(os.getenv("VOTOS_BUFFER_INTERVALO", "1.0"))
+# Con cuántos votos pendientes se escribe sin esperar al intervalo
+VOTOS_MAXIMO = int(os.getenv("VOTOS_BUFFER_MAXIMO", "200"))
+
+
+class BufferVotos:
+    """Acumula los votos en memoria y los escribe en lotes (write-behind).
+    Si un usuario vota varias veces el mismo comentario antes de escribir,
+    solo cuenta el último voto. Los votos pendientes son de este proceso:
+    con varios workers cada uno tiene su buffer."""
+
+    def __init__(self, intervalo: float = VOTOS_INTERVALO, maximo: int = VOTOS_MAXIMO):
+        self.intervalo = intervalo
+        self.maximo = maximo
+        # {(comentario_id, usuario_id): tipo_voto, o None si el voto se quita}
+        self._pendientes: dict = {}
+        self._en_vuelo: dict = {}  # Lote que se está escribiendo ahora mismo
+        self._lleno = asyncio.Event()
+        self._tarea: Optional[asyncio.Task] = None
+        self._volcando = asyncio.Lock()
+        self._registrados = 0
+        self._sustituidos = 0
+        self._escritos = 0
+        self._lotes = 0
+        self._errores = 0
+
+    def registrar(self, comentario_id: int, usuario_id: int, tipo_voto: Optional[str]) -> None:
+        """Guarda el voto pendiente (tipo_voto=None para quitarlo)"""
+        clave = (comentario_id, usuario_id)
+        if clave in self._pendientes:
+            self._sustituidos += 1
+        self._pendientes[clave] = tipo_voto
+        self._registrados += 1
+        # Las páginas del usuario muestran sus votos pendientes
+        paginas.invalidar_etiquetas(f"usuario:{usuario_id}")
+        if len(self._pendientes) >= self.maximo:
+            self._lleno.set()
+
+    def voto_pendiente(self, comentario_id: int, usuario_id: int):
+        """Devuelve (hay_pendiente, tipo_voto) para un comentario y usuario"""
+        clave = (comentario_id, usuario_id)
+        for votos in (self._pendientes, self._en_vuelo):
+            if clave in votos:
+                return True, votos[clave]
+        return False, None
+
+    def aplicar_pendientes(self, comentarios: List[Comentario], usuario_id: Optional[int]) -> None:
+        """Corrige los comentarios leídos de la BD con los votos del usuario aún sin escribir"""
+        if not usuario_id or not (self._pendientes or self._en_vuelo):
+            return
+        for comentario in comentarios:
+            hay_pendiente, tipo_voto = self.voto_pendiente(comentario.id, usuario_id)
+            if hay_pendiente and tipo_voto != comentario.voto_usuario:
+                positivos, negativos = _diferencia_votos(comentario.voto_usuario, tipo_voto)
+                comentario.votos_positivos += positivos
+                comentario.votos_negativos += negativos
+                comentario.voto_usuario = tipo_voto
+            self.aplicar_pendientes(comentario.respuestas, usuario_id)
+
+    async def volcar(self) -> None:
+        """Escribe todos los votos pendientes en lotes de como mucho `maximo` votos"""
+        async with self._volcando:
+            self._lleno.clear()
+            while self._pendientes:
+                claves = list(self._pendientes)[:self.maximo]
+                self._en_vuelo = {clave: self._pendientes.pop(clave) for clave in claves}
+                try:
+                    await self._escribir(self._en_vuelo)
+                finally:
+                    self._en_vuelo = {}
+
+    async def _escribir(self, lote: dict) -> None:
+        comentario_repo = repositorio(ComentarioRepository)
+        try:
+            async with backend.conexion() as db:
+                await run_db(comentario_repo.aplicar_votos, db, lote)
+            self._lotes += 1
+            self._escritos += len(lote)
+        except Exception as e:
+            # Un voto con un usuario o comentario ya borrado tumba el lote entero:
+            # lo reintentamos voto a voto para no perder los demás
+            self._errores += 1
+            print(f"⚠️ Error al escribir {len(lote)} votos en lote, se reintentan uno a uno: {e}")
+            for clave, tipo_voto in lote.items():
+                try:
+                    async with backend.conexion() as db:
+                        await run_db(comentario_repo.aplicar_votos, db, {clave: tipo_voto})
+                    self._escritos += 1
+                except Exception as e:
+                    print(f"⚠️ Voto descartado {clave}: {e}")
+
+    async def _bucle(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._lleno.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.volcar()
+            except Exception as e:
+                print(f"⚠️ Error al escribir los votos pendientes: {e}")
+
+    def iniciar(self) -> None:
+        if self._tarea is None:
+            self._tarea = asyncio.create_task(self._bucle())
+
+    async def detener(self) -> None:
+        """Para el volcado periódico y escribe lo que quede pendiente"""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        await self.volcar()
+
+    def estadisticas(self) -> dict:
+        return {
+            "pendientes": len(self._pendientes) + len(self._en_vuelo),
+            "registrados": self._registrados,
+            "sustituidos": self._sustituidos,
+            "escritos": self._escritos,
+            "lotes": self._lotes,
+            "errores": self._errores,
+        }
+
+
+buffer_votos = BufferVotos()
@@ -0,0 +1,289 @@
+import copy
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Optional
+
+from markupsafe import Markup, escape
+
+from data.paginacion import Cursor, Pagina, construir_pagina
+
+# Segundos que vive un índice antes de reconstruirlo. Los cambios de este proceso se aplican
+# al momento, y las altas y bajas de otros se detectan con la firma (COUNT(*), MAX(id)).
+# Lo que la firma no ve son las ediciones de otro proceso (un nombre o una descripción
+# cambiados): esas tardan hasta este TTL en encontrarse. No se usa MAX(updated_at) porque
+# las escrituras de este proceso no conocen la hora que pone el servidor (y SQLite no tiene
+# ON UPDATE), así que cada edición local obligaría a reconstruir el índice entero
+BUSQUEDA_INDICE_TTL = float(os.getenv("BUSQUEDA_INDICE_TTL", "30"))
+# Caracteres de descripción que se muestran alrededor de la primera coincidencia
+LONGITUD_FRAGMENTO = 160
+
+_RE_PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin tildes: "Jurásico" -> "jurasico" """
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto: Optional[str]) -> list:
+    return _RE_PALABRA.findall(normalizar(texto))
+
+
+class Indice:
+    """Índice invertido de una tabla: palabra normalizada -> {id: puntos}.
+    Los puntos de cada palabra son la suma de los pesos de los campos donde aparece."""
+
+    def __init__(self, pesos: dict):
+        self.pesos = pesos
+        self.creado = time.monotonic()
+        self._palabras = defaultdict(dict)
+        self._documentos: dict = {}  # id -> palabras del documento
+        self._ordenadas: Optional[list] = None  # Para buscar por prefijo; se rehace tras cambios
+        self._lock = threading.Lock()
+
+    def poner(self, id: int, campos: dict) -> None:
+        puntos = defaultdict(float)
+        for campo, texto in campos.items():
+            for palabra in tokenizar(texto):
+                puntos[palabra] += self.pesos.get(campo, 1.0)
+        with self._lock:
+            self._quitar(id)
+            for palabra, valor in puntos.items():
+                self._palabras[palabra][id] = valor
+            self._documentos[id] = set(puntos)
+            self._ordenadas = None
+
+    def quitar(self, id: int) -> None:
+        with self._lock:
+            self._quitar(id)
+
+    def _quitar(self, id: int) -> None:
+        for palabra in self._documentos.pop(id, ()):
+            documentos = self._palabras[palabra]
+            documentos.pop(id, None)
+            if not documentos:
+                del self._palabras[palabra]
+        self._ordenadas = None
+
+    def _con_prefijo(self, prefijo: str) -> list:
+        if self._ordenadas is None:
+            self._ordenadas = sorted(self._palabras)
+        i = bisect_left(self._ordenadas, prefijo)
+        palabras = []
+        while i < len(self._ordenadas) and self._ordenadas[i].startswith(prefijo):
+            palabras.append(self._ordenadas[i])
+            i += 1
+        return palabras
+
+    def buscar(self, consulta: str) -> list:
+        """[(id, puntos)] de los documentos que contienen todos los términos (también como
+        prefijo: "jur" encuentra "Jurásico"), de más a menos relevante"""
+        terminos = set(tokenizar(consulta))
+        if not terminos:
+            return []
+        with self._lock:
+            total = len(self._documentos)
+            resultado = None
+            for termino in terminos:
+                puntos_termino = defaultdict(float)
+                for palabra in self._con_prefijo(termino):
+                    documentos = self._palabras[palabra]
+                    # Las palabras raras pesan más (idf) y la palabra exacta más que un prefijo
+                    factor = math.log(1 + total / len(documentos)) * (1.0 if palabra == termino else 0.5)
+                    for id, puntos in documentos.items():
+                        puntos_termino[id] = max(puntos_termino[id], puntos * factor)
+                if resultado is None:
+                    resultado = puntos_termino
+                else:
+                    resultado = {id: resultado[id] + p for id, p in puntos_termino.items() if id in resultado}
+                if not resultado:
+                    return []
+        return sorted(((id, round(p, 6)) for id, p in resultado.items()), key=lambda r: (-r[1], r[0]))
+
+    def firma(self) -> tuple:
+        """(número de documentos, id máximo): lo mismo que SELECT COUNT(*), MAX(id) de la
+        tabla si el índice está al día"""
+        with self._lock:
+            return len(self._documentos), max(self._documentos, default=None)
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+
+class Buscador:
+    """Índices de búsqueda por tabla. Se construyen la primera vez que se buscan y los
+    repositorios los mantienen al día al escribir."""
+
+    def __init__(self, ttl: float = BUSQUEDA_INDICE_TTL):
+        self.ttl = ttl
+        self._indices: dict = {}
+        self._origen: dict = {}  # tabla -> lista de la que se construyó (tablas de referencia)
+        self._versiones = defaultdict(int)
+        self._lock = threading.Lock()
+        self._construcciones = defaultdict(int)
+        self._busquedas = defaultdict(int)
+        self._desfasados = defaultdict(int)
+
+    def _vigente(self, tabla: str, firma: Optional[tuple]):
+        with self._lock:
+            self._busquedas[tabla] += 1
+            indice = self._indices.get(tabla)
+            version = self._versiones[tabla]
+        if indice is not None and indice.creado + self.ttl > time.monotonic():
+            # Otro proceso (el importador, otro worker) ha añadido o borrado filas
+            if firma is None or indice.firma() == tuple(firma):
+                return indice, None
+            with self._lock:
+                self._desfasados[tabla] += 1
+        return None, version
+
+    def _guardar(self, tabla: str, documentos: list, pesos: dict, version: int) -> Indice:
+        indice = Indice(pesos)
+        for id, campos in documentos:
+            indice.poner(id, campos)
+        with self._lock:
+            self._construcciones[tabla] += 1
+            # Si hubo escrituras mientras se leía, el índice se usa pero no se guarda
+            if version == self._versiones[tabla]:
+                self._indices[tabla] = indice
+        return indice
+
+    def cargar(self, tabla: str, pesos: dict, leer, firma: Optional[tuple] = None) -> Indice:
+        """Índice de la tabla; si no existe, ha caducado o no coincide con la firma
+        (COUNT(*), MAX(id)) leída de la BD, se construye con leer() -> [(id, campos)]"""
+        indice, version = self._vigente(tabla, firma)
+        if indice is None:
+            indice = self._guardar(tabla, leer(), pesos, version)
+        return indice
+
+    async def cargar_async(self, tabla: str, pesos: dict, leer, firma: Optional[tuple] = None) -> Indice:
+        indice, version = self._vigente(tabla, firma)
+        if indice is None:
+            indice = self._guardar(tabla, await leer(), pesos, version)
+        return indice
+
+    def desde_lista(self, tabla: str, pesos: dict, objetos: list, campos) -> Indice:
+        """Índice de una tabla de referencia a partir de su lista en caché: se rehace
+        cuando la caché entrega una lista nueva"""
+        with self._lock:
+            self._busquedas[tabla] += 1
+            if self._origen.get(tabla) is objetos:
+                return self._indices[tabla]
+        indice = Indice(pesos)
+        for objeto in objetos:
+            indice.poner(objeto.id, campos(objeto))
+        with self._lock:
+            self._construcciones[tabla] += 1
+            self._indices[tabla], self._origen[tabla] = indice, objetos
+        return indice
+
+    def actualizar(self, tabla: str, id: int, campos: dict) -> None:
+        with self._lock:
+            self._versiones[tabla] += 1
+            indice = self._indices.get(tabla)
+        if indice is not None:
+            indice.poner(id, campos)
+
+    def quitar(self, tabla: str, id: int) -> None:
+        with self._lock:
+            self._versiones[tabla] += 1
+            indice = self._indices.get(tabla)
+        if indice is not None:
+            indice.quitar(id)
+
+    def invalidar(self, tabla: str) -> None:
+        """Descarta el índice de la tabla (tras cambios en lote): se reconstruye en la siguiente búsqueda"""
+        with self._lock:
+            self._versiones[tabla] += 1
+            self._indices.pop(tabla, None)
+            self._origen.pop(tabla, None)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                tabla: {
+                    "documentos": len(self._indices[tabla]) if tabla in self._indices else 0,
+                    "busquedas": self._busquedas[tabla],
+                    "construcciones": self._construcciones[tabla],
+                    "desfasados": self._desfasados[tabla],
+                }
+                for tabla in sorted(set(self._busquedas) | set(self._indices))
+            }
+
+
+def pagina_de_ranking(ranking: list, desde: Optional[Cursor], tamano: int) -> list:
+    """Hace con un ranking [(id, puntos)] en memoria lo mismo que sql_pagina con SQL:
+    el orden es (puntos desc, id) y se devuelve una fila de más en el sentido pedido,
+    lista para construir_pagina(..., clave=lambda x: x.relevancia)"""
+    if desde is None:
+        return ranking[:tamano + 1]
+    claves = [(-puntos, id) for id, puntos in ranking]
+    referencia = (-float(desde.valor), desde.id)
+    if desde.sentido == "siguiente":
+        inicio = bisect_right(claves, referencia)
+        return ranking[inicio:inicio + tamano + 1]
+    fin = bisect_left(claves, referencia)
+    return ranking[max(0, fin - tamano - 1):fin][::-1]
+
+
+def resaltar(texto: Optional[str], consulta: str, longitud: int = LONGITUD_FRAGMENTO) -> Markup:
+    """Fragmento del texto alrededor de la primera coincidencia con las palabras
+    encontradas entre <mark>. El resto del texto se escapa."""
+    texto = texto or ""
+    terminos = set(tokenizar(consulta))
+    coincidencias = [m for m in _RE_PALABRA.finditer(texto)
+                     if any(normalizar(m.group()).startswith(t) for t in terminos)]
+    inicio = 0
+    if coincidencias and len(texto) > longitud:
+        inicio = max(0, coincidencias[0].start() - longitud // 4)
+    fin = min(len(texto), inicio + longitud)
+
+    partes, posicion = [], inicio
+    for m in coincidencias:
+        if m.start() < inicio or m.end() > fin:
+            continue
+        partes.append(escape(texto[posicion:m.start()]))
+        partes.append(Markup("<mark>%s</mark>") % m.group())
+        posicion = m.end()
+    partes.append(escape(texto[posicion:fin]))
+    return (Markup("…" if inicio > 0 else "") + Markup("").join(partes)
+            + Markup("…" if fin < len(texto) else ""))
+
+
+def marcar_resultado(objeto, puntos: float, consulta: str) -> None:
+    """Deja en el objeto la relevancia y los textos resaltados para las plantillas"""
+    objeto.relevancia = puntos
+    objeto.nombre_resaltado = resaltar(objeto.nombre, consulta)
+    objeto.fragmento = resaltar(getattr(objeto, "descripcion", None), consulta) or None
+
+
+def buscar_en_referencia(tabla: str, pesos: dict, campos, datos: tuple, consulta: str, filtro=None) -> list:
+    """Búsqueda en una tabla de referencia ya en memoria (datos = (lista, por_id) de la caché).
+    Devuelve [(objeto, puntos)] de más a menos relevante; los objetos son copias marcadas
+    con marcar_resultado, para no tocar los de la caché."""
+    lista, por_id = datos
+    resultados = []
+    for id, puntos in buscador.desde_lista(tabla, pesos, lista, campos).buscar(consulta):
+        if filtro is None or filtro(por_id[id]):
+            objeto = copy.copy(por_id[id])
+            marcar_resultado(objeto, puntos, consulta)
+            resultados.append((objeto, puntos))
+    return resultados
+
+
+def pagina_de_resultados(resultados: list, desde: Optional[Cursor], tamano: int) -> Pagina:
+    """Página de los resultados de buscar_en_referencia, con el total"""
+    por_id = {objeto.id: objeto for objeto, _ in resultados}
+    trozo = pagina_de_ranking([(objeto.id, puntos) for objeto, puntos in resultados], desde, tamano)
+    return construir_pagina([por_id[id] for id, _ in trozo], desde, tamano,
+                            lambda objeto: objeto.relevancia, len(resultados))
+
+
+buscador = Buscador()
@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+# Segundos que se fía la sesión del estado (activo/inactivo) de un usuario sin mirar la BD
+USUARIOS_CACHE_TTL = float(os.getenv("USUARIOS_CACHE_TTL", "30"))
+USUARIOS_CACHE_MAXIMO = int(os.getenv("USUARIOS_CACHE_MAXIMO", "10000"))
+# Caducidad de las tablas de referencia: acota lo que tarda en verse un cambio hecho por otro worker
+REFERENCIA_CACHE_TTL = float(os.getenv("REFERENCIA_CACHE_TTL", "300"))
+# Páginas HTML ya renderizadas: caducidad y cuántas se guardan
+PAGINAS_CACHE_TTL = float(os.getenv("PAGINAS_CACHE_TTL", "60"))
+PAGINAS_CACHE_MAXIMO = int(os.getenv("PAGINAS_CACHE_MAXIMO", "2000"))
+
+_NADA = object()
+
+
+class TTLCache:
+    """Caché acotada con caducidad por entrada. Al llenarse expulsa la usada hace más tiempo.
+    Es segura entre hilos: se usa desde el event loop y desde los hilos del executor de BD."""
+
+    def __init__(self, ttl: float, maximo: int):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._entradas: OrderedDict = OrderedDict()  # clave -> (caduca, valor)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._aciertos = 0
+        self._fallos = 0
+
+    @property
+    def version(self) -> int:
+        """Cambia con cada invalidación. Se toma antes de leer de la BD y se pasa a guardar()
+        para no guardar un valor que se quedó viejo mientras se leía."""
+        return self._version
+
+    def obtener(self, clave, defecto=None):
+        with self._lock:
+            entrada = self._entradas.get(clave, _NADA)
+            if entrada is _NADA or entrada[0] < time.monotonic():
+                if entrada is not _NADA:
+                    del self._entradas[clave]
+                self._fallos += 1
+                return defecto
+            self._entradas.move_to_end(clave)
+            self._aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, version: int = None) -> None:
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clave) -> None:
+        with self._lock:
+            self._entradas.pop(clave, None)
+            self._version += 1
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._version += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "maximo": self.maximo,
+                "ttl": self.ttl,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+            }
+
+
+class CacheEtiquetada(TTLCache):
+    """TTLCache cuyas entradas llevan etiquetas (las tablas o filas de las que salen).
+    invalidar_etiquetas() borra de golpe todas las entradas que tengan alguna de ellas."""
+
+    def __init__(self, ttl: float, maximo: int):
+        super().__init__(ttl, maximo)
+        self._por_etiqueta = defaultdict(set)  # etiqueta -> claves
+        self._etiquetas: dict = {}  # clave -> etiquetas
+        self._invalidadas = 0
+
+    def _desetiquetar(self, clave) -> None:
+        for etiqueta in self._etiquetas.pop(clave, ()):
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def obtener(self, clave, defecto=None):
+        valor = super().obtener(clave, _NADA)
+        if valor is _NADA:
+            with self._lock:
+                # Si caducó, TTLCache ya la ha quitado: quitamos también sus etiquetas
+                if clave not in self._entradas:
+                    self._desetiquetar(clave)
+            return defecto
+        return valor
+
+    def guardar(self, clave, valor, version: int = None, etiquetas=()) -> None:
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._desetiquetar(clave)
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            self._etiquetas[clave] = tuple(etiquetas)
+            for etiqueta in etiquetas:
+                self._por_etiqueta[etiqueta].add(clave)
+            while len(self._entradas) > self.maximo:
+                vieja, _ = self._entradas.popitem(last=False)
+                self._desetiquetar(vieja)
+
+    def invalidar_etiquetas(self, *etiquetas) -> None:
+        with self._lock:
+            for etiqueta in etiquetas:
+                for clave in list(self._por_etiqueta.get(etiqueta, ())):
+                    self._entradas.pop(clave, None)
+                    self._desetiquetar(clave)
+                    self._invalidadas += 1
+            self._version += 1
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._por_etiqueta.clear()
+            self._etiquetas.clear()
+        super().vaciar()
+
+    def estadisticas(self) -> dict:
+        datos = super().estadisticas()
+        with self._lock:
+            datos["etiquetas"] = len(self._por_etiqueta)
+            datos["invalidadas"] = self._invalidadas
+        return datos
+
+
+class CacheReferencia:
+    """Tablas pequeñas que casi nunca cambian (eras, regiones, habitats) enteras en memoria:
+    la lista en el orden de la consulta y un mapa id -> objeto. Cada tabla tiene un número
+    de versión que suben los insertar_*/actualizar_*/borrar_* de su repositorio."""
+
+    def __init__(self, ttl: float = REFERENCIA_CACHE_TTL):
+        self.ttl = ttl
+        self._tablas: dict = {}  # tabla -> (caduca, lista, por_id)
+        self._versiones = defaultdict(int)
+        self._lock = threading.Lock()
+        self._aciertos = defaultdict(int)
+        self._fallos = defaultdict(int)
+
+    def _obtener(self, tabla: str):
+        with self._lock:
+            datos = self._tablas.get(tabla)
+            if datos is None or datos[0] < time.monotonic():
+                self._fallos[tabla] += 1
+                return None, self._versiones[tabla]
+            self._aciertos[tabla] += 1
+            return datos[1:], None
+
+    def _guardar(self, tabla: str, lista: list, version: int) -> tuple:
+        datos = (lista, {objeto.id: objeto for objeto in lista})
+        with self._lock:
+            # Si la tabla cambió mientras se leía, se devuelve lo leído pero no se guarda
+            if version == self._versiones[tabla]:
+                self._tablas[tabla] = (time.monotonic() + self.ttl, *datos)
+        return datos
+
+    def cargar(self, tabla: str, leer) -> tuple:
+        """Devuelve (lista, por_id) de la tabla; si no está en caché llama a leer()"""
+        datos, version = self._obtener(tabla)
+        if datos is None:
+            datos = self._guardar(tabla, leer(), version)
+        return datos
+
+    async def cargar_async(self, tabla: str, leer) -> tuple:
+        """Como cargar(), con leer() asíncrona (repositorios aiomysql)"""
+        datos, version = self._obtener(tabla)
+        if datos is None:
+            datos = self._guardar(tabla, await leer(), version)
+        return datos
+
+    def invalidar(self, tabla: str) -> None:
+        with self._lock:
+            self._tablas.pop(tabla, None)
+            self._versiones[tabla] += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                tabla: {
+                    "version": self._versiones[tabla],
+                    "filas": len(self._tablas[tabla][1]) if tabla in self._tablas else 0,
+                    "aciertos": self._aciertos[tabla],
+                    "fallos": self._fallos[tabla],
+                }
+                for tabla in sorted(set(self._aciertos) | set(self._fallos) | set(self._versiones))
+            }
+
+
+# Estado de los usuarios para obtener_usuario_actual: user_id -> activo (None si no existe)
+estado_usuarios = TTLCache(USUARIOS_CACHE_TTL, USUARIOS_CACHE_MAXIMO)
+
+# Eras, regiones y habitats (ver EraRepository, RegionRepository y HabitatRepository)
+referencia = CacheReferencia()
+
+# Páginas del catálogo ya renderizadas (ver utils/cache_paginas.py). Etiquetas: el nombre de
+# cada tabla que sale en la página y "dinosaurio:<id>" en el detalle; los repositorios las
+# invalidan al escribir
+paginas = CacheEtiquetada(PAGINAS_CACHE_TTL, PAGINAS_CACHE_MAXIMO)
@@ -1,191 +1,450 @@
-from typing import List
-from domain.model.Comentario import Comentario
-
-
-class ComentarioRepository:
-
-    def get_by_dinosaurio(self, db, dinosaurio_id: int, usuario_id: int = None) -> List[Comentario]:
-        """Obtiene todos los comentarios de un dinosaurio (solo padres, sin respuestas)"""
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT c.id, c.dinosaurio_id, c.usuario_id, c.contenido, c.fecha_creacion, 
-                   c.comentario_padre_id, u.username, c.fecha_modificacion
-            FROM comentarios c
-            JOIN usuarios u ON c.usuario_id = u.id
-            WHERE c.dinosaurio_id = %s AND c.comentario_padre_id IS NULL
-            ORDER BY c.fecha_creacion DESC
-        """, (dinosaurio_id,))
-        comentarios_db = cursor.fetchall()
-        comentarios: List[Comentario] = []
-        for com in comentarios_db:
-            comentario = Comentario(
-                id=com[0],
-                dinosaurio_id=com[1],
-                usuario_id=com[2],
-                contenido=com[3],
-                fecha_creacion=str(com[4]) if com[4] else None,
-                comentario_padre_id=com[5],
-                usuario_nombre=com[6],
-                fecha_modificacion=str(com[7]) if com[7] else None
-            )
-            # Cargar votos
-            votos = self.get_votos(db, comentario.id, usuario_id)
-            comentario.votos_positivos = votos['positivos']
-            comentario.votos_negativos = votos['negativos']
-            comentario.voto_usuario = votos['voto_usuario']
-            
-            # Cargar respuestas
-            comentario.respuestas = self.get_respuestas(db, comentario.id, usuario_id)
-            comentarios.append(comentario)
-        cursor.close()
-        return comentarios
-
-    def get_respuestas(self, db, comentario_padre_id: int, usuario_id: int = None) -> List[Comentario]:
-        """Obtiene las respuestas de un comentario"""
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT c.id, c.dinosaurio_id, c.usuario_id, c.contenido, c.fecha_creacion, 
-                   c.comentario_padre_id, u.username, c.fecha_modificacion
-            FROM comentarios c
-            JOIN usuarios u ON c.usuario_id = u.id
-            WHERE c.comentario_padre_id = %s
-            ORDER BY c.fecha_creacion ASC
-        """, (comentario_padre_id,))
-        respuestas_db = cursor.fetchall()
-        respuestas: List[Comentario] = []
-        for resp in respuestas_db:
-            respuesta = Comentario(
-                id=resp[0],
-                dinosaurio_id=resp[1],
-                usuario_id=resp[2],
-                contenido=resp[3],
-                fecha_creacion=str(resp[4]) if resp[4] else None,
-                comentario_padre_id=resp[5],
-                usuario_nombre=resp[6],
-                fecha_modificacion=str(resp[7]) if resp[7] else None
-            )
-            # Cargar votos
-            votos = self.get_votos(db, respuesta.id, usuario_id)
-            respuesta.votos_positivos = votos['positivos']
-            respuesta.votos_negativos = votos['negativos']
-            respuesta.voto_usuario = votos['voto_usuario']
-            
-            respuestas.append(respuesta)
-        cursor.close()
-        return respuestas
-
-    def insertar_comentario(self, db, comentario: Comentario) -> int:
-        """Inserta un nuevo comentario"""
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO comentarios (dinosaurio_id, usuario_id, contenido, comentario_padre_id)
-            VALUES (%s, %s, %s, %s)
-        """, (comentario.dinosaurio_id, comentario.usuario_id, comentario.contenido, comentario.comentario_padre_id))
-        db.commit()
-        nuevo_id = cursor.lastrowid
-        cursor.close()
-        return nuevo_id
-
-    def actualizar_comentario(self, db, id: int, contenido: str) -> None:
-        """Actualiza el contenido de un comentario"""
-        cursor = db.cursor()
-        cursor.execute("""
-            UPDATE comentarios 
-            SET contenido = %s, fecha_modificacion = NOW()
-            WHERE id = %s
-        """, (contenido, id))
-        db.commit()
-        cursor.close()
-
-    def borrar_comentario(self, db, id: int) -> None:
-        """Borra un comentario (y sus respuestas por CASCADE)"""
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM comentarios WHERE id = %s", (id,))
-        db.commit()
-        cursor.close()
-
-    def contar_comentarios(self, db, dinosaurio_id: int) -> int:
-        """Cuenta el total de comentarios (incluyendo respuestas) de un dinosaurio"""
-        cursor = db.cursor()
-        cursor.execute("SELECT COUNT(*) FROM comentarios WHERE dinosaurio_id = %s", (dinosaurio_id,))
-        count = cursor.fetchone()[0]
-        cursor.close()
-        return count
-
-    def get_votos(self, db, comentario_id: int, usuario_id: int = None) -> dict:
-        """Obtiene el conteo de votos y el voto del usuario actual"""
-        cursor = db.cursor()
-        
-        # Contar votos positivos y negativos
-        cursor.execute("""
-            SELECT tipo_voto, COUNT(*) 
-            FROM comentario_votos 
-            WHERE comentario_id = %s
-            GROUP BY tipo_voto
-        """, (comentario_id,))
-        votos_resultado = cursor.fetchall()
-        
-        votos_positivos = 0
-        votos_negativos = 0
-        for tipo, count in votos_resultado:
-            if tipo == 'positivo':
-                votos_positivos = count
-            elif tipo == 'negativo':
-                votos_negativos = count
-        
-        # Obtener el voto del usuario actual si existe
-        voto_usuario = None
-        if usuario_id:
-            cursor.execute("""
-                SELECT tipo_voto 
-                FROM comentario_votos 
-                WHERE comentario_id = %s AND usuario_id = %s
-            """, (comentario_id, usuario_id))
-            resultado = cursor.fetchone()
-            if resultado:
-                voto_usuario = resultado[0]
-        
-        cursor.close()
-        return {
-            'positivos': votos_positivos,
-            'negativos': votos_negativos,
-            'voto_usuario': voto_usuario
-        }
-
-    def agregar_voto(self, db, comentario_id: int, usuario_id: int, tipo_voto: str) -> None:
-        """Agrega o actualiza un voto en un comentario"""
-        cursor = db.cursor()
-        
-        # Verificar si ya existe un voto
-        cursor.execute("""
-            SELECT id FROM comentario_votos 
-            WHERE comentario_id = %s AND usuario_id = %s
-        """, (comentario_id, usuario_id))
-        resultado = cursor.fetchone()
-        
-        if resultado:
-            # Actualizar voto existente
-            cursor.execute("""
-                UPDATE comentario_votos 
-                SET tipo_voto = %s 
-                WHERE comentario_id = %s AND usuario_id = %s
-            """, (tipo_voto, comentario_id, usuario_id))
-        else:
-            # Insertar nuevo voto
-            cursor.execute("""
-                INSERT INTO comentario_votos (comentario_id, usuario_id, tipo_voto)
-                VALUES (%s, %s, %s)
-            """, (comentario_id, usuario_id, tipo_voto))
-        
-        db.commit()
-        cursor.close()
-
-    def eliminar_voto(self, db, comentario_id: int, usuario_id: int) -> None:
-        """Elimina el voto de un usuario en un comentario"""
-        cursor = db.cursor()
-        cursor.execute("""
-            DELETE FROM comentario_votos 
-            WHERE comentario_id = %s AND usuario_id = %s
-        """, (comentario_id, usuario_id))
-        db.commit()
-        cursor.close()
+from collections import defaultdict
+from typing import List, Optional
+from domain.model.Comentario import Comentario
+from data.cache import paginas
+from data.dialect import dialecto
+from data.mapeo import mapeador
+from data.sentencias import consultar, consultar_uno
+from data.transaccion import al_confirmar, confirmar, confirmar_async, transaccion
+
+
+# Los totales de votos se leen de las columnas de comentarios; el voto del usuario
+# actual llega por LEFT JOIN (primer %s: usuario_id, que puede ser NULL)
+_SELECT_COMENTARIO = """
+            SELECT c.id, c.dinosaurio_id, c.usuario_id, c.contenido, c.fecha_creacion, 
+                   c.comentario_padre_id, u.username, c.fecha_modificacion,
+                   c.votos_positivos, c.votos_negativos, uv.tipo_voto
+            FROM comentarios c
+            JOIN usuarios u ON c.usuario_id = u.id
+            LEFT JOIN comentario_votos uv ON uv.comentario_id = c.id AND uv.usuario_id = %s
+"""
+# Todos los comentarios del dinosaurio (padres y respuestas) en orden cronológico
+_SQL_DE_DINOSAURIO = _SELECT_COMENTARIO + """
+            WHERE c.dinosaurio_id = %s
+            ORDER BY c.fecha_creacion ASC, c.id ASC
+        """
+_SQL_RESPUESTAS = _SELECT_COMENTARIO + """
+            WHERE c.comentario_padre_id = %s
+            ORDER BY c.fecha_creacion ASC
+        """
+_SQL_INSERTAR = """
+            INSERT INTO comentarios (dinosaurio_id, usuario_id, contenido, comentario_padre_id)
+            VALUES (%s, %s, %s, %s)
+        """
+_SQL_ACTUALIZAR = """
+            UPDATE comentarios 
+            SET contenido = %s, fecha_modificacion = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """
+_SQL_CONTAR = "SELECT COUNT(*) FROM comentarios WHERE dinosaurio_id = %s"
+_SQL_CONTADORES = "SELECT votos_positivos, votos_negativos FROM comentarios WHERE id = %s"
+_SQL_VOTO_USUARIO = """
+                SELECT tipo_voto 
+                FROM comentario_votos 
+                WHERE comentario_id = %s AND usuario_id = %s
+            """
+_SQL_ACTUALIZAR_VOTO = """
+                UPDATE comentario_votos 
+                SET tipo_voto = %s 
+                WHERE comentario_id = %s AND usuario_id = %s
+            """
+_SQL_INSERTAR_VOTO = """
+                INSERT INTO comentario_votos (comentario_id, usuario_id, tipo_voto)
+                VALUES (%s, %s, %s)
+            """
+_SQL_ELIMINAR_VOTO = """
+            DELETE FROM comentario_votos 
+            WHERE comentario_id = %s AND usuario_id = %s
+        """
+_SQL_SUMAR_CONTADORES = """
+            UPDATE comentarios
+            SET votos_positivos = votos_positivos + %s, votos_negativos = votos_negativos + %s
+            WHERE id = %s
+        """
+
+# Recuento: último id de cada lote y comentarios del lote cuyos contadores no cuadran
+_SQL_FIN_LOTE = """
+            SELECT MAX(id) FROM (
+                SELECT id FROM comentarios WHERE id > %s ORDER BY id LIMIT %s
+            ) lote
+        """
+_SQL_DESCUADRADOS = """
+            SELECT c.id
+            FROM comentarios c
+            LEFT JOIN comentario_votos v ON v.comentario_id = c.id
+            WHERE c.id > %s AND c.id <= %s
+            GROUP BY c.id, c.votos_positivos, c.votos_negativos
+            HAVING c.votos_positivos <> SUM(CASE WHEN v.tipo_voto = 'positivo' THEN 1 ELSE 0 END)
+                OR c.votos_negativos <> SUM(CASE WHEN v.tipo_voto = 'negativo' THEN 1 ELSE 0 END)
+        """
+_SQL_RECONTAR = """
+            UPDATE comentarios
+            SET votos_positivos = (SELECT COUNT(*) FROM comentario_votos v
+                                   WHERE v.comentario_id = comentarios.id AND v.tipo_voto = 'positivo'),
+                votos_negativos = (SELECT COUNT(*) FROM comentario_votos v
+                                   WHERE v.comentario_id = comentarios.id AND v.tipo_voto = 'negativo')
+            WHERE id IN ({})
+        """
+
+
+def _invalidar() -> None:
+    paginas.invalidar_etiquetas("comentarios")
+
+
+def _fecha(valor) -> Optional[str]:
+    return str(valor) if valor else None
+
+
+# Columnas de _SELECT_COMENTARIO en orden
+_a_comentario = mapeador(Comentario, ("id", "dinosaurio_id", "usuario_id", "contenido", "fecha_creacion",
+                                      "comentario_padre_id", "usuario_nombre", "fecha_modificacion",
+                                      "votos_positivos", "votos_negativos", "voto_usuario"),
+                         conversiones={"fecha_creacion": _fecha, "fecha_modificacion": _fecha})
+
+
+def _construir_arbol(filas_comentarios) -> List[Comentario]:
+    """Monta el árbol padre/respuestas en memoria a partir de la consulta de
+    get_by_dinosaurio. Los padres salen del más nuevo al más antiguo y las
+    respuestas en orden cronológico, como antes."""
+    comentarios = [_a_comentario(fila) for fila in filas_comentarios]
+    por_id = {comentario.id: comentario for comentario in comentarios}
+
+    padres: List[Comentario] = []
+    for comentario in comentarios:
+        padre = por_id.get(comentario.comentario_padre_id)
+        if comentario.comentario_padre_id is None:
+            padres.append(comentario)
+        elif padre:
+            padre.respuestas.append(comentario)
+    padres.reverse()
+    return padres
+
+
+def _sql_voto_actual(db) -> str:
+    # Bloquea el voto hasta el commit para que dos votos simultáneos no descuadren los contadores
+    return _SQL_VOTO_USUARIO + dialecto(db).bloquear_filas
+
+
+def _diferencia_votos(anterior: Optional[str], nuevo: Optional[str]) -> tuple:
+    """Cuánto cambian (positivos, negativos) al pasar del voto anterior al nuevo"""
+    positivos = (nuevo == 'positivo') - (anterior == 'positivo')
+    negativos = (nuevo == 'negativo') - (anterior == 'negativo')
+    return positivos, negativos
+
+
+def _sql_votos_actuales(db, n: int) -> str:
+    pares = ", ".join(["(%s, %s)"] * n)
+    return (f"SELECT comentario_id, usuario_id, tipo_voto FROM comentario_votos "
+            f"WHERE (comentario_id, usuario_id) IN ({pares})" + dialecto(db).bloquear_filas)
+
+
+def _sql_comentarios_existentes(db, n: int) -> str:
+    return (f"SELECT id FROM comentarios WHERE id IN ({', '.join(['%s'] * n)})"
+            + dialecto(db).bloquear_filas)
+
+
+def _sql_guardar_votos(db, n: int) -> str:
+    return dialecto(db).upsert_varios("comentario_votos", ("comentario_id", "usuario_id", "tipo_voto"),
+                                      ("comentario_id", "usuario_id"), ("tipo_voto",), n)
+
+
+def _sql_borrar_votos(n: int) -> str:
+    return f"DELETE FROM comentario_votos WHERE (comentario_id, usuario_id) IN ({', '.join(['(%s, %s)'] * n)})"
+
+
+def _plan_votos(votos: dict, existentes: set, anteriores: dict) -> tuple:
+    """Decide qué votos guardar y borrar y cuánto cambia cada contador.
+    votos: {(comentario_id, usuario_id): tipo_voto o None para quitarlo}"""
+    guardar, borrar = [], []
+    contadores = defaultdict(lambda: [0, 0])
+    for (comentario_id, usuario_id), tipo_voto in votos.items():
+        anterior = anteriores.get((comentario_id, usuario_id))
+        # Comentarios borrados mientras el voto esperaba, o votos que no cambian nada
+        if comentario_id not in existentes or anterior == tipo_voto:
+            continue
+        if tipo_voto is None:
+            borrar.extend((comentario_id, usuario_id))
+        else:
+            guardar.extend((comentario_id, usuario_id, tipo_voto))
+        positivos, negativos = _diferencia_votos(anterior, tipo_voto)
+        contadores[comentario_id][0] += positivos
+        contadores[comentario_id][1] += negativos
+    sumas = [(p, n, comentario_id) for comentario_id, (p, n) in contadores.items() if p or n]
+    return guardar, borrar, sumas
+
+
+def _a_votos(contadores, voto_usuario: Optional[str]) -> dict:
+    return {
+        'positivos': contadores[0] if contadores else 0,
+        'negativos': contadores[1] if contadores else 0,
+        'voto_usuario': voto_usuario
+    }
+
+
+class ComentarioRepository:
+
+    def get_by_dinosaurio(self, db, dinosaurio_id: int, usuario_id: int = None) -> List[Comentario]:
+        """Obtiene los comentarios de un dinosaurio con sus respuestas y votos
+        (una sola consulta, sin importar cuántos comentarios haya)"""
+        comentarios_db = consultar(db, _SQL_DE_DINOSAURIO, (usuario_id, dinosaurio_id))
+        return _construir_arbol(comentarios_db)
+
+    def get_respuestas(self, db, comentario_padre_id: int, usuario_id: int = None) -> List[Comentario]:
+        """Obtiene las respuestas de un comentario"""
+        respuestas_db = consultar(db, _SQL_RESPUESTAS, (usuario_id, comentario_padre_id))
+        respuestas: List[Comentario] = []
+        for resp in respuestas_db:
+            respuestas.append(_a_comentario(resp))
+        return respuestas
+
+    def insertar_comentario(self, db, comentario: Comentario) -> int:
+        """Inserta un nuevo comentario"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, (comentario.dinosaurio_id, comentario.usuario_id, comentario.contenido, comentario.comentario_padre_id))
+        confirmar(db)
+        nuevo_id = cursor.lastrowid
+        cursor.close()
+        al_confirmar(db, _invalidar)
+        return nuevo_id
+
+    def actualizar_comentario(self, db, id: int, contenido: str) -> None:
+        """Actualiza el contenido de un comentario"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, (contenido, id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _invalidar)
+
+    def borrar_comentario(self, db, id: int) -> None:
+        """Borra un comentario (y sus respuestas por CASCADE)"""
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM comentarios WHERE id = %s", (id,))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _invalidar)
+
+    def get_autor_id(self, db, id: int) -> Optional[int]:
+        """Obtiene el id del usuario que escribió un comentario (None si no existe)"""
+        cursor = db.cursor()
+        cursor.execute("SELECT usuario_id FROM comentarios WHERE id = %s", (id,))
+        resultado = cursor.fetchone()
+        cursor.close()
+        return resultado[0] if resultado else None
+
+    def contar_comentarios(self, db, dinosaurio_id: int) -> int:
+        """Cuenta el total de comentarios (incluyendo respuestas) de un dinosaurio"""
+        return consultar_uno(db, _SQL_CONTAR, (dinosaurio_id,))[0]
+
+    def get_votos(self, db, comentario_id: int, usuario_id: int = None) -> dict:
+        """Obtiene el conteo de votos y el voto del usuario actual"""
+        cursor = db.cursor()
+        
+        # Los totales ya están guardados en el comentario
+        cursor.execute(_SQL_CONTADORES, (comentario_id,))
+        contadores = cursor.fetchone()
+        
+        # Obtener el voto del usuario actual si existe
+        voto_usuario = None
+        if usuario_id:
+            cursor.execute(_SQL_VOTO_USUARIO, (comentario_id, usuario_id))
+            resultado = cursor.fetchone()
+            if resultado:
+                voto_usuario = resultado[0]
+        
+        cursor.close()
+        return _a_votos(contadores, voto_usuario)
+
+    def agregar_voto(self, db, comentario_id: int, usuario_id: int, tipo_voto: str) -> None:
+        """Agrega o actualiza un voto en un comentario y sus contadores
+        (en la misma transacción)"""
+        cursor = db.cursor()
+        
+        # Verificar si ya existe un voto
+        cursor.execute(_sql_voto_actual(db), (comentario_id, usuario_id))
+        resultado = cursor.fetchone()
+        anterior = resultado[0] if resultado else None
+        
+        if anterior == tipo_voto:
+            # El mismo voto otra vez: no cambia nada (se confirma solo para soltar el bloqueo)
+            confirmar(db)
+            cursor.close()
+            return
+        if anterior:
+            # Actualizar voto existente (pasa de positivo a negativo o al revés)
+            cursor.execute(_SQL_ACTUALIZAR_VOTO, (tipo_voto, comentario_id, usuario_id))
+        else:
+            # Insertar nuevo voto
+            cursor.execute(_SQL_INSERTAR_VOTO, (comentario_id, usuario_id, tipo_voto))
+        
+        positivos, negativos = _diferencia_votos(anterior, tipo_voto)
+        cursor.execute(_SQL_SUMAR_CONTADORES, (positivos, negativos, comentario_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _invalidar)
+
+    def eliminar_voto(self, db, comentario_id: int, usuario_id: int) -> None:
+        """Elimina el voto de un usuario en un comentario y lo descuenta"""
+        cursor = db.cursor()
+        cursor.execute(_sql_voto_actual(db), (comentario_id, usuario_id))
+        resultado = cursor.fetchone()
+        if resultado:
+            cursor.execute(_SQL_ELIMINAR_VOTO, (comentario_id, usuario_id))
+            positivos, negativos = _diferencia_votos(resultado[0], None)
+            cursor.execute(_SQL_SUMAR_CONTADORES, (positivos, negativos, comentario_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _invalidar)
+
+    def aplicar_votos(self, db, votos: dict) -> None:
+        """Aplica un lote de votos {(comentario_id, usuario_id): tipo_voto o None}
+        en una sola transacción: un upsert de varias filas, un DELETE y los contadores"""
+        if not votos:
+            return
+        cursor = db.cursor()
+        ids = list({comentario_id for comentario_id, _ in votos})
+        cursor.execute(_sql_comentarios_existentes(db, len(ids)), ids)
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        pares = [valor for clave in votos for valor in clave]
+        cursor.execute(_sql_votos_actuales(db, len(votos)), pares)
+        anteriores = {(c, u): tipo for c, u, tipo in cursor.fetchall()}
+
+        guardar, borrar, sumas = _plan_votos(votos, existentes, anteriores)
+        if guardar:
+            cursor.execute(_sql_guardar_votos(db, len(guardar) // 3), guardar)
+        if borrar:
+            cursor.execute(_sql_borrar_votos(len(borrar) // 2), borrar)
+        if sumas:
+            cursor.executemany(_SQL_SUMAR_CONTADORES, sumas)
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _invalidar)
+
+    def recalcular_votos(self, db, tamano_lote: int = 1000) -> int:
+        """Recalcula los contadores de votos a partir de comentario_votos, por lotes
+        de ids con una transacción por lote. Devuelve cuántos comentarios estaban descuadrados
+        (p. ej. al borrar un usuario sus votos desaparecen por CASCADE sin descontarse)."""
+        cursor = db.cursor()
+        reparados = 0
+        ultimo_id = 0
+        while True:
+            with transaccion(db):
+                cursor.execute(_SQL_FIN_LOTE, (ultimo_id, tamano_lote))
+                fin = cursor.fetchone()[0]
+                if fin is None:
+                    break
+                cursor.execute(_SQL_DESCUADRADOS, (ultimo_id, fin))
+                ids = [fila[0] for fila in cursor.fetchall()]
+                if ids:
+                    cursor.execute(_SQL_RECONTAR.format(", ".join(["%s"] * len(ids))), ids)
+                    reparados += len(ids)
+                    al_confirmar(db, _invalidar)
+            ultimo_id = fin
+        cursor.close()
+        return reparados
+
+
+class AsyncComentarioRepository:
+    """Misma interfaz que ComentarioRepository sobre una conexión aiomysql"""
+
+    async def get_by_dinosaurio(self, db, dinosaurio_id: int, usuario_id: int = None) -> List[Comentario]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_DE_DINOSAURIO, (usuario_id, dinosaurio_id))
+            comentarios_db = await cursor.fetchall()
+        return _construir_arbol(comentarios_db)
+
+    async def get_respuestas(self, db, comentario_padre_id: int, usuario_id: int = None) -> List[Comentario]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_RESPUESTAS, (usuario_id, comentario_padre_id))
+            return [_a_comentario(resp) for resp in await cursor.fetchall()]
+
+    async def insertar_comentario(self, db, comentario: Comentario) -> int:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_INSERTAR, (comentario.dinosaurio_id, comentario.usuario_id, comentario.contenido, comentario.comentario_padre_id))
+            await confirmar_async(db)
+            nuevo_id = cursor.lastrowid
+        al_confirmar(db, _invalidar)
+        return nuevo_id
+
+    async def actualizar_comentario(self, db, id: int, contenido: str) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_ACTUALIZAR, (contenido, id))
+            await confirmar_async(db)
+        al_confirmar(db, _invalidar)
+
+    async def borrar_comentario(self, db, id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute("DELETE FROM comentarios WHERE id = %s", (id,))
+            await confirmar_async(db)
+        al_confirmar(db, _invalidar)
+
+    async def get_autor_id(self, db, id: int) -> Optional[int]:
+        async with db.cursor() as cursor:
+            await cursor.execute("SELECT usuario_id FROM comentarios WHERE id = %s", (id,))
+            resultado = await cursor.fetchone()
+        return resultado[0] if resultado else None
+
+    async def contar_comentarios(self, db, dinosaurio_id: int) -> int:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_CONTAR, (dinosaurio_id,))
+            return (await cursor.fetchone())[0]
+
+    async def get_votos(self, db, comentario_id: int, usuario_id: int = None) -> dict:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_CONTADORES, (comentario_id,))
+            contadores = await cursor.fetchone()
+            voto_usuario = None
+            if usuario_id:
+                await cursor.execute(_SQL_VOTO_USUARIO, (comentario_id, usuario_id))
+                resultado = await cursor.fetchone()
+                if resultado:
+                    voto_usuario = resultado[0]
+        return _a_votos(contadores, voto_usuario)
+
+    async def agregar_voto(self, db, comentario_id: int, usuario_id: int, tipo_voto: str) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_sql_voto_actual(db), (comentario_id, usuario_id))
+            resultado = await cursor.fetchone()
+            anterior = resultado[0] if resultado else None
+            if anterior == tipo_voto:
+                await confirmar_async(db)
+                return
+            if anterior:
+                await cursor.execute(_SQL_ACTUALIZAR_VOTO, (tipo_voto, comentario_id, usuario_id))
+            else:
+                await cursor.execute(_SQL_INSERTAR_VOTO, (comentario_id, usuario_id, tipo_voto))
+            positivos, negativos = _diferencia_votos(anterior, tipo_voto)
+            await cursor.execute(_SQL_SUMAR_CONTADORES, (positivos, negativos, comentario_id))
+            await confirmar_async(db)
+        al_confirmar(db, _invalidar)
+
+    async def eliminar_voto(self, db, comentario_id: int, usuario_id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_sql_voto_actual(db), (comentario_id, usuario_id))
+            resultado = await cursor.fetchone()
+            if resultado:
+                await cursor.execute(_SQL_ELIMINAR_VOTO, (comentario_id, usuario_id))
+                positivos, negativos = _diferencia_votos(resultado[0], None)
+                await cursor.execute(_SQL_SUMAR_CONTADORES, (positivos, negativos, comentario_id))
+            await confirmar_async(db)
+        al_confirmar(db, _invalidar)
+
+    async def aplicar_votos(self, db, votos: dict) -> None:
+        if not votos:
+            return
+        async with db.cursor() as cursor:
+            ids = list({comentario_id for comentario_id, _ in votos})
+            await cursor.execute(_sql_comentarios_existentes(db, len(ids)), ids)
+            existentes = {fila[0] for fila in await cursor.fetchall()}
+            pares = [valor for clave in votos for valor in clave]
+            await cursor.execute(_sql_votos_actuales(db, len(votos)), pares)
+            anteriores = {(c, u): tipo for c, u, tipo in await cursor.fetchall()}
+
+            guardar, borrar, sumas = _plan_votos(votos, existentes, anteriores)
+            if guardar:
+                await cursor.execute(_sql_guardar_votos(db, len(guardar) // 3), guardar)
+            if borrar:
+                await cursor.execute(_sql_borrar_votos(len(borrar) // 2), borrar)
+            if sumas:
+                await cursor.executemany(_SQL_SUMAR_CONTADORES, sumas)
+            await confirmar_async(db)
+        al_confirmar(db, _invalidar)
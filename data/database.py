@@ -1,22 +1,171 @@
-import mysql.connector 
-
-
-
-# database = mysql.connector.connect( # LLAMAMOS AL FUNCION CONNECT PARA CONECTARNOS
-#     host ='localhost',
-#     port = 3306,
-
-#     ssl_disabled = False,
-#     user ='root', #USUARIO QUE USAMOS NOSOTROS
-#     password ='root' #CONTRASEÑA CON LA QUE NOS CONECTAMOS
-#     # database='oscar'
-# ) 
-
-database = mysql.connector.connect( # LLAMAMOS AL FUNCION CONNECT PARA CONECTARNOS
-    host ='informatica.iesquevedo.es',
-    port = 3333,
-    ssl_disabled = True,
-    user ='root', #USUARIO QUE USAMOS NOSOTROS
-    password ='1asir', #CONTRASEÑA CON LA QUE NOS CONECTAMOS
-    database='thomas'
-) 
\ No newline at end of file
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+# Backend de acceso a datos: "mysql" (mysql-connector en hilos), "aiomysql" (asyncio nativo)
+# o "sqlite" (fichero local, sin red: nodos de solo lectura, benchmarks y pruebas)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "mysql").lower()
+
+# Configuración de la conexión: se lee de las variables DATABASE_* que pasa
+# docker-compose. Los valores por defecto son los del servidor del instituto.
+DB_CONFIG = {
+    "host": os.getenv("DATABASE_HOST", "informatica.iesquevedo.es"),
+    "port": int(os.getenv("DATABASE_PORT", "3333")),
+    "user": os.getenv("DATABASE_USER", "root"),
+    "password": os.getenv("DATABASE_PASSWORD", "1asir"),
+    "database": os.getenv("DATABASE_NAME", "thomas"),
+    "ssl_disabled": os.getenv("DATABASE_SSL_DISABLED", "true").lower() in ("1", "true", "yes"),
+}
+
+# Configuración del pool
+POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN", "2"))
+POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))  # Segundos esperando una conexión libre
+POOL_VALIDAR_TRAS = float(os.getenv("DATABASE_POOL_VALIDATE_AFTER", "30"))  # Segundos ociosa antes de hacer ping
+
+
+class PoolTimeoutError(RuntimeError):
+    """No se ha podido obtener una conexión del pool a tiempo"""
+
+
+class ConnectionPool:
+    """Pool de conexiones thread-safe con tamaño mínimo/máximo,
+    timeout al pedir conexión, validación al prestarla y reconexión automática"""
+
+    def __init__(self, crear_conexion, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 timeout: float = POOL_TIMEOUT, validar_tras: float = POOL_VALIDAR_TRAS):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamaños de pool no válidos")
+        self._crear_conexion = crear_conexion
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validar_tras = validar_tras
+        self._libres = deque()  # (conexion, instante en que se devolvió)
+        self._total = 0  # Conexiones abiertas (libres + prestadas)
+        self._cerrado = False
+        self._cond = threading.Condition()
+
+    def iniciar(self) -> None:
+        """Abre las conexiones mínimas por adelantado"""
+        with self._cond:
+            while self._total < self.min_size:
+                self._libres.append((self._crear_conexion(), time.monotonic()))
+                self._total += 1
+
+    def obtener_conexion(self):
+        """Presta una conexión, esperando como mucho `timeout` segundos"""
+        limite = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+                if self._libres:
+                    conexion, devuelta = self._libres.pop()
+                    break
+                if self._total < self.max_size:
+                    # Reservamos el hueco y abrimos la conexión fuera del lock
+                    self._total += 1
+                    conexion = None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres tras {self.timeout}s (máximo {self.max_size})"
+                    )
+                self._cond.wait(restante)
+
+        try:
+            if conexion is None:
+                return self._crear_conexion()
+            return self._validar(conexion, devuelta)
+        except Exception:
+            self._descartar()
+            raise
+
+    def liberar_conexion(self, conexion) -> None:
+        """Devuelve una conexión al pool deshaciendo cualquier transacción abierta"""
+        try:
+            # rollback() cierra también la instantánea de lectura de REPEATABLE READ,
+            # así la siguiente petición no ve datos antiguos
+            conexion.rollback()
+        except Exception:
+            self._cerrar_silencioso(conexion)
+            self._descartar()
+            return
+
+        with self._cond:
+            if self._cerrado:
+                self._total -= 1
+                self._cerrar_silencioso(conexion)
+                return
+            self._libres.append((conexion, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def conexion(self):
+        """Uso: with pool.conexion() as db: ..."""
+        db = self.obtener_conexion()
+        try:
+            yield db
+        finally:
+            self.liberar_conexion(db)
+
+    def cerrar(self) -> None:
+        """Cierra todas las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._cond:
+            self._cerrado = True
+            while self._libres:
+                conexion, _ = self._libres.pop()
+                self._total -= 1
+                self._cerrar_silencioso(conexion)
+            self._cond.notify_all()
+
+    def estadisticas(self) -> dict:
+        with self._cond:
+            return {
+                "min": self.min_size,
+                "max": self.max_size,
+                "abiertas": self._total,
+                "libres": len(self._libres),
+                "prestadas": self._total - len(self._libres),
+            }
+
+    def _validar(self, conexion, devuelta: float):
+        """Comprueba la conexión si lleva tiempo ociosa y la reabre si se ha caído"""
+        if time.monotonic() - devuelta < self.validar_tras:
+            return conexion
+        try:
+            conexion.ping(reconnect=True, attempts=2, delay=0)
+            return conexion
+        except Exception:
+            self._cerrar_silencioso(conexion)
+            return self._crear_conexion()
+
+    def _descartar(self) -> None:
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _cerrar_silencioso(conexion) -> None:
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+
+def _crear_conexion_mysql():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+if DATABASE_BACKEND == "sqlite":
+    from data.sqlite_backend import crear_conexion_sqlite
+    pool = ConnectionPool(crear_conexion_sqlite)
+else:
+    pool = ConnectionPool(_crear_conexion_mysql)
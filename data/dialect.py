@@ -0,0 +1,76 @@
+def _valores(columnas: tuple, filas: int) -> str:
+    """"(%s, %s), (%s, %s)" para un INSERT de varias filas"""
+    return ", ".join(["(" + ", ".join(["%s"] * len(columnas)) + ")"] * filas)
+
+
+class MySQLDialect:
+    """SQL específico de MySQL (mysql-connector y aiomysql)"""
+
+    nombre = "mysql"
+    # Sufijo de SELECT que bloquea las filas leídas hasta el commit
+    bloquear_filas = " FOR UPDATE"
+
+    def insertar_ignorando(self, tabla: str, columnas: tuple, filas: int = 1) -> str:
+        """INSERT (de una o varias filas) que no falla si la fila ya existe (clave duplicada)"""
+        return (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {_valores(columnas, filas)} "
+            f"ON DUPLICATE KEY UPDATE {columnas[0]} = {columnas[0]}"
+        )
+
+    def concatenar(self, expresion: str, separador: str) -> str:
+        """Agregado que une los valores de un grupo en un texto: "a|b|c" """
+        return f"GROUP_CONCAT({expresion} ORDER BY {expresion} SEPARATOR '{separador}')"
+
+    def upsert_varios(self, tabla: str, columnas: tuple, claves: tuple, actualizar: tuple, filas: int) -> str:
+        """INSERT de varias filas que, si la clave ya existe, actualiza las columnas indicadas"""
+        cambios = ", ".join(f"{c} = VALUES({c})" for c in actualizar)
+        return (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {_valores(columnas, filas)} "
+            f"ON DUPLICATE KEY UPDATE {cambios}"
+        )
+
+    def cursor_preparado(self, db):
+        """Cursor que prepara su sentencia en el servidor la primera vez y luego solo
+        envía los parámetros (protocolo binario)"""
+        return db.cursor(prepared=True)
+
+
+class SQLiteDialect:
+    """SQL específico de SQLite. Los repositorios siguen escribiendo %s:
+    la conexión SQLite los traduce a ? al ejecutar"""
+
+    nombre = "sqlite"
+    # SQLite bloquea la base de datos entera al escribir: no hay bloqueo por fila
+    bloquear_filas = ""
+
+    def insertar_ignorando(self, tabla: str, columnas: tuple, filas: int = 1) -> str:
+        return (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {_valores(columnas, filas)} "
+            f"ON CONFLICT DO NOTHING"
+        )
+
+    def concatenar(self, expresion: str, separador: str) -> str:
+        # El ORDER BY dentro del agregado es de SQLite 3.44: aquí el orden no está garantizado
+        return f"group_concat({expresion}, '{separador}')"
+
+    def upsert_varios(self, tabla: str, columnas: tuple, claves: tuple, actualizar: tuple, filas: int) -> str:
+        cambios = ", ".join(f"{c} = excluded.{c}" for c in actualizar)
+        return (
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {_valores(columnas, filas)} "
+            f"ON CONFLICT ({', '.join(claves)}) DO UPDATE SET {cambios}"
+        )
+
+    def cursor_preparado(self, db):
+        # sqlite3 ya guarda compiladas las últimas sentencias de cada conexión por su texto
+        # (cached_statements): basta con un cursor normal
+        return db.cursor()
+
+
+MYSQL = MySQLDialect()
+SQLITE = SQLiteDialect()
+
+
+def dialecto(db):
+    """Dialecto de una conexión: las conexiones SQLite lo llevan como atributo,
+    cualquier otra se trata como MySQL"""
+    return getattr(db, "dialecto", MYSQL)
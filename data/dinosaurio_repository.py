@@ -1,146 +1,788 @@
-from typing import List, Optional
-from domain.model.Dinosaurio import Dinosaurio
-
-
-class DinosaurioRepository:
-
-    def get_all(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None, 
-                region_id: Optional[int] = None, dieta: Optional[str] = None) -> List[Dinosaurio]:
-        """Obtiene todos los dinosaurios con filtros opcionales"""
-        cursor = db.cursor()
-        
-        # Construir query dinámicamente
-        query = """
-            SELECT id, nombre, descripcion, tipo, peso_kg, altura_metros, longitud_metros, 
-                   dieta, era_id, region_id, creador_id, imagen 
-            FROM dinosaurios 
-            WHERE 1=1
-        """
-        params = []
-        
-        # Filtro de búsqueda por nombre o descripción
-        if busqueda:
-            query += " AND (nombre LIKE %s OR descripcion LIKE %s)"
-            params.extend([f"%{busqueda}%", f"%{busqueda}%"])
-        
-        # Filtro por era
-        if era_id:
-            query += " AND era_id = %s"
-            params.append(era_id)
-        
-        # Filtro por región
-        if region_id:
-            query += " AND region_id = %s"
-            params.append(region_id)
-        
-        # Filtro por dieta
-        if dieta:
-            query += " AND dieta = %s"
-            params.append(dieta)
-        
-        query += " ORDER BY nombre"
-        
-        cursor.execute(query, params)
-        dinosaurios_en_db = cursor.fetchall()
-        dinosaurios: List[Dinosaurio] = list()
-        for dino in dinosaurios_en_db:
-            dinosaurio = Dinosaurio(dino[0], dino[1], dino[2], dino[3], dino[4], dino[5], 
-                                   dino[6], dino[7], dino[8], dino[9], dino[10], dino[11])
-            dinosaurios.append(dinosaurio)
-        cursor.close()
-        return dinosaurios
-
-    def get_by_id(self, db, id: int) -> Dinosaurio:
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT id, nombre, descripcion, tipo, peso_kg, altura_metros, longitud_metros, 
-                   dieta, era_id, region_id, creador_id, imagen 
-            FROM dinosaurios 
-            WHERE id = %s
-        """, (id,))
-        dino = cursor.fetchone()
-        cursor.close()
-        if dino:
-            return Dinosaurio(dino[0], dino[1], dino[2], dino[3], dino[4], dino[5], 
-                            dino[6], dino[7], dino[8], dino[9], dino[10], dino[11])
-        return None
-
-    def insertar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> int:
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO dinosaurios (nombre, descripcion, tipo, peso_kg, altura_metros, 
-                                    longitud_metros, dieta, era_id, region_id, creador_id, imagen) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (dinosaurio.nombre, dinosaurio.descripcion, dinosaurio.tipo, dinosaurio.peso_kg,
-              dinosaurio.altura_metros, dinosaurio.longitud_metros, dinosaurio.dieta,
-              dinosaurio.era_id, dinosaurio.region_id, dinosaurio.creador_id, dinosaurio.imagen))
-        db.commit()
-        
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Insert no rows affected")
-        
-        nuevo_id = cursor.lastrowid
-        cursor.close()
-        return nuevo_id
-
-    def actualizar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> None:
-        cursor = db.cursor()
-        cursor.execute("""
-            UPDATE dinosaurios 
-            SET nombre = %s, descripcion = %s, tipo = %s, peso_kg = %s, altura_metros = %s,
-                longitud_metros = %s, dieta = %s, era_id = %s, region_id = %s, imagen = %s
-            WHERE id = %s
-        """, (dinosaurio.nombre, dinosaurio.descripcion, dinosaurio.tipo, dinosaurio.peso_kg,
-              dinosaurio.altura_metros, dinosaurio.longitud_metros, dinosaurio.dieta,
-              dinosaurio.era_id, dinosaurio.region_id, dinosaurio.imagen, dinosaurio.id))
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Update affected no rows")
-        cursor.close()
-
-    def borrar_dinosaurio(self, db, id: int) -> None:
-        cursor = db.cursor()
-        # Primero borramos las relaciones N-M
-        cursor.execute("DELETE FROM dinosaurios_habitats WHERE dinosaurio_id = %s", (id,))
-        # Luego borramos el dinosaurio
-        cursor.execute("DELETE FROM dinosaurios WHERE id = %s", (id,))
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Delete affected no rows")
-        cursor.close()
-
-    def agregar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
-        """Agrega un habitat a un dinosaurio (relación N-M)"""
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO dinosaurios_habitats (dinosaurio_id, habitat_id) 
-            VALUES (%s, %s)
-            ON DUPLICATE KEY UPDATE dinosaurio_id = dinosaurio_id
-        """, (dinosaurio_id, habitat_id))
-        db.commit()
-        cursor.close()
-
-    def quitar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
-        """Quita un habitat de un dinosaurio"""
-        cursor = db.cursor()
-        cursor.execute("""
-            DELETE FROM dinosaurios_habitats 
-            WHERE dinosaurio_id = %s AND habitat_id = %s
-        """, (dinosaurio_id, habitat_id))
-        db.commit()
-        cursor.close()
-
-    def get_habitats(self, db, dinosaurio_id: int) -> List[int]:
-        """Obtiene los IDs de habitats asociados a un dinosaurio"""
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT habitat_id FROM dinosaurios_habitats 
-            WHERE dinosaurio_id = %s
-        """, (dinosaurio_id,))
-        habitats = cursor.fetchall()
-        cursor.close()
-        return [h[0] for h in habitats] if habitats else []
-
+from typing import List, Optional
+from data.aio_database import aiomysql
+from domain.model.Dinosaurio import Dinosaurio
+from domain.model.Era import Era
+from domain.model.Region import Region
+from domain.model.Habitat import Habitat
+from data.busqueda import buscador, marcar_resultado, pagina_de_ranking
+from data.cache import paginas
+from data.dialect import dialecto
+from data.facetas import facetas
+from data.paginacion import Cursor, Pagina, TAMANO_PAGINA, construir_pagina, sql_pagina
+from data.mapeo import mapeador
+from data.sentencias import consultar, consultar_uno
+from data.transaccion import al_confirmar, confirmar, confirmar_async
+
+# Máximo de ids por cada IN (...) al cargar relaciones en lote
+TAMANO_LOTE_IN = 500
+# Filas por cada INSERT de varias filas en las cargas en lote (11 parámetros por fila)
+TAMANO_LOTE_INSERT = 500
+# Filas que se leen de cada vez del cursor de la exportación
+TAMANO_TROZO_EXPORTACION = 1000
+
+# Peso de cada campo en el índice de búsqueda: el nombre cuenta más que la descripción
+_PESOS_BUSQUEDA = {"nombre": 3.0, "tipo": 1.5, "dieta": 1.0, "descripcion": 1.0}
+
+
+# SQL compartido por el repositorio síncrono y el asíncrono
+_SELECT_DINOSAURIO = """
+            SELECT id, nombre, descripcion, tipo, peso_kg, altura_metros, longitud_metros,
+                   dieta, era_id, region_id, creador_id, imagen
+            FROM dinosaurios
+"""
+_SQL_GET_BY_ID = _SELECT_DINOSAURIO + " WHERE id = %s"
+
+# Listado con la era y la región resueltas por JOIN (las columnas de eras/regiones
+# van detrás de las del dinosaurio, en el orden de sus modelos)
+_SELECT_CON_RELACIONES = """
+            SELECT d.id, d.nombre, d.descripcion, d.tipo, d.peso_kg, d.altura_metros,
+                   d.longitud_metros, d.dieta, d.era_id, d.region_id, d.creador_id, d.imagen,
+                   e.id, e.nombre, e.periodo_inicio, e.periodo_fin, e.descripcion, e.imagen,
+                   r.id, r.nombre, r.pais, r.continente, r.descripcion, r.imagen
+            FROM dinosaurios d
+            LEFT JOIN eras e ON e.id = d.era_id
+            LEFT JOIN regiones r ON r.id = d.region_id
+"""
+
+# Habitats de varios dinosaurios a la vez; {} se sustituye por los %s del IN
+_SQL_HABITATS_DE = """
+            SELECT dh.dinosaurio_id, h.id, h.nombre, h.tipo_ambiente, h.descripcion
+            FROM dinosaurios_habitats dh
+            JOIN habitats h ON h.id = dh.habitat_id
+            WHERE dh.dinosaurio_id IN ({})
+            ORDER BY h.nombre
+        """
+
+# Textos con los que se construye el índice de búsqueda
+_SQL_DOCUMENTOS = "SELECT id, nombre, tipo, dieta, descripcion FROM dinosaurios"
+# Firma de la tabla para saber si los índices de búsqueda y de facetas se han quedado atrás
+_SQL_FIRMA = "SELECT COUNT(*), MAX(id) FROM dinosaurios"
+
+# Lo que necesita el índice de facetas
+_SQL_FACETAS = "SELECT id, era_id, region_id, dieta FROM dinosaurios"
+_SQL_FACETAS_HABITATS = "SELECT dinosaurio_id, habitat_id FROM dinosaurios_habitats"
+
+_SQL_INSERTAR = """
+            INSERT INTO dinosaurios (nombre, descripcion, tipo, peso_kg, altura_metros,
+                                    longitud_metros, dieta, era_id, region_id, creador_id, imagen)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+
+# Catálogo completo para exportar: una sola consulta (el cursor del servidor no admite otras
+# a la vez en la conexión) que sale en orden de la clave primaria, sin ordenar en memoria.
+# Los habitats van unidos con | como los espera la importación; {} es el agregado del dialecto
+_SQL_EXPORTAR = """
+            SELECT d.id, d.nombre, d.descripcion, d.tipo, d.peso_kg, d.altura_metros,
+                   d.longitud_metros, d.dieta, e.nombre, r.nombre,
+                   (SELECT {} FROM dinosaurios_habitats dh JOIN habitats h ON h.id = dh.habitat_id
+                    WHERE dh.dinosaurio_id = d.id),
+                   (SELECT COUNT(*) FROM comentarios c WHERE c.dinosaurio_id = d.id),
+                   d.imagen
+            FROM dinosaurios d
+            LEFT JOIN eras e ON e.id = d.era_id
+            LEFT JOIN regiones r ON r.id = d.region_id
+            ORDER BY d.id
+        """
+# Nombres de las columnas de _SQL_EXPORTAR
+COLUMNAS_EXPORTACION = ("id", "nombre", "descripcion", "tipo", "peso_kg", "altura_metros", "longitud_metros",
+                        "dieta", "era", "region", "habitats", "comentarios", "imagen")
+
+# Cuáles de una lista de nombres ya existen; {} se sustituye por los %s del IN
+_SQL_NOMBRES_EXISTENTES = "SELECT nombre FROM dinosaurios WHERE nombre IN ({})"
+_SQL_IDS_POR_NOMBRE = "SELECT id, nombre FROM dinosaurios WHERE nombre IN ({})"
+
+_SQL_ACTUALIZAR = """
+            UPDATE dinosaurios
+            SET nombre = %s, descripcion = %s, tipo = %s, peso_kg = %s, altura_metros = %s,
+                longitud_metros = %s, dieta = %s, era_id = %s, region_id = %s, imagen = %s
+            WHERE id = %s
+        """
+
+_SQL_QUITAR_HABITAT = """
+            DELETE FROM dinosaurios_habitats
+            WHERE dinosaurio_id = %s AND habitat_id = %s
+        """
+
+# Quita los habitats que ya no tiene; {} se sustituye por los %s del NOT IN
+_SQL_QUITAR_HABITATS_SALVO = "DELETE FROM dinosaurios_habitats WHERE dinosaurio_id = %s AND habitat_id NOT IN ({})"
+_SQL_QUITAR_HABITATS = "DELETE FROM dinosaurios_habitats WHERE dinosaurio_id = %s"
+
+_SQL_GET_HABITATS = """
+            SELECT habitat_id FROM dinosaurios_habitats
+            WHERE dinosaurio_id = %s
+        """
+
+
+def _filtros_get_all(era_id: Optional[int], region_id: Optional[int], dieta: Optional[str],
+                     alias: str = "", habitat_id: Optional[int] = None):
+    """Condiciones WHERE de los listados; alias es el prefijo de la tabla (p. ej. "d.").
+    La búsqueda de texto no va aquí: la resuelve el índice (ver _ranking)"""
+    condiciones = " WHERE 1=1"
+    params = []
+
+    # Filtro por era
+    if era_id:
+        condiciones += f" AND {alias}era_id = %s"
+        params.append(era_id)
+
+    # Filtro por región
+    if region_id:
+        condiciones += f" AND {alias}region_id = %s"
+        params.append(region_id)
+
+    # Filtro por dieta
+    if dieta:
+        condiciones += f" AND {alias}dieta = %s"
+        params.append(dieta)
+
+    # Filtro por habitat (relación N-M)
+    if habitat_id:
+        condiciones += f" AND {alias}id IN (SELECT dinosaurio_id FROM dinosaurios_habitats WHERE habitat_id = %s)"
+        params.append(habitat_id)
+
+    return condiciones, params
+
+
+def _query_get_all(era_id: Optional[int], region_id: Optional[int], dieta: Optional[str]):
+    """Construye la consulta de get_all con sus parámetros"""
+    condiciones, params = _filtros_get_all(era_id, region_id, dieta)
+    return _SELECT_DINOSAURIO + condiciones + " ORDER BY nombre", params
+
+
+def _query_get_all_con_relaciones(era_id: Optional[int], region_id: Optional[int],
+                                  dieta: Optional[str]):
+    """Como _query_get_all, pero trae la era y la región en la misma consulta"""
+    condiciones, params = _filtros_get_all(era_id, region_id, dieta, alias="d.")
+    return _SELECT_CON_RELACIONES + condiciones + " ORDER BY d.nombre", params
+
+
+def _marcadores(n: int) -> str:
+    return ", ".join(["%s"] * n)
+
+
+def _sql_habitats_de(n: int) -> str:
+    return _SQL_HABITATS_DE.format(_marcadores(n))
+
+
+def _sql_con_relaciones_de(n: int) -> str:
+    return _SELECT_CON_RELACIONES + f" WHERE d.id IN ({_marcadores(n)})"
+
+
+def _sql_insertar_varios(n: int) -> str:
+    """_SQL_INSERTAR con n filas en el VALUES"""
+    cabecera, valores = _SQL_INSERTAR.split("VALUES")
+    return cabecera + "VALUES " + ", ".join([valores.strip()] * n)
+
+
+def _sql_ids_filtrados(condiciones: str, n: int) -> str:
+    """Cuáles de n ids cumplen los filtros de _filtros_get_all"""
+    return f"SELECT id FROM dinosaurios{condiciones} AND id IN ({_marcadores(n)})"
+
+
+def _campos_busqueda(dinosaurio: Dinosaurio) -> dict:
+    return {"nombre": dinosaurio.nombre, "tipo": dinosaurio.tipo, "dieta": dinosaurio.dieta,
+            "descripcion": dinosaurio.descripcion}
+
+
+def _a_documentos(filas) -> list:
+    return [(fila[0], {"nombre": fila[1], "tipo": fila[2], "dieta": fila[3], "descripcion": fila[4]})
+            for fila in filas]
+
+
+def _ordenar_resultados(dinosaurios: list, ranking: list, busqueda: str) -> List[Dinosaurio]:
+    """Pone los dinosaurios en el orden del ranking con su relevancia y sus fragmentos"""
+    por_id = {dino.id: dino for dino in dinosaurios}
+    resultado = []
+    for id, puntos in ranking:
+        dino = por_id.get(id)
+        if dino is not None:  # Puede haberse borrado desde otro worker
+            marcar_resultado(dino, puntos, busqueda)
+            resultado.append(dino)
+    return resultado
+
+
+def _lotes(ids: list, tamano: int = TAMANO_LOTE_IN):
+    for inicio in range(0, len(ids), tamano):
+        yield ids[inicio:inicio + tamano]
+
+
+def _ids_en_orden(filas: list, lote: List[Dinosaurio]) -> list:
+    """Ids de los dinosaurios del lote, en su orden, a partir de filas (id, nombre).
+    No se deducen de lastrowid: con auto_increment_increment > 1 (Galera, varios
+    primarios) los ids de un INSERT de varias filas no son consecutivos"""
+    por_nombre = {nombre: id for id, nombre in filas}
+    return [por_nombre[dinosaurio.nombre] for dinosaurio in lote]
+
+
+def _sql_agregar_habitat(db, filas: int = 1) -> str:
+    # Si la relación ya existe no se hace nada (cada dialecto lo escribe a su manera)
+    return dialecto(db).insertar_ignorando("dinosaurios_habitats", ("dinosaurio_id", "habitat_id"), filas)
+
+
+def _sql_exportar(db) -> str:
+    return _SQL_EXPORTAR.format(dialecto(db).concatenar("h.nombre", "|"))
+
+
+def _aplanar(filas) -> list:
+    return [valor for fila in filas for valor in fila]
+
+
+def _sql_sincronizar_habitats(db, dinosaurio_id: int, habitats: list) -> list:
+    """[(query, params)] que dejan al dinosaurio con esos habitats, sin leer antes los que tiene"""
+    if not habitats:
+        return [(_SQL_QUITAR_HABITATS, (dinosaurio_id,))]
+    return [
+        (_SQL_QUITAR_HABITATS_SALVO.format(_marcadores(len(habitats))), [dinosaurio_id] + habitats),
+        (_sql_agregar_habitat(db, len(habitats)), _aplanar((dinosaurio_id, h) for h in habitats)),
+    ]
+
+
+# Lo que se actualiza tras el commit (ver data/transaccion.py): índices de búsqueda y facetas y páginas
+
+def _tras_insertar(nuevo_id: int, dinosaurio: Dinosaurio) -> None:
+    buscador.actualizar("dinosaurios", nuevo_id, _campos_busqueda(dinosaurio))
+    facetas.poner(nuevo_id, dinosaurio.era_id, dinosaurio.region_id, dinosaurio.dieta, ())
+    paginas.invalidar_etiquetas("dinosaurios")
+
+
+def _tras_actualizar(dinosaurio: Dinosaurio) -> None:
+    buscador.actualizar("dinosaurios", dinosaurio.id, _campos_busqueda(dinosaurio))
+    facetas.poner(dinosaurio.id, dinosaurio.era_id, dinosaurio.region_id, dinosaurio.dieta)
+    paginas.invalidar_etiquetas("dinosaurios", f"dinosaurio:{dinosaurio.id}")
+
+
+def _tras_borrar(id: int) -> None:
+    buscador.quitar("dinosaurios", id)
+    facetas.quitar(id)
+    paginas.invalidar_etiquetas("dinosaurios", f"dinosaurio:{id}")
+
+
+def _tras_habitat(dinosaurio_id: int, habitat_id: int, presente: bool) -> None:
+    facetas.habitat(dinosaurio_id, habitat_id, presente)
+    paginas.invalidar_etiquetas("dinosaurios", f"dinosaurio:{dinosaurio_id}")
+
+
+def _tras_sincronizar(dinosaurio_id: int, habitats: list) -> None:
+    facetas.habitats(dinosaurio_id, habitats)
+    paginas.invalidar_etiquetas("dinosaurios", f"dinosaurio:{dinosaurio_id}")
+
+
+def _tras_lote() -> None:
+    """Tras una carga en lote es más barato rehacer los índices que tocarlos fila a fila"""
+    buscador.invalidar("dinosaurios")
+    facetas.invalidar()
+    paginas.invalidar_etiquetas("dinosaurios")
+
+
+# Columnas de _SELECT_DINOSAURIO y de cada tabla en _SELECT_CON_RELACIONES, en orden
+_COLUMNAS_DINOSAURIO = ("id", "nombre", "descripcion", "tipo", "peso_kg", "altura_metros", "longitud_metros",
+                        "dieta", "era_id", "region_id", "creador_id", "imagen")
+_COLUMNAS_ERA = ("id", "nombre", "periodo_inicio", "periodo_fin", "descripcion", "imagen")
+_COLUMNAS_REGION = ("id", "nombre", "pais", "continente", "descripcion", "imagen")
+_COLUMNAS_HABITAT = ("id", "nombre", "tipo_ambiente", "descripcion")
+
+_a_dinosaurio = mapeador(Dinosaurio, _COLUMNAS_DINOSAURIO)
+_a_era_de_fila = mapeador(Era, _COLUMNAS_ERA, desde=12)
+_a_region_de_fila = mapeador(Region, _COLUMNAS_REGION, desde=18)
+_a_habitat_de_fila = mapeador(Habitat, _COLUMNAS_HABITAT, desde=1)
+
+
+def _a_dinosaurios_con_relaciones(filas) -> List[Dinosaurio]:
+    """Filas de _SELECT_CON_RELACIONES -> dinosaurios con era y region. Cada era y región se
+    crea una vez por consulta y la comparten sus dinosaurios (solo se leen, como las de la
+    caché de referencia que se asignan en el detalle)"""
+    eras, regiones = {}, {}
+    dinosaurios = []
+    for fila in filas:
+        dino = _a_dinosaurio(fila)
+        # Con LEFT JOIN, una era o región inexistente llega como columnas NULL
+        era_id, region_id = fila[12], fila[18]
+        if era_id is None:
+            dino.era = None
+        else:
+            dino.era = eras.get(era_id) or eras.setdefault(era_id, _a_era_de_fila(fila))
+        if region_id is None:
+            dino.region = None
+        else:
+            dino.region = regiones.get(region_id) or regiones.setdefault(region_id, _a_region_de_fila(fila))
+        dinosaurios.append(dino)
+    return dinosaurios
+
+
+def _asignar_habitats(por_id: dict, filas) -> None:
+    """Reparte las filas (dinosaurio_id, habitat...) entre los dinosaurios ya cargados"""
+    for fila in filas:
+        por_id[fila[0]].habitats.append(_a_habitat_de_fila(fila))
+
+
+def _params_insertar(dinosaurio: Dinosaurio) -> tuple:
+    return (dinosaurio.nombre, dinosaurio.descripcion, dinosaurio.tipo, dinosaurio.peso_kg,
+            dinosaurio.altura_metros, dinosaurio.longitud_metros, dinosaurio.dieta,
+            dinosaurio.era_id, dinosaurio.region_id, dinosaurio.creador_id, dinosaurio.imagen)
+
+
+def _params_actualizar(dinosaurio: Dinosaurio) -> tuple:
+    return (dinosaurio.nombre, dinosaurio.descripcion, dinosaurio.tipo, dinosaurio.peso_kg,
+            dinosaurio.altura_metros, dinosaurio.longitud_metros, dinosaurio.dieta,
+            dinosaurio.era_id, dinosaurio.region_id, dinosaurio.imagen, dinosaurio.id)
+
+
+class DinosaurioRepository:
+
+    def get_all(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                region_id: Optional[int] = None, dieta: Optional[str] = None) -> List[Dinosaurio]:
+        """Obtiene todos los dinosaurios con filtros opcionales"""
+        if busqueda:
+            return self.buscar(db, busqueda, era_id, region_id, dieta)
+        query, params = _query_get_all(era_id, region_id, dieta)
+        dinosaurios_en_db = consultar(db, query, params)
+        dinosaurios: List[Dinosaurio] = list()
+        for dino in dinosaurios_en_db:
+            dinosaurios.append(_a_dinosaurio(dino))
+        return dinosaurios
+
+    def get_all_con_relaciones(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                               region_id: Optional[int] = None,
+                               dieta: Optional[str] = None) -> List[Dinosaurio]:
+        """Como get_all, pero con era, region y habitats ya cargados.
+        Hace una consulta con JOIN y otra por cada lote de TAMANO_LOTE_IN dinosaurios
+        para los habitats, en lugar de 3 consultas por dinosaurio"""
+        if busqueda:
+            return self.buscar(db, busqueda, era_id, region_id, dieta)
+        query, params = _query_get_all_con_relaciones(era_id, region_id, dieta)
+        dinosaurios = _a_dinosaurios_con_relaciones(consultar(db, query, params))
+
+        por_id = {dino.id: dino for dino in dinosaurios}
+        for lote in _lotes(list(por_id)):
+            _asignar_habitats(por_id, consultar(db, _sql_habitats_de(len(lote)), lote))
+        return dinosaurios
+
+    def get_pagina(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                   region_id: Optional[int] = None, dieta: Optional[str] = None,
+                   habitat_id: Optional[int] = None, desde: Optional[Cursor] = None,
+                   tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        """Una página del listado ordenado por (nombre, id), con era, region y habitats
+        cargados como en get_all_con_relaciones; con_total=False se ahorra el COUNT.
+        Con búsqueda el orden es por relevancia y el total sale gratis del ranking"""
+        if busqueda:
+            ranking = self._ranking(db, busqueda, era_id, region_id, dieta, habitat_id)
+            trozo = pagina_de_ranking(ranking, desde, tamano)
+            dinosaurios = self._cargar_con_relaciones(db, [id for id, _ in trozo])
+            return construir_pagina(_ordenar_resultados(dinosaurios, trozo, busqueda), desde, tamano,
+                                    lambda dino: dino.relevancia, len(ranking))
+
+        condiciones, params = _filtros_get_all(era_id, region_id, dieta, alias="d.", habitat_id=habitat_id)
+        query, params_pagina = sql_pagina(_SELECT_CON_RELACIONES, condiciones, params, desde, tamano,
+                                          alias="d.")
+        dinosaurios = _a_dinosaurios_con_relaciones(consultar(db, query, params_pagina))
+
+        por_id = {dino.id: dino for dino in dinosaurios}
+        if por_id:
+            _asignar_habitats(por_id, consultar(db, _sql_habitats_de(len(por_id)), list(por_id)))
+
+        total = None
+        if con_total:
+            total = consultar_uno(db, "SELECT COUNT(*) FROM dinosaurios d" + condiciones, params)[0]
+        return construir_pagina(dinosaurios, desde, tamano, lambda dino: dino.nombre, total)
+
+    def buscar(self, db, busqueda: str, era_id: Optional[int] = None, region_id: Optional[int] = None,
+               dieta: Optional[str] = None, habitat_id: Optional[int] = None) -> List[Dinosaurio]:
+        """Búsqueda de texto en nombre, tipo, dieta y descripción (sin tildes ni mayúsculas y
+        por prefijo), de más a menos relevante y con fragmentos resaltados"""
+        ranking = self._ranking(db, busqueda, era_id, region_id, dieta, habitat_id)
+        dinosaurios = self._cargar_con_relaciones(db, [id for id, _ in ranking])
+        return _ordenar_resultados(dinosaurios, ranking, busqueda)
+
+    def _ranking(self, db, busqueda: str, era_id: Optional[int], region_id: Optional[int],
+                 dieta: Optional[str], habitat_id: Optional[int] = None) -> list:
+        """[(id, puntos)] que devuelve el índice y además cumplen los demás filtros"""
+        def leer():
+            cursor = db.cursor()
+            cursor.execute(_SQL_DOCUMENTOS)
+            documentos = _a_documentos(cursor.fetchall())
+            cursor.close()
+            return documentos
+
+        firma = consultar_uno(db, _SQL_FIRMA)
+        ranking = buscador.cargar("dinosaurios", _PESOS_BUSQUEDA, leer, firma).buscar(busqueda)
+        condiciones, params = _filtros_get_all(era_id, region_id, dieta, habitat_id=habitat_id)
+        if not ranking or not params:
+            return ranking
+        validos = set()
+        for lote in _lotes([id for id, _ in ranking]):
+            validos.update(fila[0] for fila in consultar(db, _sql_ids_filtrados(condiciones, len(lote)),
+                                                          params + lote))
+        return [(id, puntos) for id, puntos in ranking if id in validos]
+
+    def contar_facetas(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                       region_id: Optional[int] = None, dieta: Optional[str] = None,
+                       habitat_id: Optional[int] = None) -> dict:
+        """Cuántos dinosaurios hay por era, región, dieta y habitat con los filtros actuales
+        ({campo: {valor: n}} más "total"). Sale del índice de facetas, sin consultas por valor"""
+        filtros = {"era_id": era_id, "region_id": region_id, "dieta": dieta, "habitat_id": habitat_id}
+        recuentos, version = facetas.obtener(busqueda, filtros, consultar_uno(db, _SQL_FIRMA))
+        if recuentos is not None:
+            return recuentos
+
+        def leer():
+            cursor = db.cursor()
+            cursor.execute(_SQL_FACETAS)
+            dinosaurios = cursor.fetchall()
+            cursor.execute(_SQL_FACETAS_HABITATS)
+            relaciones = cursor.fetchall()
+            cursor.close()
+            return dinosaurios, relaciones
+
+        indice = facetas.cargar(leer)
+        ids = [id for id, _ in self._ranking(db, busqueda, None, None, None)] if busqueda else None
+        return facetas.calcular(indice, busqueda, filtros, ids, version)
+
+    def _cargar_con_relaciones(self, db, ids: list) -> List[Dinosaurio]:
+        """Dinosaurios con esos ids (en cualquier orden) con era, region y habitats"""
+        dinosaurios = []
+        for lote in _lotes(ids):
+            filas = consultar(db, _sql_con_relaciones_de(len(lote)), lote)
+            dinosaurios.extend(_a_dinosaurios_con_relaciones(filas))
+        por_id = {dino.id: dino for dino in dinosaurios}
+        for lote in _lotes(list(por_id)):
+            _asignar_habitats(por_id, consultar(db, _sql_habitats_de(len(lote)), lote))
+        return dinosaurios
+
+    def get_by_id(self, db, id: int) -> Dinosaurio:
+        dino = consultar_uno(db, _SQL_GET_BY_ID, (id,))
+        if dino:
+            return _a_dinosaurio(dino)
+        return None
+
+    def insertar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> int:
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, _params_insertar(dinosaurio))
+        confirmar(db)
+
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Insert no rows affected")
+
+        nuevo_id = cursor.lastrowid
+        cursor.close()
+        al_confirmar(db, lambda: _tras_insertar(nuevo_id, dinosaurio))
+        return nuevo_id
+
+    def actualizar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, _params_actualizar(dinosaurio))
+        confirmar(db)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Update affected no rows")
+        cursor.close()
+        al_confirmar(db, lambda: _tras_actualizar(dinosaurio))
+
+    def borrar_dinosaurio(self, db, id: int) -> None:
+        cursor = db.cursor()
+        # Primero borramos las relaciones N-M
+        cursor.execute("DELETE FROM dinosaurios_habitats WHERE dinosaurio_id = %s", (id,))
+        # Luego borramos el dinosaurio
+        cursor.execute("DELETE FROM dinosaurios WHERE id = %s", (id,))
+        confirmar(db)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Delete affected no rows")
+        cursor.close()
+        al_confirmar(db, lambda: _tras_borrar(id))
+
+    def agregar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
+        """Agrega un habitat a un dinosaurio (relación N-M)"""
+        cursor = db.cursor()
+        cursor.execute(_sql_agregar_habitat(db), (dinosaurio_id, habitat_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _tras_habitat(dinosaurio_id, habitat_id, True))
+
+    def quitar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
+        """Quita un habitat de un dinosaurio"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_QUITAR_HABITAT, (dinosaurio_id, habitat_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _tras_habitat(dinosaurio_id, habitat_id, False))
+
+    def sincronizar_habitats(self, db, dinosaurio_id: int, habitats: List[int]) -> None:
+        """Deja al dinosaurio exactamente con esos habitats: un DELETE de los que sobran y un
+        INSERT de varias filas (los que ya tenía se ignoran), sin consultar antes los actuales"""
+        habitats = list(dict.fromkeys(habitats))
+        cursor = db.cursor()
+        for query, params in _sql_sincronizar_habitats(db, dinosaurio_id, habitats):
+            cursor.execute(query, params)
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _tras_sincronizar(dinosaurio_id, habitats))
+
+    def get_habitats(self, db, dinosaurio_id: int) -> List[int]:
+        """Obtiene los IDs de habitats asociados a un dinosaurio"""
+        habitats = consultar(db, _SQL_GET_HABITATS, (dinosaurio_id,))
+        return [h[0] for h in habitats] if habitats else []
+
+    def nombres_existentes(self, db, nombres: list) -> set:
+        """Cuáles de esos nombres tienen ya un dinosaurio (el nombre es único)"""
+        existentes = set()
+        cursor = db.cursor()
+        for lote in _lotes(nombres):
+            cursor.execute(_SQL_NOMBRES_EXISTENTES.format(_marcadores(len(lote))), lote)
+            existentes.update(fila[0] for fila in cursor.fetchall())
+        cursor.close()
+        return existentes
+
+    def insertar_lote(self, db, dinosaurios: List[Dinosaurio]) -> List[int]:
+        """Inserta los dinosaurios con INSERTs de TAMANO_LOTE_INSERT filas y devuelve sus ids.
+        Es para usarlo dentro de una transacción (ver data/transaccion.py)"""
+        ids = []
+        cursor = db.cursor()
+        for lote in _lotes(dinosaurios, TAMANO_LOTE_INSERT):
+            cursor.execute(_sql_insertar_varios(len(lote)), _aplanar(_params_insertar(d) for d in lote))
+            # Los nombres son únicos: se leen los ids de las filas recién insertadas
+            cursor.execute(_SQL_IDS_POR_NOMBRE.format(_marcadores(len(lote))), [d.nombre for d in lote])
+            ids.extend(_ids_en_orden(cursor.fetchall(), lote))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _tras_lote)
+        return ids
+
+    def agregar_habitats_lote(self, db, relaciones: list) -> None:
+        """Agrega varias relaciones (dinosaurio_id, habitat_id) a la vez, como insertar_lote"""
+        cursor = db.cursor()
+        for lote in _lotes(relaciones, TAMANO_LOTE_INSERT):
+            cursor.execute(_sql_agregar_habitat(db, len(lote)), _aplanar(lote))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, _tras_lote)
+
+    def exportar(self, db, tamano: int = TAMANO_TROZO_EXPORTACION):
+        """Generador con el catálogo entero (COLUMNAS_EXPORTACION) en listas de `tamano` filas.
+        Lee de un cursor sin buffer, así que la memoria no crece con el número de filas.
+        Si se deja a medias la conexión queda con filas sin leer y hay que cerrarla."""
+        cursor = db.cursor(buffered=False)
+        cursor.execute(_sql_exportar(db))
+        while True:
+            filas = cursor.fetchmany(tamano)
+            if not filas:
+                break
+            yield filas
+        cursor.close()
+
+
+class AsyncDinosaurioRepository:
+    """Misma interfaz que DinosaurioRepository sobre una conexión aiomysql"""
+
+    async def get_all(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                      region_id: Optional[int] = None, dieta: Optional[str] = None) -> List[Dinosaurio]:
+        if busqueda:
+            return await self.buscar(db, busqueda, era_id, region_id, dieta)
+        query, params = _query_get_all(era_id, region_id, dieta)
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            return [_a_dinosaurio(dino) for dino in await cursor.fetchall()]
+
+    async def get_all_con_relaciones(self, db, busqueda: Optional[str] = None,
+                                     era_id: Optional[int] = None, region_id: Optional[int] = None,
+                                     dieta: Optional[str] = None) -> List[Dinosaurio]:
+        if busqueda:
+            return await self.buscar(db, busqueda, era_id, region_id, dieta)
+        query, params = _query_get_all_con_relaciones(era_id, region_id, dieta)
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            dinosaurios = _a_dinosaurios_con_relaciones(await cursor.fetchall())
+
+            por_id = {dino.id: dino for dino in dinosaurios}
+            for lote in _lotes(list(por_id)):
+                await cursor.execute(_sql_habitats_de(len(lote)), lote)
+                _asignar_habitats(por_id, await cursor.fetchall())
+        return dinosaurios
+
+    async def get_pagina(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                         region_id: Optional[int] = None, dieta: Optional[str] = None,
+                         habitat_id: Optional[int] = None, desde: Optional[Cursor] = None,
+                         tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        if busqueda:
+            ranking = await self._ranking(db, busqueda, era_id, region_id, dieta, habitat_id)
+            trozo = pagina_de_ranking(ranking, desde, tamano)
+            async with db.cursor() as cursor:
+                dinosaurios = await self._cargar_con_relaciones(cursor, [id for id, _ in trozo])
+            return construir_pagina(_ordenar_resultados(dinosaurios, trozo, busqueda), desde, tamano,
+                                    lambda dino: dino.relevancia, len(ranking))
+
+        condiciones, params = _filtros_get_all(era_id, region_id, dieta, alias="d.", habitat_id=habitat_id)
+        query, params_pagina = sql_pagina(_SELECT_CON_RELACIONES, condiciones, params, desde, tamano,
+                                          alias="d.")
+        total = None
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params_pagina)
+            dinosaurios = _a_dinosaurios_con_relaciones(await cursor.fetchall())
+
+            por_id = {dino.id: dino for dino in dinosaurios}
+            if por_id:
+                await cursor.execute(_sql_habitats_de(len(por_id)), list(por_id))
+                _asignar_habitats(por_id, await cursor.fetchall())
+
+            if con_total:
+                await cursor.execute("SELECT COUNT(*) FROM dinosaurios d" + condiciones, params)
+                total = (await cursor.fetchone())[0]
+        return construir_pagina(dinosaurios, desde, tamano, lambda dino: dino.nombre, total)
+
+    async def buscar(self, db, busqueda: str, era_id: Optional[int] = None,
+                     region_id: Optional[int] = None, dieta: Optional[str] = None,
+                     habitat_id: Optional[int] = None) -> List[Dinosaurio]:
+        ranking = await self._ranking(db, busqueda, era_id, region_id, dieta, habitat_id)
+        async with db.cursor() as cursor:
+            dinosaurios = await self._cargar_con_relaciones(cursor, [id for id, _ in ranking])
+        return _ordenar_resultados(dinosaurios, ranking, busqueda)
+
+    async def _ranking(self, db, busqueda: str, era_id: Optional[int], region_id: Optional[int],
+                       dieta: Optional[str], habitat_id: Optional[int] = None) -> list:
+        async def leer():
+            async with db.cursor() as cursor:
+                await cursor.execute(_SQL_DOCUMENTOS)
+                return _a_documentos(await cursor.fetchall())
+
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_FIRMA)
+            firma = await cursor.fetchone()
+        indice = await buscador.cargar_async("dinosaurios", _PESOS_BUSQUEDA, leer, firma)
+        ranking = indice.buscar(busqueda)
+        condiciones, params = _filtros_get_all(era_id, region_id, dieta, habitat_id=habitat_id)
+        if not ranking or not params:
+            return ranking
+        validos = set()
+        async with db.cursor() as cursor:
+            for lote in _lotes([id for id, _ in ranking]):
+                await cursor.execute(_sql_ids_filtrados(condiciones, len(lote)), params + lote)
+                validos.update(fila[0] for fila in await cursor.fetchall())
+        return [(id, puntos) for id, puntos in ranking if id in validos]
+
+    async def contar_facetas(self, db, busqueda: Optional[str] = None, era_id: Optional[int] = None,
+                             region_id: Optional[int] = None, dieta: Optional[str] = None,
+                             habitat_id: Optional[int] = None) -> dict:
+        filtros = {"era_id": era_id, "region_id": region_id, "dieta": dieta, "habitat_id": habitat_id}
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_FIRMA)
+            firma = await cursor.fetchone()
+        recuentos, version = facetas.obtener(busqueda, filtros, firma)
+        if recuentos is not None:
+            return recuentos
+
+        async def leer():
+            async with db.cursor() as cursor:
+                await cursor.execute(_SQL_FACETAS)
+                dinosaurios = await cursor.fetchall()
+                await cursor.execute(_SQL_FACETAS_HABITATS)
+                return dinosaurios, await cursor.fetchall()
+
+        indice = await facetas.cargar_async(leer)
+        ids = [id for id, _ in await self._ranking(db, busqueda, None, None, None)] if busqueda else None
+        return facetas.calcular(indice, busqueda, filtros, ids, version)
+
+    async def _cargar_con_relaciones(self, cursor, ids: list) -> List[Dinosaurio]:
+        dinosaurios = []
+        for lote in _lotes(ids):
+            await cursor.execute(_sql_con_relaciones_de(len(lote)), lote)
+            dinosaurios.extend(_a_dinosaurios_con_relaciones(await cursor.fetchall()))
+        por_id = {dino.id: dino for dino in dinosaurios}
+        for lote in _lotes(list(por_id)):
+            await cursor.execute(_sql_habitats_de(len(lote)), lote)
+            _asignar_habitats(por_id, await cursor.fetchall())
+        return dinosaurios
+
+    async def get_by_id(self, db, id: int) -> Dinosaurio:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_GET_BY_ID, (id,))
+            dino = await cursor.fetchone()
+        return _a_dinosaurio(dino) if dino else None
+
+    async def insertar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> int:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_INSERTAR, _params_insertar(dinosaurio))
+            await confirmar_async(db)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Insert no rows affected")
+            nuevo_id = cursor.lastrowid
+        al_confirmar(db, lambda: _tras_insertar(nuevo_id, dinosaurio))
+        return nuevo_id
+
+    async def actualizar_dinosaurio(self, db, dinosaurio: Dinosaurio) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_ACTUALIZAR, _params_actualizar(dinosaurio))
+            await confirmar_async(db)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Update affected no rows")
+        al_confirmar(db, lambda: _tras_actualizar(dinosaurio))
+
+    async def borrar_dinosaurio(self, db, id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute("DELETE FROM dinosaurios_habitats WHERE dinosaurio_id = %s", (id,))
+            await cursor.execute("DELETE FROM dinosaurios WHERE id = %s", (id,))
+            await confirmar_async(db)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Delete affected no rows")
+        al_confirmar(db, lambda: _tras_borrar(id))
+
+    async def agregar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_sql_agregar_habitat(db), (dinosaurio_id, habitat_id))
+            await confirmar_async(db)
+        al_confirmar(db, lambda: _tras_habitat(dinosaurio_id, habitat_id, True))
+
+    async def quitar_habitat(self, db, dinosaurio_id: int, habitat_id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_QUITAR_HABITAT, (dinosaurio_id, habitat_id))
+            await confirmar_async(db)
+        al_confirmar(db, lambda: _tras_habitat(dinosaurio_id, habitat_id, False))
+
+    async def sincronizar_habitats(self, db, dinosaurio_id: int, habitats: List[int]) -> None:
+        habitats = list(dict.fromkeys(habitats))
+        async with db.cursor() as cursor:
+            for query, params in _sql_sincronizar_habitats(db, dinosaurio_id, habitats):
+                await cursor.execute(query, params)
+            await confirmar_async(db)
+        al_confirmar(db, lambda: _tras_sincronizar(dinosaurio_id, habitats))
+
+    async def get_habitats(self, db, dinosaurio_id: int) -> List[int]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_GET_HABITATS, (dinosaurio_id,))
+            return [h[0] for h in await cursor.fetchall()]
+
+    async def nombres_existentes(self, db, nombres: list) -> set:
+        existentes = set()
+        async with db.cursor() as cursor:
+            for lote in _lotes(nombres):
+                await cursor.execute(_SQL_NOMBRES_EXISTENTES.format(_marcadores(len(lote))), lote)
+                existentes.update(fila[0] for fila in await cursor.fetchall())
+        return existentes
+
+    async def insertar_lote(self, db, dinosaurios: List[Dinosaurio]) -> List[int]:
+        ids = []
+        async with db.cursor() as cursor:
+            for lote in _lotes(dinosaurios, TAMANO_LOTE_INSERT):
+                await cursor.execute(_sql_insertar_varios(len(lote)), _aplanar(_params_insertar(d) for d in lote))
+                await cursor.execute(_SQL_IDS_POR_NOMBRE.format(_marcadores(len(lote))), [d.nombre for d in lote])
+                ids.extend(_ids_en_orden(await cursor.fetchall(), lote))
+            await confirmar_async(db)
+        al_confirmar(db, _tras_lote)
+        return ids
+
+    async def agregar_habitats_lote(self, db, relaciones: list) -> None:
+        async with db.cursor() as cursor:
+            for lote in _lotes(relaciones, TAMANO_LOTE_INSERT):
+                await cursor.execute(_sql_agregar_habitat(db, len(lote)), _aplanar(lote))
+            await confirmar_async(db)
+        al_confirmar(db, _tras_lote)
+
+    async def exportar(self, db, tamano: int = TAMANO_TROZO_EXPORTACION):
+        # SSCursor: el cursor del servidor de aiomysql (el normal trae todas las filas de golpe)
+        cursor = await db.cursor(aiomysql.SSCursor)
+        await cursor.execute(_sql_exportar(db))
+        while True:
+            filas = await cursor.fetchmany(tamano)
+            if not filas:
+                break
+            yield filas
+        await cursor.close()
@@ -1,69 +1,173 @@
-from typing import List, Optional
-from domain.model.Era import Era
-
-
-class EraRepository:
-
-    def get_all(self, db, busqueda: Optional[str] = None) -> List[Era]:
-        """Obtiene todas las eras con búsqueda opcional por nombre"""
-        cursor = db.cursor()
-        
-        query = "SELECT id, nombre, periodo_inicio, periodo_fin, descripcion, imagen FROM eras WHERE 1=1"
-        params = []
-        
-        if busqueda:
-            query += " AND (nombre LIKE %s OR descripcion LIKE %s)"
-            params.extend([f"%{busqueda}%", f"%{busqueda}%"])
-        
-        query += " ORDER BY periodo_inicio DESC"
-        
-        cursor.execute(query, params)
-        eras_en_db = cursor.fetchall()
-        eras: List[Era] = list()
-        for era in eras_en_db:
-            era_obj = Era(era[0], era[1], era[2], era[3], era[4], era[5])
-            eras.append(era_obj)
-        cursor.close()
-        return eras
-
-    def get_by_id(self, db, id: int) -> Era:
-        cursor = db.cursor()
-        cursor.execute("SELECT id, nombre, periodo_inicio, periodo_fin, descripcion, imagen FROM eras WHERE id = %s", (id,))
-        era_db = cursor.fetchone()
-        cursor.close()
-        if era_db:
-            return Era(era_db[0], era_db[1], era_db[2], era_db[3], era_db[4], era_db[5])
-        return None
-
-    def insertar_era(self, db, era: Era) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "INSERT INTO eras (nombre, periodo_inicio, periodo_fin, descripcion, imagen) VALUES (%s, %s, %s, %s, %s)",
-            (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Insert no rows affected")
-        cursor.close()
-
-    def actualizar_era(self, db, era: Era) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE eras SET nombre = %s, periodo_inicio = %s, periodo_fin = %s, descripcion = %s, imagen = %s WHERE id = %s",
-            (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen, era.id)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Update affected no rows")
-        cursor.close()
-
-    def borrar_era(self, db, id: int) -> None:
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM eras WHERE id = %s", (id,))
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Delete affected no rows")
-        cursor.close()
+from typing import List, Optional
+from domain.model.Era import Era
+from data.busqueda import buscar_en_referencia, pagina_de_resultados
+from data.mapeo import mapeador
+from data.cache import paginas, referencia
+from data.transaccion import al_confirmar, confirmar, confirmar_async
+from data.paginacion import Cursor, Pagina, TAMANO_PAGINA, construir_pagina, sql_pagina
+
+
+_SELECT_ERA = "SELECT id, nombre, periodo_inicio, periodo_fin, descripcion, imagen FROM eras"
+_SQL_INSERTAR = "INSERT INTO eras (nombre, periodo_inicio, periodo_fin, descripcion, imagen) VALUES (%s, %s, %s, %s, %s)"
+_SQL_ACTUALIZAR = "UPDATE eras SET nombre = %s, periodo_inicio = %s, periodo_fin = %s, descripcion = %s, imagen = %s WHERE id = %s"
+_SQL_GET_ALL = _SELECT_ERA + " ORDER BY periodo_inicio DESC"
+# Orden cronológico de las páginas, de la más antigua a la más reciente; las eras sin
+# periodo van al final, como en _SQL_GET_ALL (los periodos son millones de años, >= 0)
+_ORDEN_PAGINA = "COALESCE(periodo_inicio, -1)"
+
+_PESOS_BUSQUEDA = {"nombre": 3.0, "descripcion": 1.0}
+
+
+def _invalidar() -> None:
+    referencia.invalidar("eras")
+    paginas.invalidar_etiquetas("eras")
+
+
+def _campos_busqueda(era: Era) -> dict:
+    return {"nombre": era.nombre, "descripcion": era.descripcion}
+
+
+def _clave_pagina(era: Era) -> int:
+    return era.periodo_inicio if era.periodo_inicio is not None else -1
+
+
+_a_era = mapeador(Era, ("id", "nombre", "periodo_inicio", "periodo_fin", "descripcion", "imagen"))
+
+
+class EraRepository:
+
+    def get_all(self, db, busqueda: Optional[str] = None) -> List[Era]:
+        """Obtiene todas las eras (de la caché de referencia); con búsqueda, por relevancia"""
+        if busqueda:
+            return [era for era, _ in self._buscar(db, busqueda)]
+        eras, _ = referencia.cargar("eras", lambda: self._consultar(db))
+        return list(eras)
+
+    def _buscar(self, db, busqueda: str) -> list:
+        datos = referencia.cargar("eras", lambda: self._consultar(db))
+        return buscar_en_referencia("eras", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda)
+
+    def _consultar(self, db) -> List[Era]:
+        cursor = db.cursor()
+        cursor.execute(_SQL_GET_ALL)
+        eras_en_db = cursor.fetchall()
+        eras: List[Era] = list()
+        for era in eras_en_db:
+            eras.append(_a_era(era))
+        cursor.close()
+        return eras
+
+    def get_pagina(self, db, busqueda: Optional[str] = None, desde: Optional[Cursor] = None,
+                   tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        """Una página del listado ordenado por (periodo_inicio, id) de la más antigua a la más
+        reciente; con_total=False se ahorra el COUNT.
+        Con búsqueda, por relevancia"""
+        if busqueda:
+            return pagina_de_resultados(self._buscar(db, busqueda), desde, tamano)
+        query, params_pagina = sql_pagina(_SELECT_ERA, " WHERE 1=1", [], desde, tamano,
+                                          columna=_ORDEN_PAGINA, descendente=True)
+        cursor = db.cursor()
+        cursor.execute(query, params_pagina)
+        eras = [_a_era(era) for era in cursor.fetchall()]
+        total = None
+        if con_total:
+            cursor.execute("SELECT COUNT(*) FROM eras")
+            total = cursor.fetchone()[0]
+        cursor.close()
+        return construir_pagina(eras, desde, tamano, _clave_pagina, total)
+
+    def get_by_id(self, db, id: int) -> Era:
+        _, por_id = referencia.cargar("eras", lambda: self._consultar(db))
+        return por_id.get(id)
+
+    def insertar_era(self, db, era: Era) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Insert no rows affected")
+        cursor.close()
+
+    def actualizar_era(self, db, era: Era) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen, era.id))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Update affected no rows")
+        cursor.close()
+
+    def borrar_era(self, db, id: int) -> None:
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM eras WHERE id = %s", (id,))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Delete affected no rows")
+        cursor.close()
+
+
+class AsyncEraRepository:
+    """Misma interfaz que EraRepository sobre una conexión aiomysql"""
+
+    async def get_all(self, db, busqueda: Optional[str] = None) -> List[Era]:
+        if busqueda:
+            return [era for era, _ in await self._buscar(db, busqueda)]
+        eras, _ = await referencia.cargar_async("eras", lambda: self._consultar(db))
+        return list(eras)
+
+    async def _buscar(self, db, busqueda: str) -> list:
+        datos = await referencia.cargar_async("eras", lambda: self._consultar(db))
+        return buscar_en_referencia("eras", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda)
+
+    async def _consultar(self, db) -> List[Era]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_GET_ALL)
+            return [_a_era(era) for era in await cursor.fetchall()]
+
+    async def get_pagina(self, db, busqueda: Optional[str] = None, desde: Optional[Cursor] = None,
+                         tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        if busqueda:
+            return pagina_de_resultados(await self._buscar(db, busqueda), desde, tamano)
+        query, params_pagina = sql_pagina(_SELECT_ERA, " WHERE 1=1", [], desde, tamano,
+                                          columna=_ORDEN_PAGINA, descendente=True)
+        total = None
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params_pagina)
+            eras = [_a_era(era) for era in await cursor.fetchall()]
+            if con_total:
+                await cursor.execute("SELECT COUNT(*) FROM eras")
+                total = (await cursor.fetchone())[0]
+        return construir_pagina(eras, desde, tamano, _clave_pagina, total)
+
+    async def get_by_id(self, db, id: int) -> Era:
+        _, por_id = await referencia.cargar_async("eras", lambda: self._consultar(db))
+        return por_id.get(id)
+
+    async def insertar_era(self, db, era: Era) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_INSERTAR, (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Insert no rows affected")
+
+    async def actualizar_era(self, db, era: Era) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_ACTUALIZAR, (era.nombre, era.periodo_inicio, era.periodo_fin, era.descripcion, era.imagen, era.id))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Update affected no rows")
+
+    async def borrar_era(self, db, id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute("DELETE FROM eras WHERE id = %s", (id,))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Delete affected no rows")
@@ -0,0 +1,78 @@
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data.database import POOL_MAX_SIZE
+
+
+class DatabaseExecutor:
+    """Ejecuta las llamadas bloqueantes a los repositorios en un pool de hilos
+    del mismo tamaño que el pool de conexiones, para no bloquear el event loop"""
+
+    def __init__(self, max_workers: int = POOL_MAX_SIZE):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self._en_cola = 0  # Tareas enviadas que aún esperan un hilo libre
+        self._en_curso = 0
+        self._completadas = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+
+    async def ejecutar(self, func, *args, **kwargs):
+        """Ejecuta func(*args, **kwargs) en un hilo del pool y devuelve su resultado"""
+        enviada = time.monotonic()
+        with self._lock:
+            self._en_cola += 1
+
+        def tarea():
+            espera = time.monotonic() - enviada
+            with self._lock:
+                self._en_cola -= 1
+                self._en_curso += 1
+                self._espera_total += espera
+                self._espera_maxima = max(self._espera_maxima, espera)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._en_curso -= 1
+                    self._completadas += 1
+
+        futuro = self._executor.submit(tarea)
+        try:
+            return await asyncio.wrap_future(futuro)
+        except asyncio.CancelledError:
+            # Si la petición se cancela antes de que la tarea arranque, la sacamos de la cola
+            if futuro.cancel():
+                with self._lock:
+                    self._en_cola -= 1
+            raise
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            completadas = self._completadas
+            return {
+                "hilos": self.max_workers,
+                "en_cola": self._en_cola,
+                "en_curso": self._en_curso,
+                "completadas": completadas,
+                "espera_media_ms": round(self._espera_total / completadas * 1000, 3) if completadas else 0.0,
+                "espera_maxima_ms": round(self._espera_maxima * 1000, 3),
+            }
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+db_executor = DatabaseExecutor()
+
+
+async def run_db(func, *args, **kwargs):
+    """Atajo: await run_db(repo.get_all, db, busqueda=...)
+    Los métodos de los repositorios asíncronos se esperan directamente, sin hilos."""
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await db_executor.ejecutar(func, *args, **kwargs)
@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from data.busqueda import tokenizar
+from data.cache import TTLCache
+
+# Segundos que vive el índice antes de reconstruirlo: acota lo que tarda en verse un cambio
+# de era, región, dieta o habitats hecho por otro worker (las altas y bajas de otros se
+# detectan antes con la firma de la tabla, como en data/busqueda.py)
+FACETAS_INDICE_TTL = float(os.getenv("FACETAS_INDICE_TTL", "30"))
+# Combinaciones de filtros cuyos recuentos se guardan
+FACETAS_CACHE_MAXIMO = int(os.getenv("FACETAS_CACHE_MAXIMO", "1000"))
+
+# Campos por los que se filtra el listado de dinosaurios
+CAMPOS = ("era_id", "region_id", "dieta", "habitat_id")
+_CAMPOS_SIMPLES = ("era_id", "region_id", "dieta")
+
+
+def _a_bits(ids) -> int:
+    """Mapa de bits (un int) con el bit i encendido por cada id i"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for id in ids:
+        buffer[id >> 3] |= 1 << (id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class IndiceFacetas:
+    """Un mapa de bits por cada valor de cada campo: el bit i está a 1 si el dinosaurio
+    con id i tiene ese valor. Contar una combinación de filtros es hacer AND y contar bits."""
+
+    def __init__(self, dinosaurios=(), relaciones=()):
+        """dinosaurios: filas (id, era_id, region_id, dieta); relaciones: (dinosaurio_id, habitat_id)"""
+        self.creado = time.monotonic()
+        self._valores: dict = {}  # id -> {campo: valor}, con "habitat_id" como set
+        ids_por_valor = {campo: defaultdict(list) for campo in CAMPOS}
+        for id, era_id, region_id, dieta in dinosaurios:
+            self._valores[id] = {"era_id": era_id, "region_id": region_id, "dieta": dieta, "habitat_id": set()}
+            for campo in _CAMPOS_SIMPLES:
+                if self._valores[id][campo] is not None:
+                    ids_por_valor[campo][self._valores[id][campo]].append(id)
+        for dinosaurio_id, habitat_id in relaciones:
+            if dinosaurio_id in self._valores:
+                self._valores[dinosaurio_id]["habitat_id"].add(habitat_id)
+                ids_por_valor["habitat_id"][habitat_id].append(dinosaurio_id)
+        self._bits = {campo: {valor: _a_bits(ids) for valor, ids in por_valor.items()}
+                      for campo, por_valor in ids_por_valor.items()}
+        self._todos = _a_bits(self._valores)
+        self._lock = threading.Lock()
+
+    def _encender(self, campo: str, valor, bit: int) -> None:
+        if valor is not None:
+            self._bits[campo][valor] = self._bits[campo].get(valor, 0) | bit
+
+    def _apagar(self, campo: str, valor, bit: int) -> None:
+        bits = self._bits[campo].get(valor, 0) & ~bit
+        if bits:
+            self._bits[campo][valor] = bits
+        else:
+            self._bits[campo].pop(valor, None)
+
+    def poner(self, id: int, era_id, region_id, dieta, habitats=None) -> None:
+        """Alta o cambio de un dinosaurio; habitats=None conserva los que ya tenía"""
+        bit = 1 << id
+        with self._lock:
+            anterior = self._valores.get(id)
+            if habitats is None:
+                habitats = anterior["habitat_id"] if anterior else ()
+            habitats = set(habitats)
+            self._quitar(id)
+            self._valores[id] = {"era_id": era_id, "region_id": region_id, "dieta": dieta, "habitat_id": habitats}
+            for campo in _CAMPOS_SIMPLES:
+                self._encender(campo, self._valores[id][campo], bit)
+            for habitat_id in habitats:
+                self._encender("habitat_id", habitat_id, bit)
+            self._todos |= bit
+
+    def habitat(self, id: int, habitat_id: int, presente: bool) -> None:
+        with self._lock:
+            valores = self._valores.get(id)
+            if valores is None:
+                return
+            if presente:
+                valores["habitat_id"].add(habitat_id)
+                self._encender("habitat_id", habitat_id, 1 << id)
+            else:
+                valores["habitat_id"].discard(habitat_id)
+                self._apagar("habitat_id", habitat_id, 1 << id)
+
+    def habitats(self, id: int, habitats) -> None:
+        """Sustituye todos los habitats del dinosaurio"""
+        with self._lock:
+            valores = self._valores.get(id)
+            if valores is None:
+                return
+            nuevos, bit = set(habitats), 1 << id
+            for habitat_id in valores["habitat_id"] - nuevos:
+                self._apagar("habitat_id", habitat_id, bit)
+            for habitat_id in nuevos - valores["habitat_id"]:
+                self._encender("habitat_id", habitat_id, bit)
+            valores["habitat_id"] = nuevos
+
+    def quitar(self, id: int) -> None:
+        with self._lock:
+            self._quitar(id)
+
+    def _quitar(self, id: int) -> None:
+        valores = self._valores.pop(id, None)
+        if valores is None:
+            return
+        bit = 1 << id
+        for campo in _CAMPOS_SIMPLES:
+            if valores[campo] is not None:
+                self._apagar(campo, valores[campo], bit)
+        for habitat_id in valores["habitat_id"]:
+            self._apagar("habitat_id", habitat_id, bit)
+        self._todos &= ~bit
+
+    def contar(self, filtros: dict, ids=None) -> dict:
+        """{campo: {valor: n}} de los dinosaurios que cumplen los filtros, contando cada campo
+        sin su propio filtro (lo que saldría al cambiar ese desplegable), y "total" con todos.
+        ids limita el recuento a esos dinosaurios (los de una búsqueda de texto)."""
+        mascara = _a_bits(ids) if ids is not None else None
+        with self._lock:
+            base = self._todos if mascara is None else self._todos & mascara
+            por_filtro = {campo: self._bits[campo].get(valor, 0)
+                          for campo, valor in filtros.items() if valor is not None}
+            resultado = {}
+            for campo in CAMPOS:
+                bits = base
+                for otro, filtro in por_filtro.items():
+                    if otro != campo:
+                        bits &= filtro
+                conteos = {}
+                for valor, bits_valor in self._bits[campo].items():
+                    n = (bits & bits_valor).bit_count()
+                    if n:
+                        conteos[valor] = n
+                resultado[campo] = conteos
+            total = base
+            for filtro in por_filtro.values():
+                total &= filtro
+            resultado["total"] = total.bit_count()
+        return resultado
+
+    def firma(self) -> tuple:
+        """(número de dinosaurios, id máximo), comparable con SELECT COUNT(*), MAX(id)"""
+        with self._lock:
+            return len(self._valores), max(self._valores, default=None)
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+
+class Facetas:
+    """Índice de facetas de los dinosaurios y caché de recuentos por combinación de filtros.
+    El índice se construye la primera vez que se pide y DinosaurioRepository lo mantiene
+    al día al escribir; cada escritura vacía la caché de recuentos."""
+
+    def __init__(self, ttl: float = FACETAS_INDICE_TTL, maximo: int = FACETAS_CACHE_MAXIMO):
+        self.ttl = ttl
+        self._indice: Optional[IndiceFacetas] = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._recuentos = TTLCache(ttl, maximo)
+        self._construcciones = 0
+        self._desfasados = 0
+
+    def _vigente(self):
+        with self._lock:
+            if self._indice is not None and self._indice.creado + self.ttl > time.monotonic():
+                return self._indice, None
+            return None, self._version
+
+    def _guardar(self, datos: tuple, version: int) -> IndiceFacetas:
+        indice = IndiceFacetas(*datos)
+        with self._lock:
+            self._construcciones += 1
+            # Si hubo escrituras mientras se leía, se usa pero no se guarda
+            if version == self._version:
+                self._indice = indice
+                self._recuentos.vaciar()
+        return indice
+
+    def cargar(self, leer) -> IndiceFacetas:
+        """Índice vigente; si no hay, lo construye con leer() -> (dinosaurios, relaciones)"""
+        indice, version = self._vigente()
+        if indice is None:
+            indice = self._guardar(leer(), version)
+        return indice
+
+    async def cargar_async(self, leer) -> IndiceFacetas:
+        indice, version = self._vigente()
+        if indice is None:
+            indice = self._guardar(await leer(), version)
+        return indice
+
+    @staticmethod
+    def _clave(busqueda: Optional[str], filtros: dict) -> tuple:
+        # La búsqueda se normaliza igual que en el índice de texto: "Jurásico" y "jurasico" comparten entrada
+        return (" ".join(sorted(set(tokenizar(busqueda)))),) + tuple(filtros.get(campo) for campo in CAMPOS)
+
+    def obtener(self, busqueda: Optional[str], filtros: dict, firma: Optional[tuple] = None):
+        """(recuentos, None) si están en caché; (None, version) si hay que calcularlos.
+        firma: (COUNT(*), MAX(id)) leída de la BD; si el índice no coincide con ella, otro
+        proceso (el importador, otro worker) ha añadido o borrado filas y se descarta"""
+        with self._lock:
+            indice = self._indice
+        if indice is not None and firma is not None and indice.firma() != tuple(firma):
+            with self._lock:
+                self._desfasados += 1
+            self.invalidar()
+        version = self._recuentos.version
+        recuentos = self._recuentos.obtener(self._clave(busqueda, filtros))
+        return (recuentos, None) if recuentos is not None else (None, version)
+
+    def calcular(self, indice: IndiceFacetas, busqueda: Optional[str], filtros: dict, ids,
+                 version: int) -> dict:
+        recuentos = indice.contar(filtros, ids)
+        self._recuentos.guardar(self._clave(busqueda, filtros), recuentos, version)
+        return recuentos
+
+    def _escritura(self) -> Optional[IndiceFacetas]:
+        with self._lock:
+            self._version += 1
+            indice = self._indice
+        self._recuentos.vaciar()
+        return indice
+
+    def poner(self, id: int, era_id, region_id, dieta, habitats=None) -> None:
+        indice = self._escritura()
+        if indice is not None:
+            indice.poner(id, era_id, region_id, dieta, habitats)
+
+    def habitat(self, id: int, habitat_id: int, presente: bool) -> None:
+        indice = self._escritura()
+        if indice is not None:
+            indice.habitat(id, habitat_id, presente)
+
+    def habitats(self, id: int, habitats) -> None:
+        indice = self._escritura()
+        if indice is not None:
+            indice.habitats(id, habitats)
+
+    def quitar(self, id: int) -> None:
+        indice = self._escritura()
+        if indice is not None:
+            indice.quitar(id)
+
+    def invalidar(self) -> None:
+        """Descarta el índice (tras cambios en lote): se reconstruye en la siguiente consulta"""
+        with self._lock:
+            self._version += 1
+            self._indice = None
+        self._recuentos.vaciar()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            dinosaurios = len(self._indice) if self._indice is not None else 0
+        return {"dinosaurios": dinosaurios, "construcciones": self._construcciones,
+                "desfasados": self._desfasados, "recuentos": self._recuentos.estadisticas()}
+
+
+facetas = Facetas()
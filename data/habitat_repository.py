@@ -1,92 +1,219 @@
-from typing import List, Optional
-from domain.model.Habitat import Habitat
-
-
-class HabitatRepository:
-
-    def get_all(self, db, busqueda: Optional[str] = None, tipo_ambiente: Optional[str] = None) -> List[Habitat]:
-        """Obtiene todos los hábitats con filtros opcionales"""
-        cursor = db.cursor()
-        
-        query = "SELECT id, nombre, tipo_ambiente, descripcion, imagen FROM habitats WHERE 1=1"
-        params = []
-        
-        if busqueda:
-            query += " AND (nombre LIKE %s OR descripcion LIKE %s)"
-            params.extend([f"%{busqueda}%", f"%{busqueda}%"])
-        
-        if tipo_ambiente:
-            query += " AND tipo_ambiente = %s"
-            params.append(tipo_ambiente)
-        
-        query += " ORDER BY nombre"
-        
-        cursor.execute(query, params)
-        habitats_en_db = cursor.fetchall()
-        habitats: List[Habitat] = list()
-        for habitat in habitats_en_db:
-            habitat_obj = Habitat(habitat[0], habitat[1], habitat[2], habitat[3], habitat[4])
-            habitats.append(habitat_obj)
-        cursor.close()
-        return habitats
-
-    def get_by_id(self, db, id: int) -> Habitat:
-        cursor = db.cursor()
-        cursor.execute("SELECT id, nombre, tipo_ambiente, descripcion, imagen FROM habitats WHERE id = %s", (id,))
-        habitat_db = cursor.fetchone()
-        cursor.close()
-        if habitat_db:
-            return Habitat(habitat_db[0], habitat_db[1], habitat_db[2], habitat_db[3], habitat_db[4])
-        return None
-
-    def insertar_habitat(self, db, habitat: Habitat) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "INSERT INTO habitats (nombre, tipo_ambiente, descripcion, imagen) VALUES (%s, %s, %s, %s)",
-            (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Insert no rows affected")
-        cursor.close()
-
-    def actualizar_habitat(self, db, habitat: Habitat) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE habitats SET nombre = %s, tipo_ambiente = %s, descripcion = %s, imagen = %s WHERE id = %s",
-            (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen, habitat.id)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Update affected no rows")
-        cursor.close()
-
-    def borrar_habitat(self, db, id: int) -> None:
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM habitats WHERE id = %s", (id,))
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Delete affected no rows")
-        cursor.close()
-
-    def get_habitats_by_dinosaurio(self, db, dinosaurio_id: int) -> List[Habitat]:
-        """Obtiene todos los habitats asociados a un dinosaurio"""
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT h.id, h.nombre, h.tipo_ambiente, h.descripcion 
-            FROM habitats h
-            JOIN dinosaurios_habitats dh ON h.id = dh.habitat_id
-            WHERE dh.dinosaurio_id = %s
-            ORDER BY h.nombre
-        """, (dinosaurio_id,))
-        habitats_en_db = cursor.fetchall()
-        habitats: List[Habitat] = list()
-        for habitat in habitats_en_db:
-            habitat_obj = Habitat(habitat[0], habitat[1], habitat[2], habitat[3])
-            habitats.append(habitat_obj)
-        cursor.close()
-        return habitats
-
+from typing import List, Optional
+from domain.model.Habitat import Habitat
+from data.busqueda import buscar_en_referencia, pagina_de_resultados
+from data.mapeo import mapeador
+from data.cache import paginas, referencia
+from data.sentencias import consultar
+from data.transaccion import al_confirmar, confirmar, confirmar_async
+from data.paginacion import Cursor, Pagina, TAMANO_PAGINA, construir_pagina, sql_pagina
+
+
+_SELECT_HABITAT = "SELECT id, nombre, tipo_ambiente, descripcion, imagen FROM habitats"
+_SQL_INSERTAR = "INSERT INTO habitats (nombre, tipo_ambiente, descripcion, imagen) VALUES (%s, %s, %s, %s)"
+_SQL_ACTUALIZAR = "UPDATE habitats SET nombre = %s, tipo_ambiente = %s, descripcion = %s, imagen = %s WHERE id = %s"
+_SQL_BY_DINOSAURIO = """
+            SELECT h.id, h.nombre, h.tipo_ambiente, h.descripcion 
+            FROM habitats h
+            JOIN dinosaurios_habitats dh ON h.id = dh.habitat_id
+            WHERE dh.dinosaurio_id = %s
+            ORDER BY h.nombre
+        """
+
+
+_PESOS_BUSQUEDA = {"nombre": 3.0, "tipo_ambiente": 1.5, "descripcion": 1.0}
+
+
+def _invalidar() -> None:
+    referencia.invalidar("habitats")
+    paginas.invalidar_etiquetas("habitats")
+
+
+def _campos_busqueda(habitat: Habitat) -> dict:
+    return {"nombre": habitat.nombre, "tipo_ambiente": habitat.tipo_ambiente, "descripcion": habitat.descripcion}
+
+
+def _filtros_get_all(tipo_ambiente: Optional[str]):
+    condiciones = " WHERE 1=1"
+    params = []
+    
+    if tipo_ambiente:
+        condiciones += " AND tipo_ambiente = %s"
+        params.append(tipo_ambiente)
+    
+    return condiciones, params
+
+
+def _query_get_all(tipo_ambiente: Optional[str]):
+    condiciones, params = _filtros_get_all(tipo_ambiente)
+    return _SELECT_HABITAT + condiciones + " ORDER BY nombre", params
+
+
+def _filtro(tipo_ambiente: Optional[str]):
+    """El filtro de _filtros_get_all aplicado en memoria a los resultados de una búsqueda"""
+    if not tipo_ambiente:
+        return None
+    return lambda habitat: habitat.tipo_ambiente == tipo_ambiente
+
+
+_a_habitat = mapeador(Habitat, ("id", "nombre", "tipo_ambiente", "descripcion", "imagen"))
+# Las consultas por dinosaurio no traen la imagen
+_a_habitat_sin_imagen = mapeador(Habitat, ("id", "nombre", "tipo_ambiente", "descripcion"))
+
+
+class HabitatRepository:
+
+    def get_all(self, db, busqueda: Optional[str] = None, tipo_ambiente: Optional[str] = None) -> List[Habitat]:
+        """Obtiene todos los hábitats con filtros opcionales (sin filtros, de la caché; con búsqueda, por relevancia)"""
+        if busqueda:
+            return [habitat for habitat, _ in self._buscar(db, busqueda, tipo_ambiente)]
+        if not tipo_ambiente:
+            habitats, _ = referencia.cargar("habitats", lambda: self._consultar(db, None))
+            return list(habitats)
+        return self._consultar(db, tipo_ambiente)
+
+    def _buscar(self, db, busqueda: str, tipo_ambiente: Optional[str]) -> list:
+        datos = referencia.cargar("habitats", lambda: self._consultar(db, None))
+        return buscar_en_referencia("habitats", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda,
+                                    _filtro(tipo_ambiente))
+
+    def _consultar(self, db, tipo_ambiente: Optional[str]) -> List[Habitat]:
+        cursor = db.cursor()
+        query, params = _query_get_all(tipo_ambiente)
+        cursor.execute(query, params)
+        habitats_en_db = cursor.fetchall()
+        habitats: List[Habitat] = list()
+        for habitat in habitats_en_db:
+            habitats.append(_a_habitat(habitat))
+        cursor.close()
+        return habitats
+
+    def get_pagina(self, db, busqueda: Optional[str] = None, tipo_ambiente: Optional[str] = None, desde: Optional[Cursor] = None,
+                   tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        """Una página del listado ordenado por (nombre, id); con_total=False se ahorra el COUNT.
+        Con búsqueda, por relevancia"""
+        if busqueda:
+            return pagina_de_resultados(self._buscar(db, busqueda, tipo_ambiente), desde, tamano)
+        condiciones, params = _filtros_get_all(tipo_ambiente)
+        query, params_pagina = sql_pagina(_SELECT_HABITAT, condiciones, params, desde, tamano)
+        cursor = db.cursor()
+        cursor.execute(query, params_pagina)
+        habitats = [_a_habitat(habitat) for habitat in cursor.fetchall()]
+        total = None
+        if con_total:
+            cursor.execute("SELECT COUNT(*) FROM habitats" + condiciones, params)
+            total = cursor.fetchone()[0]
+        cursor.close()
+        return construir_pagina(habitats, desde, tamano, lambda habitat: habitat.nombre, total)
+
+    def get_by_id(self, db, id: int) -> Habitat:
+        _, por_id = referencia.cargar("habitats", lambda: self._consultar(db, None))
+        return por_id.get(id)
+
+    def insertar_habitat(self, db, habitat: Habitat) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Insert no rows affected")
+        cursor.close()
+
+    def actualizar_habitat(self, db, habitat: Habitat) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen, habitat.id))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Update affected no rows")
+        cursor.close()
+
+    def borrar_habitat(self, db, id: int) -> None:
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM habitats WHERE id = %s", (id,))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Delete affected no rows")
+        cursor.close()
+
+    def get_habitats_by_dinosaurio(self, db, dinosaurio_id: int) -> List[Habitat]:
+        """Obtiene todos los habitats asociados a un dinosaurio"""
+        habitats_en_db = consultar(db, _SQL_BY_DINOSAURIO, (dinosaurio_id,))
+        habitats: List[Habitat] = list()
+        for habitat in habitats_en_db:
+            habitats.append(_a_habitat_sin_imagen(habitat))
+        return habitats
+
+
+class AsyncHabitatRepository:
+    """Misma interfaz que HabitatRepository sobre una conexión aiomysql"""
+
+    async def get_all(self, db, busqueda: Optional[str] = None, tipo_ambiente: Optional[str] = None) -> List[Habitat]:
+        if busqueda:
+            return [habitat for habitat, _ in await self._buscar(db, busqueda, tipo_ambiente)]
+        if not tipo_ambiente:
+            habitats, _ = await referencia.cargar_async("habitats", lambda: self._consultar(db, None))
+            return list(habitats)
+        return await self._consultar(db, tipo_ambiente)
+
+    async def _buscar(self, db, busqueda: str, tipo_ambiente: Optional[str]) -> list:
+        datos = await referencia.cargar_async("habitats", lambda: self._consultar(db, None))
+        return buscar_en_referencia("habitats", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda,
+                                    _filtro(tipo_ambiente))
+
+    async def _consultar(self, db, tipo_ambiente: Optional[str]) -> List[Habitat]:
+        query, params = _query_get_all(tipo_ambiente)
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            return [_a_habitat(habitat) for habitat in await cursor.fetchall()]
+
+    async def get_pagina(self, db, busqueda: Optional[str] = None, tipo_ambiente: Optional[str] = None, desde: Optional[Cursor] = None,
+                         tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        if busqueda:
+            return pagina_de_resultados(await self._buscar(db, busqueda, tipo_ambiente), desde, tamano)
+        condiciones, params = _filtros_get_all(tipo_ambiente)
+        query, params_pagina = sql_pagina(_SELECT_HABITAT, condiciones, params, desde, tamano)
+        total = None
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params_pagina)
+            habitats = [_a_habitat(habitat) for habitat in await cursor.fetchall()]
+            if con_total:
+                await cursor.execute("SELECT COUNT(*) FROM habitats" + condiciones, params)
+                total = (await cursor.fetchone())[0]
+        return construir_pagina(habitats, desde, tamano, lambda habitat: habitat.nombre, total)
+
+    async def get_by_id(self, db, id: int) -> Habitat:
+        _, por_id = await referencia.cargar_async("habitats", lambda: self._consultar(db, None))
+        return por_id.get(id)
+
+    async def insertar_habitat(self, db, habitat: Habitat) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_INSERTAR, (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Insert no rows affected")
+
+    async def actualizar_habitat(self, db, habitat: Habitat) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_ACTUALIZAR, (habitat.nombre, habitat.tipo_ambiente, habitat.descripcion, habitat.imagen, habitat.id))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Update affected no rows")
+
+    async def borrar_habitat(self, db, id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute("DELETE FROM habitats WHERE id = %s", (id,))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Delete affected no rows")
+
+    async def get_habitats_by_dinosaurio(self, db, dinosaurio_id: int) -> List[Habitat]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_BY_DINOSAURIO, (dinosaurio_id,))
+            return [_a_habitat_sin_imagen(habitat) for habitat in await cursor.fetchall()]
@@ -0,0 +1,51 @@
+from typing import Set
+
+from data.transaccion import confirmar, confirmar_async
+
+# Tablas cuya columna imagen apunta a un fichero de uploads/
+TABLAS_CON_IMAGEN = ("dinosaurios", "eras", "regiones", "habitats")
+
+_SQL_REFERENCIADAS = " UNION ".join(f"SELECT imagen FROM {tabla} WHERE imagen IS NOT NULL"
+                                    for tabla in TABLAS_CON_IMAGEN)
+_SQL_REEMPLAZAR = [f"UPDATE {tabla} SET imagen = %s WHERE imagen = %s" for tabla in TABLAS_CON_IMAGEN]
+
+
+class ImagenRepository:
+    """Referencias a las imágenes subidas desde las columnas imagen"""
+
+    def get_referenciadas(self, db) -> Set[str]:
+        """URLs de imagen que usa alguna fila"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_REFERENCIADAS)
+        urls = {fila[0] for fila in cursor.fetchall()}
+        cursor.close()
+        return urls
+
+    def reemplazar(self, db, anterior: str, nueva: str) -> int:
+        """Cambia una URL de imagen por otra en todas las tablas. Devuelve las filas cambiadas."""
+        cursor = db.cursor()
+        cambiadas = 0
+        for query in _SQL_REEMPLAZAR:
+            cursor.execute(query, (nueva, anterior))
+            cambiadas += cursor.rowcount
+        confirmar(db)
+        cursor.close()
+        return cambiadas
+
+
+class AsyncImagenRepository:
+    """Misma interfaz que ImagenRepository sobre una conexión aiomysql"""
+
+    async def get_referenciadas(self, db) -> Set[str]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_REFERENCIADAS)
+            return {fila[0] for fila in await cursor.fetchall()}
+
+    async def reemplazar(self, db, anterior: str, nueva: str) -> int:
+        cambiadas = 0
+        async with db.cursor() as cursor:
+            for query in _SQL_REEMPLAZAR:
+                await cursor.execute(query, (nueva, anterior))
+                cambiadas += cursor.rowcount
+            await confirmar_async(db)
+        return cambiadas
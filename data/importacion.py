@@ -0,0 +1,293 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import List, Optional
+
+from domain.model.Dinosaurio import Dinosaurio
+from data.busqueda import normalizar
+from data.dinosaurio_repository import AsyncDinosaurioRepository, DinosaurioRepository
+from data.era_repository import AsyncEraRepository, EraRepository
+from data.habitat_repository import AsyncHabitatRepository, HabitatRepository
+from data.region_repository import AsyncRegionRepository, RegionRepository
+from data.transaccion import transaccion, transaccion_async
+
+# Filas por transacción: si una falla solo se repite ese bloque, fila a fila
+IMPORTACION_FILAS_POR_TRANSACCION = int(os.getenv("IMPORTACION_FILAS_POR_TRANSACCION", "5000"))
+# Tamaño máximo del fichero que se acepta por la API (la línea de comandos no tiene límite)
+IMPORTACION_MAXIMO_MB = int(os.getenv("IMPORTACION_MAXIMO_MB", "200"))
+# Errores que se guardan con su línea en el informe (el resto solo se cuentan)
+IMPORTACION_MAXIMO_ERRORES = int(os.getenv("IMPORTACION_MAXIMO_ERRORES", "1000"))
+
+FORMATOS = ("csv", "jsonl")
+# En CSV los habitats van en una sola columna: "Bosque|Llanura"
+SEPARADOR_HABITATS = "|"
+
+_CAMPOS_TEXTO = ("descripcion", "tipo", "dieta", "imagen")
+_CAMPOS_NUMERO = ("peso_kg", "altura_metros", "longitud_metros")
+
+
+def formato_de(nombre: str) -> Optional[str]:
+    """Formato por la extensión o el tipo MIME: "csv", "jsonl" o None"""
+    nombre = (nombre or "").split(";")[0].strip().lower()  # "text/csv; charset=utf-8"
+    if nombre.endswith("csv"):
+        return "csv"
+    if nombre.endswith(("jsonl", "ndjson", "jsonlines")):
+        return "jsonl"
+    return None
+
+
+class InformeImportacion:
+    """Resultado de una importación: filas leídas, importadas y errores por línea"""
+
+    def __init__(self):
+        self.leidas = 0
+        self.importadas = 0
+        self.con_error = 0
+        self.errores = []  # [{"linea": n, "error": "..."}], como mucho IMPORTACION_MAXIMO_ERRORES
+
+    def error(self, linea: int, mensaje: str) -> None:
+        self.con_error += 1
+        if len(self.errores) < IMPORTACION_MAXIMO_ERRORES:
+            self.errores.append({"linea": linea, "error": mensaje})
+
+
+def leer_filas(fichero, formato: str):
+    """(línea, campos) de cada registro de un fichero binario, sin cargarlo entero en memoria.
+    Una línea JSONL que no se puede leer sale como (línea, ValueError)"""
+    texto = io.TextIOWrapper(fichero, encoding="utf-8-sig", newline="")
+    if formato == "csv":
+        lector = csv.DictReader(texto)
+        for campos in lector:
+            yield lector.line_num, campos
+        return
+    for linea, contenido in enumerate(texto, start=1):
+        if not contenido.strip():
+            continue
+        try:
+            campos = json.loads(contenido)
+            if not isinstance(campos, dict):
+                raise ValueError("se esperaba un objeto JSON")
+            yield linea, campos
+        except ValueError as e:
+            yield linea, ValueError(f"JSON no válido: {e}")
+
+
+class _Nombres:
+    """Nombre (sin tildes ni mayúsculas) -> id de eras, regiones y habitats, sacado de la
+    caché de referencia una vez por importación en lugar de una consulta por fila"""
+
+    def __init__(self, eras, regiones, habitats):
+        self.tablas = {
+            "era": ({normalizar(e.nombre): e.id for e in eras}, {e.id for e in eras}),
+            "region": ({normalizar(r.nombre): r.id for r in regiones}, {r.id for r in regiones}),
+            "habitat": ({normalizar(h.nombre): h.id for h in habitats}, {h.id for h in habitats}),
+        }
+
+    def id(self, tabla: str, nombre, id_dado) -> Optional[int]:
+        por_nombre, ids = self.tablas[tabla]
+        if not _vacio(id_dado):
+            try:
+                id = int(id_dado)
+            except ValueError:
+                raise ValueError(f"{tabla}_id no es un número: {id_dado}")
+            if id not in ids:
+                raise ValueError(f"no existe {tabla} con id {id}")
+            return id
+        if _vacio(nombre):
+            return None
+        id = por_nombre.get(normalizar(str(nombre).strip()))
+        if id is None:
+            raise ValueError(f"no existe {tabla} con nombre {nombre!r}")
+        return id
+
+
+def _vacio(valor) -> bool:
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _texto(valor) -> Optional[str]:
+    return None if _vacio(valor) else str(valor).strip()
+
+
+def _numero(campo: str, valor) -> Optional[float]:
+    if _vacio(valor):
+        return None
+    try:
+        return float(str(valor).replace(",", ".")) if isinstance(valor, str) else float(valor)
+    except ValueError:
+        raise ValueError(f"{campo} no es un número: {valor}")
+
+
+def _habitats(campos: dict, nombres: _Nombres) -> List[int]:
+    valor = campos.get("habitats")
+    if _vacio(valor):
+        return []
+    lista = valor if isinstance(valor, list) else str(valor).split(SEPARADOR_HABITATS)
+    ids = []
+    for habitat in lista:
+        if isinstance(habitat, int):
+            id = nombres.id("habitat", None, habitat)
+        else:
+            id = nombres.id("habitat", habitat, None)
+        if id is not None and id not in ids:
+            ids.append(id)
+    return ids
+
+
+def _a_dinosaurio(campos: dict, nombres: _Nombres, creador_id: Optional[int]):
+    """Registro del fichero -> (Dinosaurio, ids de habitats). ValueError si no vale"""
+    nombre = _texto(campos.get("nombre"))
+    if nombre is None:
+        raise ValueError("falta el nombre")
+    dinosaurio = Dinosaurio(
+        id=0,
+        nombre=nombre,
+        era_id=nombres.id("era", campos.get("era"), campos.get("era_id")),
+        region_id=nombres.id("region", campos.get("region"), campos.get("region_id")),
+        creador_id=creador_id,
+        **{campo: _texto(campos.get(campo)) for campo in _CAMPOS_TEXTO},
+        **{campo: _numero(campo, campos.get(campo)) for campo in _CAMPOS_NUMERO},
+    )
+    return dinosaurio, _habitats(campos, nombres)
+
+
+def _bloques(filas, nombres: _Nombres, creador_id: Optional[int], informe: InformeImportacion):
+    """Agrupa los registros válidos en bloques de IMPORTACION_FILAS_POR_TRANSACCION
+    [(línea, dinosaurio, habitats)]; los que no valen van al informe"""
+    vistos = set()
+    bloque = []
+    for linea, campos in filas:
+        informe.leidas += 1
+        try:
+            if isinstance(campos, ValueError):
+                raise campos
+            dinosaurio, habitats = _a_dinosaurio(campos, nombres, creador_id)
+            clave = normalizar(dinosaurio.nombre)
+            if clave in vistos:
+                raise ValueError(f"nombre repetido en el fichero: {dinosaurio.nombre}")
+            vistos.add(clave)
+        except (ValueError, TypeError) as e:
+            informe.error(linea, str(e))
+            continue
+        bloque.append((linea, dinosaurio, habitats))
+        if len(bloque) >= IMPORTACION_FILAS_POR_TRANSACCION:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _sin_existentes(bloque: list, existentes: set, informe: InformeImportacion) -> list:
+    # MySQL compara los nombres sin mayúsculas ni tildes: aquí igual
+    existentes = {normalizar(nombre) for nombre in existentes}
+    nuevas = []
+    for linea, dinosaurio, habitats in bloque:
+        if normalizar(dinosaurio.nombre) in existentes:
+            informe.error(linea, f"ya existe un dinosaurio llamado {dinosaurio.nombre}")
+        else:
+            nuevas.append((linea, dinosaurio, habitats))
+    return nuevas
+
+
+def _relaciones(ids: List[int], bloque: list) -> list:
+    return [(id, habitat_id) for id, (_, _, habitats) in zip(ids, bloque) for habitat_id in habitats]
+
+
+class ImportadorDinosaurios:
+    """Carga masiva de dinosaurios desde CSV o JSONL: INSERTs de varias filas dentro de
+    transacciones de IMPORTACION_FILAS_POR_TRANSACCION filas. Si un bloque falla en la BD
+    se deshace y se repite fila a fila, para que el informe diga qué línea falló."""
+
+    def __init__(self):
+        self.dino_repo = DinosaurioRepository()
+        self.era_repo = EraRepository()
+        self.region_repo = RegionRepository()
+        self.habitat_repo = HabitatRepository()
+
+    def importar(self, db, fichero, formato: str, creador_id: Optional[int] = None) -> InformeImportacion:
+        nombres = _Nombres(self.era_repo.get_all(db), self.region_repo.get_all(db),
+                           self.habitat_repo.get_all(db))
+        informe = InformeImportacion()
+        for bloque in _bloques(leer_filas(fichero, formato), nombres, creador_id, informe):
+            existentes = self.dino_repo.nombres_existentes(db, [d.nombre for _, d, _ in bloque])
+            self._escribir(db, _sin_existentes(bloque, existentes, informe), informe)
+        # Los fallos de la BD se conocen después que los de validación de las líneas siguientes
+        informe.errores.sort(key=lambda error: error["linea"])
+        return informe
+
+    def _escribir(self, db, bloque: list, informe: InformeImportacion) -> None:
+        if not bloque:
+            return
+        try:
+            with transaccion(db):
+                self._insertar(db, bloque)
+            informe.importadas += len(bloque)
+            return
+        except Exception:
+            pass
+        for fila in bloque:
+            try:
+                with transaccion(db):
+                    self._insertar(db, [fila])
+                informe.importadas += 1
+            except Exception as e:
+                informe.error(fila[0], str(e))
+
+    def _insertar(self, db, bloque: list) -> None:
+        ids = self.dino_repo.insertar_lote(db, [dinosaurio for _, dinosaurio, _ in bloque])
+        relaciones = _relaciones(ids, bloque)
+        if relaciones:
+            self.dino_repo.agregar_habitats_lote(db, relaciones)
+
+
+class AsyncImportadorDinosaurios:
+    """Misma interfaz que ImportadorDinosaurios sobre una conexión aiomysql"""
+
+    def __init__(self):
+        self.dino_repo = AsyncDinosaurioRepository()
+        self.era_repo = AsyncEraRepository()
+        self.region_repo = AsyncRegionRepository()
+        self.habitat_repo = AsyncHabitatRepository()
+
+    async def importar(self, db, fichero, formato: str, creador_id: Optional[int] = None) -> InformeImportacion:
+        nombres = _Nombres(await self.era_repo.get_all(db), await self.region_repo.get_all(db),
+                           await self.habitat_repo.get_all(db))
+        informe = InformeImportacion()
+        bloques = _bloques(leer_filas(fichero, formato), nombres, creador_id, informe)
+        while True:
+            # Leer el fichero y validar las filas bloquea (E/S y CPU): cada bloque se prepara
+            # en un hilo para que el event loop siga atendiendo las demás peticiones
+            bloque = await asyncio.to_thread(next, bloques, None)
+            if bloque is None:
+                break
+            existentes = await self.dino_repo.nombres_existentes(db, [d.nombre for _, d, _ in bloque])
+            await self._escribir(db, _sin_existentes(bloque, existentes, informe), informe)
+        # Los fallos de la BD se conocen después que los de validación de las líneas siguientes
+        informe.errores.sort(key=lambda error: error["linea"])
+        return informe
+
+    async def _escribir(self, db, bloque: list, informe: InformeImportacion) -> None:
+        if not bloque:
+            return
+        try:
+            async with transaccion_async(db):
+                await self._insertar(db, bloque)
+            informe.importadas += len(bloque)
+            return
+        except Exception:
+            pass
+        for fila in bloque:
+            try:
+                async with transaccion_async(db):
+                    await self._insertar(db, [fila])
+                informe.importadas += 1
+            except Exception as e:
+                informe.error(fila[0], str(e))
+
+    async def _insertar(self, db, bloque: list) -> None:
+        ids = await self.dino_repo.insertar_lote(db, [dinosaurio for _, dinosaurio, _ in bloque])
+        relaciones = _relaciones(ids, bloque)
+        if relaciones:
+            await self.dino_repo.agregar_habitats_lote(db, relaciones)
@@ -0,0 +1,58 @@
+import inspect
+import keyword
+
+
+def _valores_iniciales(clase) -> dict:
+    """Atributos que deja __init__ en un objeto nuevo (los parámetros obligatorios a None)"""
+    obligatorios = [p for p in list(inspect.signature(clase.__init__).parameters.values())[1:]
+                    if p.default is inspect.Parameter.empty]
+    prototipo = clase(*[None] * len(obligatorios))
+    return {campo: getattr(prototipo, campo) for campo in clase.__slots__ if hasattr(prototipo, campo)}
+
+
+def mapeador(clase, columnas: tuple, desde: int = 0, conversiones: dict = None):
+    """Genera la función fila -> objeto de `clase` para una forma de consulta: `columnas` son
+    los atributos de las columnas que empiezan en fila[desde]. Asigna los atributos
+    directamente, sin llamar a __init__ ni trocear la fila, y deja el resto como los dejaría
+    __init__ (las listas, nuevas en cada objeto). conversiones: {columna: función}"""
+    conversiones = conversiones or {}
+    for columna in columnas:
+        if columna not in clase.__slots__ or keyword.iskeyword(columna):
+            raise ValueError(f"{clase.__name__} no tiene el atributo {columna!r}")
+    espacio = {"_nuevo": object.__new__, "_clase": clase}
+    lineas = ["def mapear(fila):", "    o = _nuevo(_clase)"]
+    for posicion, columna in enumerate(columnas, start=desde):
+        if columna in conversiones:
+            espacio[f"_c_{columna}"] = conversiones[columna]
+            lineas.append(f"    o.{columna} = _c_{columna}(fila[{posicion}])")
+        else:
+            lineas.append(f"    o.{columna} = fila[{posicion}]")
+    for campo, valor in _valores_iniciales(clase).items():
+        if campo in columnas:
+            continue
+        if isinstance(valor, list):
+            lineas.append(f"    o.{campo} = []")
+        else:
+            espacio[f"_v_{campo}"] = valor
+            lineas.append(f"    o.{campo} = _v_{campo}")
+    lineas.append("    return o")
+    exec("\n".join(lineas), espacio)
+    funcion = espacio["mapear"]
+    funcion.__name__ = funcion.__qualname__ = f"_a_{clase.__name__.lower()}"
+    return funcion
+
+
+def es_modelo(valor) -> bool:
+    """Objeto de dominio (con __slots__) u otro objeto con atributos propios. Los textos
+    quedan fuera: Markup (los resaltados de la búsqueda) también declara __slots__"""
+    if isinstance(valor, (str, bytes)):
+        return False
+    return hasattr(type(valor), "__slots__") or hasattr(valor, "__dict__")
+
+
+def atributos(objeto) -> dict:
+    """vars() que sirve también para los modelos con __slots__: solo los atributos asignados
+    (los de búsqueda o relaciones que no se cargaron no salen)"""
+    if hasattr(objeto, "__dict__"):
+        return vars(objeto)
+    return {campo: getattr(objeto, campo) for campo in type(objeto).__slots__ if hasattr(objeto, campo)}
@@ -0,0 +1,102 @@
+import base64
+import json
+import os
+from typing import Callable, Optional
+
+# Elementos por página si no se pide otro tamaño, y máximo que se permite pedir
+TAMANO_PAGINA = int(os.getenv("PAGINA_TAMANO", "24"))
+TAMANO_MAXIMO = 100
+
+
+class Cursor:
+    """Posición en un listado ordenado por (columna, id): la fila de referencia y el sentido.
+    "siguiente" pide las filas posteriores a ella; "anterior", las previas."""
+
+    def __init__(self, valor, id: int, sentido: str = "siguiente"):
+        self.valor = valor
+        self.id = id
+        self.sentido = sentido
+
+    def codificar(self) -> str:
+        datos = json.dumps([self.valor, self.id, self.sentido[0]], ensure_ascii=False)
+        return base64.urlsafe_b64encode(datos.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decodificar(texto: Optional[str]) -> Optional["Cursor"]:
+        """Devuelve None (primera página) si no hay cursor o no es válido"""
+        if not texto:
+            return None
+        try:
+            relleno = "=" * (-len(texto) % 4)
+            valor, id, sentido = json.loads(base64.urlsafe_b64decode(texto + relleno))
+            return Cursor(valor, int(id), "anterior" if sentido == "a" else "siguiente")
+        except (ValueError, TypeError):
+            return None
+
+
+class Pagina:
+    """Una página de un listado con los cursores para moverse a la siguiente y a la anterior"""
+
+    def __init__(self, elementos: list, siguiente: Optional[str] = None, anterior: Optional[str] = None,
+                 total: Optional[int] = None, tamano: int = TAMANO_PAGINA):
+        self.elementos = elementos
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.total = total  # None si se pidió sin total
+        self.tamano = tamano
+
+    def __iter__(self):
+        return iter(self.elementos)
+
+    def __len__(self) -> int:
+        return len(self.elementos)
+
+
+def limitar_tamano(tamano: Optional[int]) -> int:
+    if not tamano or tamano < 1:
+        return TAMANO_PAGINA
+    return min(tamano, TAMANO_MAXIMO)
+
+
+def sql_pagina(consulta: str, condiciones: str, params: list, cursor: Optional[Cursor], tamano: int,
+               columna: str = "nombre", alias: str = "", descendente: bool = False) -> tuple:
+    """Añade a la consulta la condición de keyset, el orden y el LIMIT.
+    Se pide una fila de más para saber si hay más páginas en ese sentido.
+    descendente=True ordena por (columna, id) de mayor a menor."""
+    params = list(params)
+    col, id_col = f"{alias}{columna}", f"{alias}id"
+    # Ir hacia atrás es recorrer el orden al revés
+    hacia_atras = cursor is not None and cursor.sentido == "anterior"
+    orden = "DESC" if descendente != hacia_atras else "ASC"
+    if cursor is not None:
+        comparador = "<" if orden == "DESC" else ">"
+        # Forma expandida de (col, id) > (%s, %s), que los índices aprovechan mejor
+        condiciones += f" AND ({col} {comparador} %s OR ({col} = %s AND {id_col} {comparador} %s))"
+        params.extend([cursor.valor, cursor.valor, cursor.id])
+    query = f"{consulta}{condiciones} ORDER BY {col} {orden}, {id_col} {orden} LIMIT %s"
+    params.append(tamano + 1)
+    return query, params
+
+
+def construir_pagina(elementos: list, cursor: Optional[Cursor], tamano: int,
+                     clave: Callable, total: Optional[int] = None) -> Pagina:
+    """Recorta la fila de más, restablece el orden y calcula los cursores.
+    clave(elemento) devuelve el valor de la columna de orden."""
+    hay_mas = len(elementos) > tamano
+    elementos = elementos[:tamano]
+    hacia_atras = cursor is not None and cursor.sentido == "anterior"
+    if hacia_atras:
+        elementos.reverse()
+        # Venimos de una página posterior: seguro que hay siguiente
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, cursor is not None
+
+    siguiente = anterior = None
+    if elementos:
+        primero, ultimo = elementos[0], elementos[-1]
+        if hay_siguiente:
+            siguiente = Cursor(clave(ultimo), ultimo.id, "siguiente").codificar()
+        if hay_anterior:
+            anterior = Cursor(clave(primero), primero.id, "anterior").codificar()
+    return Pagina(elementos, siguiente, anterior, total, tamano)
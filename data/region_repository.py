@@ -1,73 +1,197 @@
-from typing import List, Optional
-from domain.model.Region import Region
-
-
-class RegionRepository:
-
-    def get_all(self, db, busqueda: Optional[str] = None, continente: Optional[str] = None) -> List[Region]:
-        """Obtiene todas las regiones con filtros opcionales"""
-        cursor = db.cursor()
-        
-        query = "SELECT id, nombre, pais, continente, descripcion, imagen FROM regiones WHERE 1=1"
-        params = []
-        
-        if busqueda:
-            query += " AND (nombre LIKE %s OR pais LIKE %s OR descripcion LIKE %s)"
-            params.extend([f"%{busqueda}%", f"%{busqueda}%", f"%{busqueda}%"])
-        
-        if continente:
-            query += " AND continente = %s"
-            params.append(continente)
-        
-        query += " ORDER BY nombre"
-        
-        cursor.execute(query, params)
-        regiones_en_db = cursor.fetchall()
-        regiones: List[Region] = list()
-        for region in regiones_en_db:
-            region_obj = Region(region[0], region[1], region[2], region[3], region[4], region[5])
-            regiones.append(region_obj)
-        cursor.close()
-        return regiones
-
-    def get_by_id(self, db, id: int) -> Region:
-        cursor = db.cursor()
-        cursor.execute("SELECT id, nombre, pais, continente, descripcion, imagen FROM regiones WHERE id = %s", (id,))
-        region_db = cursor.fetchone()
-        cursor.close()
-        if region_db:
-            return Region(region_db[0], region_db[1], region_db[2], region_db[3], region_db[4], region_db[5])
-        return None
-
-    def insertar_region(self, db, region: Region) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "INSERT INTO regiones (nombre, pais, continente, descripcion, imagen) VALUES (%s, %s, %s, %s, %s)",
-            (region.nombre, region.pais, region.continente, region.descripcion, region.imagen)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Insert no rows affected")
-        cursor.close()
-
-    def actualizar_region(self, db, region: Region) -> None:
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE regiones SET nombre = %s, pais = %s, continente = %s, descripcion = %s, imagen = %s WHERE id = %s",
-            (region.nombre, region.pais, region.continente, region.descripcion, region.imagen, region.id)
-        )
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Update affected no rows")
-        cursor.close()
-
-    def borrar_region(self, db, id: int) -> None:
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM regiones WHERE id = %s", (id,))
-        db.commit()
-        if cursor.rowcount == 0:
-            cursor.close()
-            raise RuntimeError("Delete affected no rows")
-        cursor.close()
+from typing import List, Optional
+from domain.model.Region import Region
+from data.busqueda import buscar_en_referencia, pagina_de_resultados
+from data.mapeo import mapeador
+from data.cache import paginas, referencia
+from data.transaccion import al_confirmar, confirmar, confirmar_async
+from data.paginacion import Cursor, Pagina, TAMANO_PAGINA, construir_pagina, sql_pagina
+
+
+_SELECT_REGION = "SELECT id, nombre, pais, continente, descripcion, imagen FROM regiones"
+_SQL_INSERTAR = "INSERT INTO regiones (nombre, pais, continente, descripcion, imagen) VALUES (%s, %s, %s, %s, %s)"
+_SQL_ACTUALIZAR = "UPDATE regiones SET nombre = %s, pais = %s, continente = %s, descripcion = %s, imagen = %s WHERE id = %s"
+
+
+_PESOS_BUSQUEDA = {"nombre": 3.0, "pais": 2.0, "continente": 1.0, "descripcion": 1.0}
+
+
+def _invalidar() -> None:
+    referencia.invalidar("regiones")
+    paginas.invalidar_etiquetas("regiones")
+
+
+def _campos_busqueda(region: Region) -> dict:
+    return {"nombre": region.nombre, "pais": region.pais, "continente": region.continente,
+            "descripcion": region.descripcion}
+
+
+def _filtros_get_all(continente: Optional[str]):
+    condiciones = " WHERE 1=1"
+    params = []
+    
+    if continente:
+        condiciones += " AND continente = %s"
+        params.append(continente)
+    
+    return condiciones, params
+
+
+def _query_get_all(continente: Optional[str]):
+    condiciones, params = _filtros_get_all(continente)
+    return _SELECT_REGION + condiciones + " ORDER BY nombre", params
+
+
+def _filtro(continente: Optional[str]):
+    """El filtro de _filtros_get_all aplicado en memoria a los resultados de una búsqueda"""
+    if not continente:
+        return None
+    return lambda region: region.continente == continente
+
+
+_a_region = mapeador(Region, ("id", "nombre", "pais", "continente", "descripcion", "imagen"))
+
+
+class RegionRepository:
+
+    def get_all(self, db, busqueda: Optional[str] = None, continente: Optional[str] = None) -> List[Region]:
+        """Obtiene todas las regiones con filtros opcionales (sin filtros, de la caché; con búsqueda, por relevancia)"""
+        if busqueda:
+            return [region for region, _ in self._buscar(db, busqueda, continente)]
+        if not continente:
+            regiones, _ = referencia.cargar("regiones", lambda: self._consultar(db, None))
+            return list(regiones)
+        return self._consultar(db, continente)
+
+    def _buscar(self, db, busqueda: str, continente: Optional[str]) -> list:
+        datos = referencia.cargar("regiones", lambda: self._consultar(db, None))
+        return buscar_en_referencia("regiones", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda,
+                                    _filtro(continente))
+
+    def _consultar(self, db, continente: Optional[str]) -> List[Region]:
+        cursor = db.cursor()
+        query, params = _query_get_all(continente)
+        cursor.execute(query, params)
+        regiones_en_db = cursor.fetchall()
+        regiones: List[Region] = list()
+        for region in regiones_en_db:
+            regiones.append(_a_region(region))
+        cursor.close()
+        return regiones
+
+    def get_pagina(self, db, busqueda: Optional[str] = None, continente: Optional[str] = None, desde: Optional[Cursor] = None,
+                   tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        """Una página del listado ordenado por (nombre, id); con_total=False se ahorra el COUNT.
+        Con búsqueda, por relevancia"""
+        if busqueda:
+            return pagina_de_resultados(self._buscar(db, busqueda, continente), desde, tamano)
+        condiciones, params = _filtros_get_all(continente)
+        query, params_pagina = sql_pagina(_SELECT_REGION, condiciones, params, desde, tamano)
+        cursor = db.cursor()
+        cursor.execute(query, params_pagina)
+        regiones = [_a_region(region) for region in cursor.fetchall()]
+        total = None
+        if con_total:
+            cursor.execute("SELECT COUNT(*) FROM regiones" + condiciones, params)
+            total = cursor.fetchone()[0]
+        cursor.close()
+        return construir_pagina(regiones, desde, tamano, lambda region: region.nombre, total)
+
+    def get_by_id(self, db, id: int) -> Region:
+        _, por_id = referencia.cargar("regiones", lambda: self._consultar(db, None))
+        return por_id.get(id)
+
+    def insertar_region(self, db, region: Region) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, (region.nombre, region.pais, region.continente, region.descripcion, region.imagen))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Insert no rows affected")
+        cursor.close()
+
+    def actualizar_region(self, db, region: Region) -> None:
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, (region.nombre, region.pais, region.continente, region.descripcion, region.imagen, region.id))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Update affected no rows")
+        cursor.close()
+
+    def borrar_region(self, db, id: int) -> None:
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM regiones WHERE id = %s", (id,))
+        confirmar(db)
+        al_confirmar(db, _invalidar)
+        if cursor.rowcount == 0:
+            cursor.close()
+            raise RuntimeError("Delete affected no rows")
+        cursor.close()
+
+
+class AsyncRegionRepository:
+    """Misma interfaz que RegionRepository sobre una conexión aiomysql"""
+
+    async def get_all(self, db, busqueda: Optional[str] = None, continente: Optional[str] = None) -> List[Region]:
+        if busqueda:
+            return [region for region, _ in await self._buscar(db, busqueda, continente)]
+        if not continente:
+            regiones, _ = await referencia.cargar_async("regiones", lambda: self._consultar(db, None))
+            return list(regiones)
+        return await self._consultar(db, continente)
+
+    async def _buscar(self, db, busqueda: str, continente: Optional[str]) -> list:
+        datos = await referencia.cargar_async("regiones", lambda: self._consultar(db, None))
+        return buscar_en_referencia("regiones", _PESOS_BUSQUEDA, _campos_busqueda, datos, busqueda,
+                                    _filtro(continente))
+
+    async def _consultar(self, db, continente: Optional[str]) -> List[Region]:
+        query, params = _query_get_all(continente)
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            return [_a_region(region) for region in await cursor.fetchall()]
+
+    async def get_pagina(self, db, busqueda: Optional[str] = None, continente: Optional[str] = None, desde: Optional[Cursor] = None,
+                         tamano: int = TAMANO_PAGINA, con_total: bool = True) -> Pagina:
+        if busqueda:
+            return pagina_de_resultados(await self._buscar(db, busqueda, continente), desde, tamano)
+        condiciones, params = _filtros_get_all(continente)
+        query, params_pagina = sql_pagina(_SELECT_REGION, condiciones, params, desde, tamano)
+        total = None
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params_pagina)
+            regiones = [_a_region(region) for region in await cursor.fetchall()]
+            if con_total:
+                await cursor.execute("SELECT COUNT(*) FROM regiones" + condiciones, params)
+                total = (await cursor.fetchone())[0]
+        return construir_pagina(regiones, desde, tamano, lambda region: region.nombre, total)
+
+    async def get_by_id(self, db, id: int) -> Region:
+        _, por_id = await referencia.cargar_async("regiones", lambda: self._consultar(db, None))
+        return por_id.get(id)
+
+    async def insertar_region(self, db, region: Region) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_INSERTAR, (region.nombre, region.pais, region.continente, region.descripcion, region.imagen))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Insert no rows affected")
+
+    async def actualizar_region(self, db, region: Region) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SQL_ACTUALIZAR, (region.nombre, region.pais, region.continente, region.descripcion, region.imagen, region.id))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Update affected no rows")
+
+    async def borrar_region(self, db, id: int) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute("DELETE FROM regiones WHERE id = %s", (id,))
+            await confirmar_async(db)
+            al_confirmar(db, _invalidar)
+            if cursor.rowcount == 0:
+                raise RuntimeError("Delete affected no rows")
@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+
+from data.dialect import dialecto
+
+# Sentencias preparadas que guarda cada conexión; al pasarse se cierra la usada hace más tiempo
+SENTENCIAS_PREPARADAS_MAXIMO = int(os.getenv("DATABASE_PREPARED_MAX", "64"))
+
+# Atributo de la conexión con su registro (como el de data/transaccion.py)
+_REGISTRO = "_sentencias"
+
+
+class MetricasSentencias:
+    """Aciertos y fallos del registro de sentencias de todas las conexiones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._expulsadas = 0
+
+    def contar(self, acierto: bool) -> None:
+        with self._lock:
+            if acierto:
+                self._aciertos += 1
+            else:
+                self._fallos += 1
+
+    def expulsada(self) -> None:
+        with self._lock:
+            self._expulsadas += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            usos = self._aciertos + self._fallos
+            return {
+                "maximo_por_conexion": SENTENCIAS_PREPARADAS_MAXIMO,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "expulsadas": self._expulsadas,
+                "tasa_aciertos": round(self._aciertos / usos, 3) if usos else None,
+            }
+
+
+metricas = MetricasSentencias()
+
+
+class RegistroSentencias:
+    """Sentencias preparadas de una conexión: texto SQL -> cursor preparado, con un máximo
+    de `maximo` (LRU). La clave es el SQL ya construido, así las consultas con filtros
+    dinámicos tienen una sentencia por combinación de filtros y no una por valor.
+    Una conexión la usa un solo hilo a la vez: no necesita lock."""
+
+    def __init__(self, conexion_id, maximo: int = SENTENCIAS_PREPARADAS_MAXIMO):
+        self.conexion_id = conexion_id
+        self.maximo = maximo
+        self._cursores = OrderedDict()  # sql -> (sql, cursor)
+
+    def obtener(self, db, sql: str):
+        """(sql, cursor): hay que ejecutar con ese mismo objeto sql, porque mysql-connector
+        solo reutiliza la sentencia si recibe la misma cadena (compara por identidad)"""
+        entrada = self._cursores.get(sql)
+        metricas.contar(entrada is not None)
+        if entrada is not None:
+            self._cursores.move_to_end(sql)
+            return entrada
+        entrada = (sql, dialecto(db).cursor_preparado(db))
+        self._cursores[sql] = entrada
+        while len(self._cursores) > self.maximo:
+            _, (_, cursor) = self._cursores.popitem(last=False)
+            _cerrar_silencioso(cursor)
+            metricas.expulsada()
+        return entrada
+
+    def descartar(self, sql: str) -> None:
+        entrada = self._cursores.pop(sql, None)
+        if entrada is not None:
+            _cerrar_silencioso(entrada[1])
+
+    def __len__(self) -> int:
+        return len(self._cursores)
+
+
+def _cerrar_silencioso(cursor) -> None:
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+def _registro(db) -> RegistroSentencias:
+    registro = getattr(db, _REGISTRO, None)
+    # ping(reconnect=True) del pool reabre la sesión sobre el mismo objeto y el servidor
+    # olvida sus sentencias: se empieza un registro nuevo sin cerrar las viejas, cuyos
+    # ids podrían coincidir con los de sentencias de la sesión nueva
+    conexion_id = getattr(db, "connection_id", None)
+    if registro is None or registro.conexion_id != conexion_id:
+        registro = RegistroSentencias(conexion_id)
+        setattr(db, _REGISTRO, registro)
+    return registro
+
+
+def consultar(db, sql: str, params=()) -> list:
+    """Ejecuta un SELECT con la sentencia preparada de la conexión y devuelve todas las filas.
+    Se leen siempre todas: un cursor preparado con filas pendientes bloquea la conexión"""
+    registro = _registro(db)
+    sql, cursor = registro.obtener(db, sql)
+    try:
+        cursor.execute(sql, tuple(params))
+        return cursor.fetchall()
+    except Exception:
+        # No se sabe en qué estado ha quedado la sentencia: se prepara de nuevo la próxima vez
+        registro.descartar(sql)
+        raise
+
+
+def consultar_uno(db, sql: str, params=()):
+    """Primera fila de consultar() o None"""
+    filas = consultar(db, sql, params)
+    return filas[0] if filas else None
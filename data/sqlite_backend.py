@@ -0,0 +1,250 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from data.dialect import SQLITE
+from data.sentencias import SENTENCIAS_PREPARADAS_MAXIMO
+
+# Ruta del fichero SQLite (":memory:" crea una BD en memoria compartida por el pool)
+SQLITE_PATH = os.getenv("DATABASE_SQLITE_PATH", "museo.db")
+# Nodos de solo lectura: abren el fichero en modo ro y no aplican el esquema
+SQLITE_READONLY = os.getenv("DATABASE_SQLITE_READONLY", "false").lower() in ("1", "true", "yes")
+
+# Scripts de sql/ en el orden en que se aplicaron sobre MySQL
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+ESQUEMA_SQL = [
+    "create_usuarios_table.sql",
+    "create_complete_database.sql",
+    "add_images_and_comments.sql",
+    "add_edit_and_votes.sql",
+    "add_vote_counters.sql",
+]
+
+
+class SQLiteCursor:
+    """Cursor con la interfaz que usan los repositorios (paramstyle %s)"""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, params=()):
+        self._cursor.execute(_traducir_parametros(query), tuple(params))
+        return self
+
+    def executemany(self, query: str, filas):
+        self._cursor.executemany(_traducir_parametros(query), [tuple(f) for f in filas])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Adaptador de sqlite3 con la interfaz de conexión de mysql-connector
+    que usan los repositorios y el pool"""
+
+    dialecto = SQLITE
+
+    def __init__(self, conexion: sqlite3.Connection):
+        self._conexion = conexion
+
+    def cursor(self, *args, **kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self._conexion.cursor())
+
+    def commit(self) -> None:
+        self._conexion.commit()
+
+    def rollback(self) -> None:
+        self._conexion.rollback()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conexion.in_transaction
+
+    def ping(self, reconnect: bool = False, attempts: int = 1, delay: int = 0) -> None:
+        # Un fichero local no se "cae": basta con comprobar que sigue abierto
+        self._conexion.execute("SELECT 1")
+
+    def is_connected(self) -> bool:
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self) -> None:
+        self._conexion.close()
+
+
+def _traducir_parametros(query: str) -> str:
+    return query.replace("%s", "?").replace("%%", "%")
+
+
+def crear_conexion_sqlite() -> SQLiteConnection:
+    if SQLITE_PATH == ":memory:":
+        # Memoria compartida entre todas las conexiones del pool
+        conexion = sqlite3.connect("file:museo_memoria?mode=memory&cache=shared", uri=True,
+                                   check_same_thread=False, cached_statements=SENTENCIAS_PREPARADAS_MAXIMO)
+    elif SQLITE_READONLY:
+        conexion = sqlite3.connect(f"file:{SQLITE_PATH}?mode=ro", uri=True, check_same_thread=False,
+                                   cached_statements=SENTENCIAS_PREPARADAS_MAXIMO)
+    else:
+        conexion = sqlite3.connect(SQLITE_PATH, check_same_thread=False,
+                                   cached_statements=SENTENCIAS_PREPARADAS_MAXIMO)
+    conexion.execute("PRAGMA foreign_keys = ON")
+    conexion.execute("PRAGMA busy_timeout = 5000")
+    if SQLITE_PATH != ":memory:" and not SQLITE_READONLY:
+        conexion.execute("PRAGMA journal_mode = WAL")
+    return SQLiteConnection(conexion)
+
+
+# =====================================================
+# TRADUCCIÓN DEL ESQUEMA MYSQL
+# =====================================================
+def preparar_base_de_datos(db: SQLiteConnection) -> None:
+    """Aplica los scripts de sql/ traducidos a SQLite. Es idempotente."""
+    if SQLITE_READONLY:
+        return
+    for nombre in ESQUEMA_SQL:
+        aplicar_script(db, (SQL_DIR / nombre).read_text(encoding="utf-8"))
+    db.commit()
+
+
+def aplicar_script(db: SQLiteConnection, script: str) -> None:
+    for sentencia in _dividir_sentencias(script):
+        for traducida in _traducir_sentencia(db, sentencia):
+            db._conexion.execute(traducida)
+
+
+def _dividir_sentencias(script: str) -> list:
+    """Separa por ';' respetando las comillas y quitando los comentarios --"""
+    sentencias, actual, en_comillas = [], [], False
+    for linea in script.splitlines():
+        if not en_comillas and linea.strip().startswith("--"):
+            continue
+        for caracter in linea:
+            if caracter == "'":
+                en_comillas = not en_comillas
+            if caracter == ";" and not en_comillas:
+                sentencias.append("".join(actual).strip())
+                actual = []
+            else:
+                actual.append(caracter)
+        actual.append("\n")
+    resto = "".join(actual).strip()
+    if resto:
+        sentencias.append(resto)
+    return [s for s in sentencias if s]
+
+
+_RE_SQL_DINAMICO = re.compile(r"^SET\s+@\w+\s*:=\s*IF\(\s*@\w+\s*=\s*0\s*,\s*'((?:[^']|'')*)'\s*,\s*'DO 1'\s*\)$",
+                              re.I | re.S)
+
+
+def _traducir_sentencia(db: SQLiteConnection, sentencia: str) -> list:
+    """Devuelve las sentencias SQLite equivalentes (puede ser ninguna)"""
+    primera = sentencia.split(None, 1)[0].upper()
+
+    # Las migraciones condicionales usan SET @sql := IF(@existe = 0, 'ALTER ...', 'DO 1')
+    dinamica = _RE_SQL_DINAMICO.match(sentencia)
+    if dinamica:
+        return _traducir_sentencia(db, dinamica.group(1).replace("''", "'"))
+
+    if primera in ("USE", "SET", "PREPARE", "EXECUTE", "DEALLOCATE"):
+        return []
+    if re.match(r"CREATE\s+TABLE", sentencia, re.I):
+        return _traducir_create_table(sentencia)
+    if re.match(r"ALTER\s+TABLE", sentencia, re.I):
+        return _traducir_alter_table(db, sentencia)
+    if re.match(r"CREATE\s+INDEX", sentencia, re.I):
+        m = re.match(r"CREATE\s+INDEX\s+(\w+)\s+ON\s+(\w+)\s*\((.*)\)", sentencia, re.I | re.S)
+        return [f"CREATE INDEX IF NOT EXISTS {m.group(2)}_{m.group(1)} ON {m.group(2)} ({m.group(3)})"]
+    if primera == "INSERT":
+        sentencia = re.sub(r"\s+ON\s+DUPLICATE\s+KEY\s+UPDATE\s+.*$", "", sentencia, flags=re.I | re.S)
+        return [re.sub(r"^INSERT\s+INTO", "INSERT OR IGNORE INTO", sentencia, flags=re.I)]
+    return [sentencia]
+
+
+def _limpiar_columna(definicion: str) -> str:
+    definicion = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT",
+                        definicion, flags=re.I)
+    definicion = re.sub(r"\s+COMMENT\s+'(?:[^']|'')*'", "", definicion, flags=re.I)
+    definicion = re.sub(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP", "", definicion, flags=re.I)
+    definicion = re.sub(r"\bENUM\s*\([^)]*\)", "TEXT", definicion, flags=re.I)
+    return definicion
+
+
+def _dividir_columnas(cuerpo: str) -> list:
+    """Separa las definiciones de CREATE TABLE por comas de primer nivel (fuera de comillas)"""
+    partes, actual, nivel, en_comillas = [], [], 0, False
+    for caracter in cuerpo:
+        if caracter == "'":
+            en_comillas = not en_comillas
+        elif caracter == "(" and not en_comillas:
+            nivel += 1
+        elif caracter == ")" and not en_comillas:
+            nivel -= 1
+        if caracter == "," and nivel == 0 and not en_comillas:
+            partes.append("".join(actual).strip())
+            actual = []
+        else:
+            actual.append(caracter)
+    partes.append("".join(actual).strip())
+    return [p for p in partes if p]
+
+
+def _traducir_create_table(sentencia: str) -> list:
+    m = re.match(r"CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)\s*$", sentencia, re.I | re.S)
+    tabla = m.group(2)
+    columnas, indices = [], []
+    for definicion in _dividir_columnas(m.group(3)):
+        indice = re.match(r"(?:INDEX|KEY)\s+(\w+)\s*\((.*)\)$", definicion, re.I | re.S)
+        unica = re.match(r"UNIQUE\s+KEY\s+\w+\s*(\(.*\))$", definicion, re.I | re.S)
+        if indice:
+            indices.append(f"CREATE INDEX IF NOT EXISTS {tabla}_{indice.group(1)} ON {tabla} ({indice.group(2)})")
+        elif unica:
+            columnas.append(f"UNIQUE {unica.group(1)}")
+        else:
+            columnas.append(_limpiar_columna(definicion))
+    crear = f"CREATE TABLE IF NOT EXISTS {tabla} (\n    " + ",\n    ".join(columnas) + "\n)"
+    return [crear] + indices
+
+
+def _columnas_tabla(db: SQLiteConnection, tabla: str) -> set:
+    return {fila[1] for fila in db._conexion.execute(f"PRAGMA table_info({tabla})")}
+
+
+def _traducir_alter_table(db: SQLiteConnection, sentencia: str) -> list:
+    m = re.match(r"ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)\s+(.*)$", sentencia, re.I | re.S)
+    if not m:
+        raise ValueError(f"ALTER TABLE no soportado en SQLite: {sentencia}")
+    tabla, columna, definicion = m.groups()
+    # SQLite no tiene ADD COLUMN IF NOT EXISTS: lo comprobamos antes
+    if columna in _columnas_tabla(db, tabla):
+        return []
+    return [f"ALTER TABLE {tabla} ADD COLUMN {columna} {_limpiar_columna(definicion)}"]
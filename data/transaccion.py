@@ -0,0 +1,80 @@
+from contextlib import asynccontextmanager, contextmanager
+
+from data.executor import run_db
+
+# Atributo de la conexión con lo pendiente de ejecutar tras el commit; existe solo
+# mientras hay una transacción abierta con transaccion() o transaccion_async()
+_PENDIENTES = "_al_confirmar"
+
+
+def en_transaccion(db) -> bool:
+    return getattr(db, _PENDIENTES, None) is not None
+
+
+def confirmar(db) -> None:
+    """Lo que llaman los repositorios en lugar de db.commit(): dentro de una transacción no
+    hace nada (confirma quien la abrió, una sola vez); fuera, confirma ya"""
+    if not en_transaccion(db):
+        db.commit()
+
+
+async def confirmar_async(db) -> None:
+    if not en_transaccion(db):
+        await db.commit()
+
+
+def al_confirmar(db, accion) -> None:
+    """Ejecuta accion() cuando los cambios ya se ven en la BD: al confirmar la transacción
+    abierta, o ahora si no hay ninguna. Es para invalidar cachés e índices: si se hiciera
+    antes del commit, otra petición podría volver a guardar los datos viejos."""
+    pendientes = getattr(db, _PENDIENTES, None)
+    if pendientes is None:
+        accion()
+    else:
+        pendientes.append(accion)
+
+
+def _ejecutar(pendientes: list) -> None:
+    for accion in pendientes:
+        accion()
+
+
+@contextmanager
+def transaccion(db):
+    """Unidad de trabajo: with transaccion(db): ...varias llamadas a repositorios...
+    Un solo commit al salir, o rollback si hay una excepción (y entonces no se invalida nada).
+    Una transacción dentro de otra se suma a la de fuera."""
+    if en_transaccion(db):
+        yield db
+        return
+    setattr(db, _PENDIENTES, [])
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        pendientes = getattr(db, _PENDIENTES)
+        setattr(db, _PENDIENTES, None)
+    _ejecutar(pendientes)
+
+
+@asynccontextmanager
+async def transaccion_async(db):
+    """transaccion() para los routers: async with transaccion_async(db): ...
+    Con el backend síncrono el commit y el rollback van al executor de BD, como las consultas"""
+    if en_transaccion(db):
+        yield db
+        return
+    setattr(db, _PENDIENTES, [])
+    try:
+        yield db
+        await run_db(db.commit)
+    except BaseException:
+        await run_db(db.rollback)
+        raise
+    finally:
+        pendientes = getattr(db, _PENDIENTES)
+        setattr(db, _PENDIENTES, None)
+    _ejecutar(pendientes)
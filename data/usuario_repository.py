@@ -1,112 +1,188 @@
-from domain.model.Usuario import Usuario
-import bcrypt
-
-
-class UsuarioRepository:
-
-    def get_by_username(self, db, username: str) -> Usuario:
-        """Obtiene un usuario por su nombre de usuario"""
-        cursor = db.cursor()
-        cursor.execute("SELECT id, username, password_hash, email, rol, activo FROM usuarios WHERE username = %s", (username,))
-        usuario_db = cursor.fetchone()
-        cursor.close()
-        
-        if usuario_db:
-            return Usuario(usuario_db[0], usuario_db[1], usuario_db[2], usuario_db[3], usuario_db[4], usuario_db[5])
-        return None
-
-    def get_by_id(self, db, user_id: int) -> Usuario:
-        """Obtiene un usuario por su ID"""
-        cursor = db.cursor()
-        cursor.execute("SELECT id, username, password_hash, email, rol, activo FROM usuarios WHERE id = %s", (user_id,))
-        usuario_db = cursor.fetchone()
-        cursor.close()
-        
-        if usuario_db:
-            return Usuario(usuario_db[0], usuario_db[1], usuario_db[2], usuario_db[3], usuario_db[4], usuario_db[5])
-        return None
-
-    def get_all(self, db) -> list[Usuario]:
-        """Obtiene todos los usuarios"""
-        cursor = db.cursor()
-        cursor.execute("SELECT id, username, password_hash, email, rol, activo FROM usuarios")
-        usuarios_en_db = cursor.fetchall()
-        usuarios: list[Usuario] = list()
-        
-        for usuario in usuarios_en_db:
-            usuario_obj = Usuario(usuario[0], usuario[1], usuario[2], usuario[3], usuario[4], usuario[5])
-            usuarios.append(usuario_obj)
-        cursor.close()
-        
-        return usuarios
-
-    def insertar_usuario(self, db, username: str, password: str, email: str = None, rol: str = "usuario") -> None:
-        """Inserta un nuevo usuario con contraseña hasheada"""
-        cursor = db.cursor()
-        
-        # Hashear la contraseña con bcrypt
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        
-        cursor.execute(
-            "INSERT INTO usuarios (username, password_hash, email, rol) VALUES (%s, %s, %s, %s)",
-            (username, password_hash, email, rol)
-        )
-        
-        db.commit()
-        cursor.close()
-
-    def verificar_password(self, password: str, password_hash: str) -> bool:
-        """Verifica si la contraseña coincide con el hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), bytes(password_hash))
-
-    def actualizar_password(self, db, user_id: int, nueva_password: str) -> None:
-        """Actualiza la contraseña de un usuario"""
-        cursor = db.cursor()
-        
-        # Hashear la nueva contraseña
-        password_hash = bcrypt.hashpw(nueva_password.encode('utf-8'), bcrypt.gensalt())
-        
-        cursor.execute(
-            "UPDATE usuarios SET password_hash = %s WHERE id = %s",
-            (password_hash, user_id)
-        )
-        
-        db.commit()
-        cursor.close()
-
-    def actualizar_rol(self, db, user_id: int, nuevo_rol: str) -> None:
-        """Actualiza el rol de un usuario"""
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE usuarios SET rol = %s WHERE id = %s",
-            (nuevo_rol, user_id)
-        )
-        db.commit()
-        cursor.close()
-
-    def actualizar_estado(self, db, user_id: int, activo: bool) -> None:
-        """Activa o desactiva un usuario"""
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE usuarios SET activo = %s WHERE id = %s",
-            (activo, user_id)
-        )
-        db.commit()
-        cursor.close()
-
-    def actualizar_usuario(self, db, user_id: int, username: str, email: str = None, rol: str = "usuario", activo: bool = True) -> None:
-        """Actualiza datos básicos del usuario"""
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE usuarios SET username = %s, email = %s, rol = %s, activo = %s WHERE id = %s",
-            (username, email, rol, activo, user_id)
-        )
-        db.commit()
-        cursor.close()
-
-    def borrar_usuario(self, db, user_id: int) -> None:
-        """Elimina un usuario"""
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
-        db.commit()
-        cursor.close()
+from typing import Optional
+from domain.model.Usuario import Usuario
+from data.mapeo import mapeador
+from data.cache import estado_usuarios, paginas
+from data.sentencias import consultar_uno
+from data.transaccion import al_confirmar, confirmar, confirmar_async
+from data.paginacion import Cursor, Pagina, TAMANO_PAGINA, construir_pagina, sql_pagina
+
+
+_SELECT_USUARIO = "SELECT id, username, password_hash, email, rol, activo FROM usuarios"
+_SQL_GET_BY_USERNAME = _SELECT_USUARIO + " WHERE username = %s"
+_SQL_GET_BY_ID = _SELECT_USUARIO + " WHERE id = %s"
+_SQL_INSERTAR = "INSERT INTO usuarios (username, password_hash, email, rol) VALUES (%s, %s, %s, %s)"
+_SQL_ACTUALIZAR_PASSWORD = "UPDATE usuarios SET password_hash = %s WHERE id = %s"
+_SQL_ACTUALIZAR_ROL = "UPDATE usuarios SET rol = %s WHERE id = %s"
+_SQL_ACTUALIZAR_ESTADO = "UPDATE usuarios SET activo = %s WHERE id = %s"
+_SQL_ACTUALIZAR = "UPDATE usuarios SET username = %s, email = %s, rol = %s, activo = %s WHERE id = %s"
+
+
+def _a_bytes(password_hash) -> bytes:
+    if isinstance(password_hash, str):
+        # Con sentencias preparadas mysql-connector devuelve el VARBINARY como texto
+        return password_hash.encode("utf-8")
+    return password_hash
+
+
+_a_usuario = mapeador(Usuario, ("id", "username", "password_hash", "email", "rol", "activo"),
+                      conversiones={"password_hash": _a_bytes})
+
+
+def _invalidar(user_id: int) -> None:
+    # La sesión del usuario debe ver el cambio en su siguiente petición
+    estado_usuarios.invalidar(user_id)
+    paginas.invalidar_etiquetas("usuarios")
+
+
+class UsuarioRepository:
+
+    def get_by_username(self, db, username: str) -> Usuario:
+        """Obtiene un usuario por su nombre de usuario"""
+        usuario_db = consultar_uno(db, _SQL_GET_BY_USERNAME, (username,))
+
+        if usuario_db:
+            return _a_usuario(usuario_db)
+        return None
+
+    def get_by_id(self, db, user_id: int) -> Usuario:
+        """Obtiene un usuario por su ID"""
+        usuario_db = consultar_uno(db, _SQL_GET_BY_ID, (user_id,))
+
+        if usuario_db:
+            return _a_usuario(usuario_db)
+        return None
+
+    def get_all(self, db) -> list[Usuario]:
+        """Obtiene todos los usuarios"""
+        cursor = db.cursor()
+        cursor.execute(_SELECT_USUARIO)
+        usuarios_en_db = cursor.fetchall()
+        usuarios: list[Usuario] = list()
+        
+        for usuario in usuarios_en_db:
+            usuarios.append(_a_usuario(usuario))
+        cursor.close()
+        
+        return usuarios
+
+    def get_pagina(self, db, desde: Optional[Cursor] = None, tamano: int = TAMANO_PAGINA,
+                   con_total: bool = True) -> Pagina:
+        """Una página de usuarios ordenados por (username, id)"""
+        query, params = sql_pagina(_SELECT_USUARIO, " WHERE 1=1", [], desde, tamano, columna="username")
+        cursor = db.cursor()
+        cursor.execute(query, params)
+        usuarios = [_a_usuario(usuario) for usuario in cursor.fetchall()]
+        total = None
+        if con_total:
+            cursor.execute("SELECT COUNT(*) FROM usuarios")
+            total = cursor.fetchone()[0]
+        cursor.close()
+        return construir_pagina(usuarios, desde, tamano, lambda usuario: usuario.username, total)
+
+    def insertar_usuario(self, db, username: str, password_hash: bytes, email: str = None, rol: str = "usuario") -> None:
+        """Inserta un nuevo usuario. La contraseña llega ya hasheada (utils/contrasenas.py)"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_INSERTAR, (username, password_hash, email, rol))
+        
+        confirmar(db)
+        cursor.close()
+
+    def actualizar_password(self, db, user_id: int, password_hash: bytes) -> None:
+        """Actualiza la contraseña de un usuario (ya hasheada)"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR_PASSWORD, (password_hash, user_id))
+        
+        confirmar(db)
+        cursor.close()
+
+    def actualizar_rol(self, db, user_id: int, nuevo_rol: str) -> None:
+        """Actualiza el rol de un usuario"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR_ROL, (nuevo_rol, user_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    def actualizar_estado(self, db, user_id: int, activo: bool) -> None:
+        """Activa o desactiva un usuario"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR_ESTADO, (activo, user_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    def actualizar_usuario(self, db, user_id: int, username: str, email: str = None, rol: str = "usuario", activo: bool = True) -> None:
+        """Actualiza datos básicos del usuario"""
+        cursor = db.cursor()
+        cursor.execute(_SQL_ACTUALIZAR, (username, email, rol, activo, user_id))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    def borrar_usuario(self, db, user_id: int) -> None:
+        """Elimina un usuario"""
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
+        confirmar(db)
+        cursor.close()
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+
+class AsyncUsuarioRepository:
+    """Misma interfaz que UsuarioRepository sobre una conexión aiomysql"""
+
+    async def _uno(self, db, query: str, params: tuple) -> Usuario:
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            usuario_db = await cursor.fetchone()
+        return _a_usuario(usuario_db) if usuario_db else None
+
+    async def _ejecutar(self, db, query: str, params: tuple) -> None:
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            await confirmar_async(db)
+
+    async def get_by_username(self, db, username: str) -> Usuario:
+        return await self._uno(db, _SQL_GET_BY_USERNAME, (username,))
+
+    async def get_by_id(self, db, user_id: int) -> Usuario:
+        return await self._uno(db, _SQL_GET_BY_ID, (user_id,))
+
+    async def get_all(self, db) -> list[Usuario]:
+        async with db.cursor() as cursor:
+            await cursor.execute(_SELECT_USUARIO)
+            return [_a_usuario(usuario) for usuario in await cursor.fetchall()]
+
+    async def get_pagina(self, db, desde: Optional[Cursor] = None, tamano: int = TAMANO_PAGINA,
+                         con_total: bool = True) -> Pagina:
+        query, params = sql_pagina(_SELECT_USUARIO, " WHERE 1=1", [], desde, tamano, columna="username")
+        total = None
+        async with db.cursor() as cursor:
+            await cursor.execute(query, params)
+            usuarios = [_a_usuario(usuario) for usuario in await cursor.fetchall()]
+            if con_total:
+                await cursor.execute("SELECT COUNT(*) FROM usuarios")
+                total = (await cursor.fetchone())[0]
+        return construir_pagina(usuarios, desde, tamano, lambda usuario: usuario.username, total)
+
+    async def insertar_usuario(self, db, username: str, password_hash: bytes, email: str = None, rol: str = "usuario") -> None:
+        await self._ejecutar(db, _SQL_INSERTAR, (username, password_hash, email, rol))
+
+    async def actualizar_password(self, db, user_id: int, password_hash: bytes) -> None:
+        await self._ejecutar(db, _SQL_ACTUALIZAR_PASSWORD, (password_hash, user_id))
+
+    async def actualizar_rol(self, db, user_id: int, nuevo_rol: str) -> None:
+        await self._ejecutar(db, _SQL_ACTUALIZAR_ROL, (nuevo_rol, user_id))
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    async def actualizar_estado(self, db, user_id: int, activo: bool) -> None:
+        await self._ejecutar(db, _SQL_ACTUALIZAR_ESTADO, (activo, user_id))
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    async def actualizar_usuario(self, db, user_id: int, username: str, email: str = None, rol: str = "usuario", activo: bool = True) -> None:
+        await self._ejecutar(db, _SQL_ACTUALIZAR, (username, email, rol, activo, user_id))
+        al_confirmar(db, lambda: _invalidar(user_id))
+
+    async def borrar_usuario(self, db, user_id: int) -> None:
+        await self._ejecutar(db, "DELETE FROM usuarios WHERE id = %s", (user_id,))
+        al_confirmar(db, lambda: _invalidar(user_id))
@@ -1,18 +1,24 @@
-class Dinosaurio:
-    def __init__(self, id: int, nombre: str, descripcion: str = None, tipo: str = None, 
-                 peso_kg: float = None, altura_metros: float = None, longitud_metros: float = None,
-                 dieta: str = None, era_id: int = None, region_id: int = None, creador_id: int = None,
-                 imagen: str = None):
-        self.id = id
-        self.nombre = nombre
-        self.descripcion = descripcion
-        self.tipo = tipo
-        self.peso_kg = peso_kg
-        self.altura_metros = altura_metros
-        self.longitud_metros = longitud_metros
-        self.dieta = dieta
-        self.era_id = era_id
-        self.region_id = region_id
-        self.creador_id = creador_id
-        self.imagen = imagen
-        self.habitats = []  # Lista de habitats asociados
+class Dinosaurio:
+    # Sin __dict__ por objeto: ocupa mucho menos en los listados grandes. Los atributos que no
+    # asigna __init__ solo existen cuando se cargan (era y region) o en resultados de búsqueda
+    __slots__ = ("id", "nombre", "descripcion", "tipo", "peso_kg", "altura_metros", "longitud_metros",
+                 "dieta", "era_id", "region_id", "creador_id", "imagen", "habitats",
+                 "era", "region", "relevancia", "nombre_resaltado", "fragmento")
+
+    def __init__(self, id: int, nombre: str, descripcion: str = None, tipo: str = None, 
+                 peso_kg: float = None, altura_metros: float = None, longitud_metros: float = None,
+                 dieta: str = None, era_id: int = None, region_id: int = None, creador_id: int = None,
+                 imagen: str = None):
+        self.id = id
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.tipo = tipo
+        self.peso_kg = peso_kg
+        self.altura_metros = altura_metros
+        self.longitud_metros = longitud_metros
+        self.dieta = dieta
+        self.era_id = era_id
+        self.region_id = region_id
+        self.creador_id = creador_id
+        self.imagen = imagen
+        self.habitats = []  # Lista de habitats asociados
@@ -1,8 +1,12 @@
-class Habitat:
-    def __init__(self, id: int, nombre: str, tipo_ambiente: str = None, descripcion: str = None,
-                 imagen: str = None):
-        self.id = id
-        self.nombre = nombre
-        self.tipo_ambiente = tipo_ambiente
-        self.descripcion = descripcion
-        self.imagen = imagen
+class Habitat:
+    __slots__ = ("id", "nombre", "tipo_ambiente", "descripcion", "imagen",
+                 # Solo en resultados de búsqueda
+                 "relevancia", "nombre_resaltado", "fragmento")
+
+    def __init__(self, id: int, nombre: str, tipo_ambiente: str = None, descripcion: str = None,
+                 imagen: str = None):
+        self.id = id
+        self.nombre = nombre
+        self.tipo_ambiente = tipo_ambiente
+        self.descripcion = descripcion
+        self.imagen = imagen
@@ -1,189 +1,243 @@
-from typing import Annotated
-from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
-from typing import Optional
-from data.database import database
-from data.dinosaurio_repository import DinosaurioRepository
-from domain.model.Dinosaurio import Dinosaurio
-from utils.dependencies import require_auth, require_auth_admin
-from routers import auth_router, dinosaurios_router, eras_router, regiones_router, habitats_router, usuarios_router, comentarios_router
-import uvicorn
-
-# Crear la aplicación FastAPI
-app = FastAPI(
-    title="🦖 Museo de Dinosaurios - AUTO-UPDATE FUNCIONANDO ✅", 
-    description="Sistema de gestión de dinosaurios con CI/CD completo",
-    version="2.0.0"
-)
-
-# ⭐ IMPORTANTE: Agregar el middleware de sesiones
-app.add_middleware(
-    SessionMiddleware,
-    secret_key="tu_clave_secreta_muy_segura_cambiala_en_produccion",
-    session_cookie="session",
-    max_age=3600 * 24 * 7,  # 7 días
-    same_site="lax",
-    https_only=False  # Cambiar a True en producción con HTTPS
-)
-
-# Configurar las plantillas
-templates = Jinja2Templates(directory="template")
-
-# Configurar archivos estáticos
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-# Incluir los routers
-app.include_router(auth_router.router)
-app.include_router(dinosaurios_router.router)
-app.include_router(eras_router.router)
-app.include_router(regiones_router.router)
-app.include_router(habitats_router.router)
-app.include_router(usuarios_router.router)
-app.include_router(comentarios_router.router)
-
-#RUTA RAIZ
-@app.get("/")
-async def inicio(request: Request, usuario: dict = Depends(require_auth)):
-    """Página de inicio - Requiere autenticación"""
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "usuario": usuario
-    })
-
-# RUTA INSERTAR
-@app.get("/insert_dinosaurios")
-async def insert_dinosaurios(request: Request, usuario: dict = Depends(require_auth_admin)):
-    """Formulario para insertar dinosaurio - Solo admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    return templates.TemplateResponse("insert_dinosaurios.html", {
-        "request": request,
-        "usuario": usuario
-    })
-
-# RUTA INSERTAR
-@app.post("/do_insertar_dinosaurio")
-async def do_insertar_dinosaurios(
-    request: Request,
-    nombre: Annotated[str, Form()] = None,
-    usuario: dict = Depends(require_auth)
-):
-    """Inserta un dinosaurio - Requiere autenticación admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    dinosaurios_repo = DinosaurioRepository()
-    dinosaurio = Dinosaurio(0, nombre)
-    dinosaurios_repo.insertar_dinosaurio(database, dinosaurio)
-
-    return templates.TemplateResponse("do_insert_dinosaurios.html", {
-        "request": request,
-        "usuario": usuario
-    })
-
-
-# RUTA ACTUALIZAR
-@app.get("/actualizar")
-async def actualizar_dinosaurios(request: Request, usuario: dict = Depends(require_auth)):
-    """Mostrar formulario para actualizar un dinosaurio - Solo admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    dinosaurios_repo = DinosaurioRepository()
-    dinosaurios = dinosaurios_repo.get_all(database)
-
-    return templates.TemplateResponse("actualizar_dinosaurios.html", {
-        "request": request,
-        "dinosaurios": dinosaurios,
-        "usuario": usuario
-    })
-
-
-@app.post("/do_actualizar_dinosaurio")
-async def do_actualizar_dinosaurio(
-    request: Request,
-    id: Annotated[str, Form()],
-    nombre: Annotated[str, Form()] = None,
-    usuario: dict = Depends(require_auth)
-):
-    """Procesar actualización - Solo admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    dinosaurios_repo = DinosaurioRepository()
-    dinosaurio = Dinosaurio(int(id), nombre)
-    dinosaurios_repo.actualizar_dinosaurio(database, dinosaurio)
-
-    return templates.TemplateResponse("do_actualizar_dinosaurio.html", {
-        "request": request,
-        "usuario": usuario
-    })
-
-
-# RUTA Borrar
-@app.get("/borrar")
-async def borrar_dinosaurios(request: Request, usuario: dict = Depends(require_auth)):
-    """Formulario para borrar dinosaurios - Solo admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    dinosaurios_repo = DinosaurioRepository()
-    dinosaurios = dinosaurios_repo.get_all(database)
-
-    return templates.TemplateResponse("borrar_dinosaurios.html", {
-        "request": request,
-        "dinosaurios": dinosaurios,
-        "usuario": usuario
-    })
-
-
-# RUTA BORRAR
-@app.post("/do_borrar_dinosaurio")
-async def do_borrar_dinosaurio(
-    request: Request,
-    id: Annotated[str, Form()],
-    usuario: dict = Depends(require_auth)
-):
-    """Borra un dinosaurio - Solo admin"""
-    if usuario.get("username") != "admin":
-        return templates.TemplateResponse("403.html", {
-            "request": request,
-            "usuario": usuario
-        })
-    
-    dinosaurios_repo = DinosaurioRepository()
-    dinosaurios_repo.borrar_dinosaurio(database, int(id))
-
-    return templates.TemplateResponse("do_borrar_dinosaurios.html", {
-        "request": request,
-        "usuario": usuario
-    })
-
-
-# RUTAS GET - Nota: Las rutas de dinosaurios, eras, regiones y habitats
-# están implementadas en sus respectivos routers (dinosaurios_router.py, etc.)
-
-
-
-if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+from typing import Annotated
+from fastapi import FastAPI, Request, Form, Depends
+from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.templating import Jinja2Templates
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.sessions import SessionMiddleware
+from typing import Optional
+from contextlib import asynccontextmanager
+from data import backend
+from data.buffer_votos import buffer_votos
+from data.busqueda import buscador
+from data.cache import estado_usuarios, paginas, referencia
+from data.facetas import facetas
+from data.dinosaurio_repository import DinosaurioRepository
+from domain.model.Dinosaurio import Dinosaurio
+from data.backend import repositorio
+from data.executor import run_db
+from utils.dependencies import require_auth, require_auth_admin, get_db
+from utils.imagenes import UPLOADS_DIR, UPLOADS_URL, ImagenesEstaticas, LimiteSubidas
+from utils.miniaturas import miniaturas
+from utils.contrasenas import contrasenas
+from routers import auth_router, dinosaurios_router, eras_router, regiones_router, habitats_router, usuarios_router, comentarios_router, api_router
+import uvicorn
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y parada de la aplicación"""
+    # Abrir las conexiones mínimas del pool (si la BD no responde, se reintentará al usarla)
+    try:
+        await backend.iniciar()
+    except Exception as e:
+        print(f"⚠️ No se pudo precalentar el pool de conexiones: {e}")
+    buffer_votos.iniciar()
+    yield
+    # Escribir los votos pendientes antes de cerrar las conexiones
+    await buffer_votos.detener()
+    await backend.cerrar()
+    # Espera a que terminen las miniaturas en curso
+    miniaturas.cerrar()
+    contrasenas.cerrar()
+
+
+# Crear la aplicación FastAPI
+app = FastAPI(
+    title="🦖 Museo de Dinosaurios - AUTO-UPDATE FUNCIONANDO ✅", 
+    description="Sistema de gestión de dinosaurios con CI/CD completo",
+    version="2.0.0",
+    lifespan=lifespan
+)
+
+# ⭐ IMPORTANTE: Agregar el middleware de sesiones
+app.add_middleware(
+    SessionMiddleware,
+    secret_key="tu_clave_secreta_muy_segura_cambiala_en_produccion",
+    session_cookie="session",
+    max_age=3600 * 24 * 7,  # 7 días
+    same_site="lax",
+    https_only=False  # Cambiar a True en producción con HTTPS
+)
+
+# Corta las subidas demasiado grandes antes de leerlas (los límites por tipo de imagen están en utils/imagenes.py)
+app.add_middleware(LimiteSubidas)
+
+# Configurar las plantillas
+templates = Jinja2Templates(directory="template")
+
+# Configurar archivos estáticos
+app.mount("/static", StaticFiles(directory="static"), name="static")
+# Imágenes subidas: las de nombre con hash se cachean como inmutables (ver utils/imagenes.py)
+app.mount(UPLOADS_URL, ImagenesEstaticas(directory=UPLOADS_DIR), name="uploads")
+
+# Incluir los routers
+app.include_router(auth_router.router)
+app.include_router(dinosaurios_router.router)
+app.include_router(eras_router.router)
+app.include_router(regiones_router.router)
+app.include_router(habitats_router.router)
+app.include_router(usuarios_router.router)
+app.include_router(comentarios_router.router)
+app.include_router(api_router.router)
+
+#RUTA RAIZ
+@app.get("/")
+async def inicio(request: Request, usuario: dict = Depends(require_auth)):
+    """Página de inicio - Requiere autenticación"""
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "usuario": usuario
+    })
+
+# RUTA INSERTAR
+@app.get("/insert_dinosaurios")
+async def insert_dinosaurios(request: Request, usuario: dict = Depends(require_auth_admin)):
+    """Formulario para insertar dinosaurio - Solo admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    return templates.TemplateResponse("insert_dinosaurios.html", {
+        "request": request,
+        "usuario": usuario
+    })
+
+# RUTA INSERTAR
+@app.post("/do_insertar_dinosaurio")
+async def do_insertar_dinosaurios(
+    request: Request,
+    nombre: Annotated[str, Form()] = None,
+    db=Depends(get_db),
+    usuario: dict = Depends(require_auth)
+):
+    """Inserta un dinosaurio - Requiere autenticación admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    dinosaurios_repo = repositorio(DinosaurioRepository)
+    dinosaurio = Dinosaurio(0, nombre)
+    await run_db(dinosaurios_repo.insertar_dinosaurio, db, dinosaurio)
+
+    return templates.TemplateResponse("do_insert_dinosaurios.html", {
+        "request": request,
+        "usuario": usuario
+    })
+
+
+# RUTA ACTUALIZAR
+@app.get("/actualizar")
+async def actualizar_dinosaurios(request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth)):
+    """Mostrar formulario para actualizar un dinosaurio - Solo admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    dinosaurios_repo = repositorio(DinosaurioRepository)
+    dinosaurios = await run_db(dinosaurios_repo.get_all, db)
+
+    return templates.TemplateResponse("actualizar_dinosaurios.html", {
+        "request": request,
+        "dinosaurios": dinosaurios,
+        "usuario": usuario
+    })
+
+
+@app.post("/do_actualizar_dinosaurio")
+async def do_actualizar_dinosaurio(
+    request: Request,
+    id: Annotated[str, Form()],
+    nombre: Annotated[str, Form()] = None,
+    db=Depends(get_db),
+    usuario: dict = Depends(require_auth)
+):
+    """Procesar actualización - Solo admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    dinosaurios_repo = repositorio(DinosaurioRepository)
+    dinosaurio = Dinosaurio(int(id), nombre)
+    await run_db(dinosaurios_repo.actualizar_dinosaurio, db, dinosaurio)
+
+    return templates.TemplateResponse("do_actualizar_dinosaurio.html", {
+        "request": request,
+        "usuario": usuario
+    })
+
+
+# RUTA Borrar
+@app.get("/borrar")
+async def borrar_dinosaurios(request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth)):
+    """Formulario para borrar dinosaurios - Solo admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    dinosaurios_repo = repositorio(DinosaurioRepository)
+    dinosaurios = await run_db(dinosaurios_repo.get_all, db)
+
+    return templates.TemplateResponse("borrar_dinosaurios.html", {
+        "request": request,
+        "dinosaurios": dinosaurios,
+        "usuario": usuario
+    })
+
+
+# RUTA BORRAR
+@app.post("/do_borrar_dinosaurio")
+async def do_borrar_dinosaurio(
+    request: Request,
+    id: Annotated[str, Form()],
+    db=Depends(get_db),
+    usuario: dict = Depends(require_auth)
+):
+    """Borra un dinosaurio - Solo admin"""
+    if usuario.get("username") != "admin":
+        return templates.TemplateResponse("403.html", {
+            "request": request,
+            "usuario": usuario
+        })
+    
+    dinosaurios_repo = repositorio(DinosaurioRepository)
+    await run_db(dinosaurios_repo.borrar_dinosaurio, db, int(id))
+
+    return templates.TemplateResponse("do_borrar_dinosaurios.html", {
+        "request": request,
+        "usuario": usuario
+    })
+
+
+# RUTA ESTADÍSTICAS
+@app.get("/stats")
+async def estadisticas(usuario: dict = Depends(require_auth_admin)):
+    """Estado del pool de conexiones, del executor de BD, del buffer de votos y de las cachés - Solo admin"""
+    return {
+        **backend.estadisticas(),
+        "votos": buffer_votos.estadisticas(),
+        "cache_usuarios": estado_usuarios.estadisticas(),
+        "cache_referencia": referencia.estadisticas(),
+        "cache_paginas": paginas.estadisticas(),
+        "miniaturas": miniaturas.estadisticas(),
+        "contrasenas": contrasenas.estadisticas(),
+        "busqueda": buscador.estadisticas(),
+        "facetas": facetas.estadisticas()
+    }
+
+
+# RUTAS GET - Nota: Las rutas de dinosaurios, eras, regiones y habitats
+# están implementadas en sus respectivos routers (dinosaurios_router.py, etc.)
+
+
+
+if __name__ == "__main__":
+    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
@@ -1,18 +1,20 @@
-# Routers package
-from . import auth_router
-from . import dinosaurios_router
-from . import eras_router
-from . import regiones_router
-from . import habitats_router
-from . import usuarios_router
-from . import comentarios_router
-
-__all__ = [
-    'auth_router',
-    'dinosaurios_router',
-    'eras_router',
-    'regiones_router',
-    'habitats_router',
-    'usuarios_router',
-    'comentarios_router'
+# Routers package
+from . import auth_router
+from . import dinosaurios_router
+from . import eras_router
+from . import regiones_router
+from . import habitats_router
+from . import usuarios_router
+from . import comentarios_router
+from . import api_router
+
+__all__ = [
+    'auth_router',
+    'dinosaurios_router',
+    'eras_router',
+    'regiones_router',
+    'habitats_router',
+    'usuarios_router',
+    'comentarios_router',
+    'api_router'
 ]
\ No newline at end of file
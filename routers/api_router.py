@@ -0,0 +1,229 @@
+import asyncio
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, Request, Depends, Query, Body, HTTPException, status
+from fastapi.responses import StreamingResponse
+from data.dinosaurio_repository import DinosaurioRepository
+from data.era_repository import EraRepository
+from data.region_repository import RegionRepository
+from data.habitat_repository import HabitatRepository
+from data.comentario_repository import ComentarioRepository
+from data.importacion import IMPORTACION_MAXIMO_MB, ImportadorDinosaurios, formato_de
+from data.backend import repositorio
+from data.buffer_votos import buffer_votos
+from data.executor import run_db
+from utils.dependencies import get_db
+from utils.exportacion import FORMATOS_EXPORTACION, exportar_catalogo
+from utils.paginacion import leer_paginacion
+from utils.api import (a_dict, datos_pagina, leer_campos, require_admin_api, require_auth_api, respuesta_json,
+                       seleccionar)
+
+# API JSON para los kioscos y las apps: mismos repositorios y misma sesión que las páginas.
+# Listados: ?campos=id,nombre,era.nombre &cursor= &tamano= &total=false
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+
+def _no_encontrado(mensaje: str):
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=mensaje)
+
+
+# =====================================================
+# DINOSAURIOS
+# =====================================================
+@router.get("/dinosaurios")
+async def api_listar_dinosaurios(
+    request: Request,
+    db=Depends(get_db),
+    usuario: dict = Depends(require_auth_api),
+    busqueda: Optional[str] = Query(None),
+    era_id: Optional[int] = Query(None),
+    region_id: Optional[int] = Query(None),
+    dieta: Optional[str] = Query(None),
+    habitat_id: Optional[int] = Query(None),
+    campos: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    tamano: Optional[int] = Query(None),
+    total: bool = Query(True)
+):
+    """Dinosaurios por páginas con su era, región y habitats"""
+    dino_repo = repositorio(DinosaurioRepository)
+    desde, tamano = leer_paginacion(cursor, tamano)
+    pagina = await run_db(dino_repo.get_pagina, db, busqueda=busqueda, era_id=era_id, region_id=region_id,
+                          dieta=dieta, habitat_id=habitat_id, desde=desde, tamano=tamano, con_total=total)
+    return respuesta_json(request, datos_pagina(pagina, campos))
+
+
+@router.get("/dinosaurios/facetas")
+async def api_facetas_dinosaurios(
+    request: Request,
+    db=Depends(get_db),
+    usuario: dict = Depends(require_auth_api),
+    busqueda: Optional[str] = Query(None),
+    era_id: Optional[int] = Query(None),
+    region_id: Optional[int] = Query(None),
+    dieta: Optional[str] = Query(None),
+    habitat_id: Optional[int] = Query(None)
+):
+    """Recuentos por era, región, dieta y habitat con los filtros dados"""
+    dino_repo = repositorio(DinosaurioRepository)
+    recuentos = await run_db(dino_repo.contar_facetas, db, busqueda=busqueda, era_id=era_id,
+                             region_id=region_id, dieta=dieta, habitat_id=habitat_id)
+    # Las claves de un objeto JSON son texto: ids como "1"
+    datos = {campo: ({str(valor): n for valor, n in conteos.items()} if isinstance(conteos, dict) else conteos)
+             for campo, conteos in recuentos.items()}
+    return respuesta_json(request, datos)
+
+
+@router.post("/dinosaurios/importar")
+async def api_importar_dinosaurios(request: Request, db=Depends(get_db), usuario: dict = Depends(require_admin_api),
+                                   formato: Optional[str] = Query(None)):
+    """Carga masiva (solo admin). El cuerpo es el fichero tal cual, CSV (Content-Type: text/csv)
+    o JSONL (application/x-ndjson); las eras, regiones y habitats van por nombre.
+    Devuelve cuántas filas se importaron y el error de cada línea que no."""
+    formato = formato or formato_de(request.headers.get("content-type"))
+    if formato not in ("csv", "jsonl"):
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Formato no admitido: envía text/csv o application/x-ndjson")
+    # El cuerpo se vuelca a disco a trozos y el importador lo va leyendo por bloques
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as fichero:
+        recibidos = 0
+        async for trozo in request.stream():
+            recibidos += len(trozo)
+            if recibidos > IMPORTACION_MAXIMO_MB * 1024 * 1024:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"El fichero pasa del máximo de {IMPORTACION_MAXIMO_MB} MB")
+            await asyncio.to_thread(fichero.write, trozo)
+        fichero.seek(0)
+        importador = repositorio(ImportadorDinosaurios)
+        informe = await run_db(importador.importar, db, fichero, formato, usuario.get("id"))
+    return respuesta_json(request, vars(informe))
+
+
+@router.get("/dinosaurios/exportar")
+async def api_exportar_dinosaurios(usuario: dict = Depends(require_admin_api), formato: str = Query("csv")):
+    """Catálogo entero (solo admin) con los nombres de era, región y habitats y el número de
+    comentarios, en CSV o NDJSON. Se envía a medida que se lee: la memoria no depende del tamaño"""
+    if formato not in FORMATOS_EXPORTACION:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"Formato no válido (opciones: {', '.join(FORMATOS_EXPORTACION)})")
+    tipo, _, _ = FORMATOS_EXPORTACION[formato]
+    return StreamingResponse(exportar_catalogo(formato), media_type=tipo, headers={
+        "Content-Disposition": f'attachment; filename="dinosaurios.{formato}"',
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/dinosaurios/{dinosaurio_id}")
+async def api_ver_dinosaurio(dinosaurio_id: int, request: Request, db=Depends(get_db),
+                             usuario: dict = Depends(require_auth_api), campos: Optional[str] = Query(None)):
+    """Un dinosaurio con su era, región y habitats"""
+    dino_repo = repositorio(DinosaurioRepository)
+    era_repo = repositorio(EraRepository)
+    region_repo = repositorio(RegionRepository)
+    habitat_repo = repositorio(HabitatRepository)
+
+    dinosaurio = await run_db(dino_repo.get_by_id, db, dinosaurio_id)
+    if not dinosaurio:
+        _no_encontrado("Dinosaurio no encontrado")
+    dinosaurio.era = await run_db(era_repo.get_by_id, db, dinosaurio.era_id) if dinosaurio.era_id else None
+    dinosaurio.region = await run_db(region_repo.get_by_id, db, dinosaurio.region_id) if dinosaurio.region_id else None
+    dinosaurio.habitats = await run_db(habitat_repo.get_habitats_by_dinosaurio, db, dinosaurio.id)
+    return respuesta_json(request, seleccionar(a_dict(dinosaurio), leer_campos(campos)))
+
+
+@router.get("/dinosaurios/{dinosaurio_id}/comentarios")
+async def api_comentarios_dinosaurio(dinosaurio_id: int, request: Request, db=Depends(get_db),
+                                     usuario: dict = Depends(require_auth_api),
+                                     campos: Optional[str] = Query(None)):
+    """Comentarios de un dinosaurio en árbol, con los votos y el voto del usuario"""
+    comentario_repo = repositorio(ComentarioRepository)
+    comentarios = await run_db(comentario_repo.get_by_dinosaurio, db, dinosaurio_id, usuario.get("id"))
+    buffer_votos.aplicar_pendientes(comentarios, usuario.get("id"))
+    arbol = leer_campos(campos)
+    return respuesta_json(request, {"datos": [seleccionar(a_dict(c), arbol) for c in comentarios]})
+
+
+# =====================================================
+# VOTOS
+# =====================================================
+@router.put("/comentarios/{id}/voto", status_code=status.HTTP_202_ACCEPTED)
+async def api_votar_comentario(id: int, request: Request, usuario: dict = Depends(require_auth_api),
+                               tipo_voto: str = Body(..., embed=True)):
+    """Vota un comentario ({"tipo_voto": "positivo" | "negativo"}). Se escribe en segundo plano."""
+    if tipo_voto not in ['positivo', 'negativo']:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Tipo de voto no válido")
+    buffer_votos.registrar(id, usuario.get("id"), tipo_voto)
+    return respuesta_json(request, {"comentario_id": id, "voto_usuario": tipo_voto}, status.HTTP_202_ACCEPTED)
+
+
+@router.delete("/comentarios/{id}/voto", status_code=status.HTTP_202_ACCEPTED)
+async def api_quitar_voto(id: int, request: Request, usuario: dict = Depends(require_auth_api)):
+    """Quita el voto del usuario en un comentario"""
+    buffer_votos.registrar(id, usuario.get("id"), None)
+    return respuesta_json(request, {"comentario_id": id, "voto_usuario": None}, status.HTTP_202_ACCEPTED)
+
+
+# =====================================================
+# ERAS, REGIONES Y HABITATS
+# =====================================================
+@router.get("/eras")
+async def api_listar_eras(request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth_api),
+                          busqueda: Optional[str] = Query(None), campos: Optional[str] = Query(None),
+                          cursor: Optional[str] = Query(None), tamano: Optional[int] = Query(None),
+                          total: bool = Query(True)):
+    era_repo = repositorio(EraRepository)
+    desde, tamano = leer_paginacion(cursor, tamano)
+    pagina = await run_db(era_repo.get_pagina, db, busqueda=busqueda, desde=desde, tamano=tamano,
+                          con_total=total)
+    return respuesta_json(request, datos_pagina(pagina, campos))
+
+
+@router.get("/eras/{era_id}")
+async def api_ver_era(era_id: int, request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth_api),
+                      campos: Optional[str] = Query(None)):
+    era = await run_db(repositorio(EraRepository).get_by_id, db, era_id)
+    if not era:
+        _no_encontrado("Era no encontrada")
+    return respuesta_json(request, seleccionar(a_dict(era), leer_campos(campos)))
+
+
+@router.get("/regiones")
+async def api_listar_regiones(request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth_api),
+                              busqueda: Optional[str] = Query(None), continente: Optional[str] = Query(None),
+                              campos: Optional[str] = Query(None), cursor: Optional[str] = Query(None),
+                              tamano: Optional[int] = Query(None), total: bool = Query(True)):
+    region_repo = repositorio(RegionRepository)
+    desde, tamano = leer_paginacion(cursor, tamano)
+    pagina = await run_db(region_repo.get_pagina, db, busqueda=busqueda, continente=continente,
+                          desde=desde, tamano=tamano, con_total=total)
+    return respuesta_json(request, datos_pagina(pagina, campos))
+
+
+@router.get("/regiones/{region_id}")
+async def api_ver_region(region_id: int, request: Request, db=Depends(get_db),
+                         usuario: dict = Depends(require_auth_api), campos: Optional[str] = Query(None)):
+    region = await run_db(repositorio(RegionRepository).get_by_id, db, region_id)
+    if not region:
+        _no_encontrado("Región no encontrada")
+    return respuesta_json(request, seleccionar(a_dict(region), leer_campos(campos)))
+
+
+@router.get("/habitats")
+async def api_listar_habitats(request: Request, db=Depends(get_db), usuario: dict = Depends(require_auth_api),
+                              busqueda: Optional[str] = Query(None), tipo_ambiente: Optional[str] = Query(None),
+                              campos: Optional[str] = Query(None), cursor: Optional[str] = Query(None),
+                              tamano: Optional[int] = Query(None), total: bool = Query(True)):
+    habitat_repo = repositorio(HabitatRepository)
+    desde, tamano = leer_paginacion(cursor, tamano)
+    pagina = await run_db(habitat_repo.get_pagina, db, busqueda=busqueda, tipo_ambiente=tipo_ambiente,
+                          desde=desde, tamano=tamano, con_total=total)
+    return respuesta_json(request, datos_pagina(pagina, campos))
+
+
+@router.get("/habitats/{habitat_id}")
+async def api_ver_habitat(habitat_id: int, request: Request, db=Depends(get_db),
+                          usuario: dict = Depends(require_auth_api), campos: Optional[str] = Query(None)):
+    habitat = await run_db(repositorio(HabitatRepository).get_by_id, db, habitat_id)
+    if not habitat:
+        _no_encontrado("Habitat no encontrado")
+    return respuesta_json(request, seleccionar(a_dict(habitat), leer_campos(campos)))
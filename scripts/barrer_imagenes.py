@@ -0,0 +1,36 @@
+"""Borra de uploads/ las imágenes que no usa ninguna fila de dinosaurios, eras, regiones
+o habitats (las sustituidas al editar, las de filas borradas, los duplicados antiguos),
+con sus miniaturas. Pensado para lanzarlo desde cron.
+
+Uso: python -m scripts.barrer_imagenes [--gracia 3600] [--simular]
+"""
+import argparse
+
+from data.database import pool
+from data.backend import DATABASE_BACKEND
+from data.imagen_repository import ImagenRepository
+from utils.imagenes import IMAGENES_GRACIA, barrer_huerfanas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Borra las imágenes subidas que ya no se usan")
+    parser.add_argument("--gracia", type=float, default=IMAGENES_GRACIA,
+                        help="Segundos que se respeta una imagen recién subida aunque no la use nadie")
+    parser.add_argument("--simular", action="store_true", help="Solo cuenta lo que se borraría")
+    args = parser.parse_args()
+
+    if DATABASE_BACKEND == "sqlite":
+        from data.backend import _preparar_sqlite
+        _preparar_sqlite()
+
+    with pool.conexion() as db:
+        referenciadas = ImagenRepository().get_referenciadas(db)
+    pool.cerrar()
+    resultado = barrer_huerfanas(referenciadas, gracia=args.gracia, simular=args.simular)
+    accion = "Se borrarían" if args.simular else "Borrados"
+    print(f"✅ Imágenes en uso: {resultado['conservadas']}. {accion} {resultado['borrados']} ficheros "
+          f"({resultado['bytes'] / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Logins por segundo y bloqueo del event loop al verificar contraseñas: bcrypt.checkpw dentro
+de la corrutina (como antes) frente al pool de procesos de utils/contrasenas.py. Mientras
+llegan los logins, una tarea "latido" mide cuánto tarda el loop en atenderla, que es lo
+que esperaría cualquier otra página. No necesita base de datos.
+
+Uso: python -m scripts.benchmark_login [--logins 64] [--concurrencia 16] [--coste 12] [--procesos 2]
+"""
+import argparse
+import asyncio
+import time
+
+from utils.contrasenas import Contrasenas, hashear_sincrono, verificar_sincrono
+
+# Cada cuánto se despierta el latido; lo que se retrase de más es tiempo de loop bloqueado
+_INTERVALO_LATIDO = 0.005
+
+
+async def _latido(parar: asyncio.Event, retrasos: list) -> None:
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(_INTERVALO_LATIDO)
+        retrasos.append(time.perf_counter() - inicio - _INTERVALO_LATIDO)
+
+
+async def _verificar_inline(password: str, password_hash: bytes) -> bool:
+    return verificar_sincrono(password, password_hash)
+
+
+async def _medir(verificar, password: str, password_hash: bytes, logins: int, concurrencia: int) -> tuple:
+    """(logins por segundo, retraso máximo y p99 del loop en ms)"""
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def login():
+        async with semaforo:
+            assert await verificar(password, password_hash)
+
+    parar = asyncio.Event()
+    retrasos: list = []
+    latido = asyncio.create_task(_latido(parar, retrasos))
+    await asyncio.sleep(_INTERVALO_LATIDO * 2)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    duracion = time.perf_counter() - inicio
+    parar.set()
+    await latido
+    retrasos.sort()
+    p99 = retrasos[int(len(retrasos) * 0.99)] if retrasos else 0.0
+    return logins / duracion, max(retrasos, default=0.0) * 1000, p99 * 1000
+
+
+async def _principal(args) -> None:
+    password = "contraseña de prueba"
+    password_hash = hashear_sincrono(password, args.coste)
+    pool = Contrasenas(procesos=args.procesos, coste=args.coste)
+    try:
+        # El primer uso arranca los procesos: no cuenta
+        await asyncio.gather(*(pool.verificar(password, password_hash) for _ in range(args.procesos)))
+        casos = [("inline (checkpw en la corrutina)", _verificar_inline),
+                 (f"pool de {args.procesos} procesos", pool.verificar)]
+        print(f"{args.logins} logins, {args.concurrencia} a la vez, coste {args.coste}")
+        for nombre, verificar in casos:
+            por_segundo, maximo, p99 = await _medir(verificar, password, password_hash,
+                                                    args.logins, args.concurrencia)
+            print(f"  {nombre:34} {por_segundo:8.1f} logins/s   loop bloqueado: máx {maximo:7.1f} ms, p99 {p99:7.1f} ms")
+    finally:
+        pool.cerrar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara la verificación de contraseñas inline y en el pool de procesos")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--coste", type=int, default=12)
+    parser.add_argument("--procesos", type=int, default=2)
+    asyncio.run(_principal(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
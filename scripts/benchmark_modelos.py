@@ -0,0 +1,157 @@
+"""Memoria y velocidad de pasar filas a modelos: clases con __dict__ construidas con
+Clase(fila[0], ..., fila[n]) (como antes) frente a los modelos con __slots__ y los
+mapeadores generados de data/mapeo.py. No necesita base de datos: las filas son sintéticas,
+con la forma de _SELECT_CON_RELACIONES (dinosaurio + era + región) y de los comentarios.
+
+Uso: python -m scripts.benchmark_modelos [--filas 100000] [--repeticiones 5]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from data.dinosaurio_repository import _a_dinosaurios_con_relaciones
+from data.comentario_repository import _a_comentario
+
+
+# Los modelos como eran antes: atributos en el __dict__ de cada objeto
+class _DinosaurioAntes:
+    def __init__(self, id, nombre, descripcion=None, tipo=None, peso_kg=None, altura_metros=None,
+                 longitud_metros=None, dieta=None, era_id=None, region_id=None, creador_id=None, imagen=None):
+        self.id = id
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.tipo = tipo
+        self.peso_kg = peso_kg
+        self.altura_metros = altura_metros
+        self.longitud_metros = longitud_metros
+        self.dieta = dieta
+        self.era_id = era_id
+        self.region_id = region_id
+        self.creador_id = creador_id
+        self.imagen = imagen
+        self.habitats = []
+
+
+class _EraAntes:
+    def __init__(self, id, nombre, periodo_inicio=None, periodo_fin=None, descripcion=None, imagen=None):
+        self.id = id
+        self.nombre = nombre
+        self.periodo_inicio = periodo_inicio
+        self.periodo_fin = periodo_fin
+        self.descripcion = descripcion
+        self.imagen = imagen
+
+
+class _RegionAntes:
+    def __init__(self, id, nombre, pais=None, continente=None, descripcion=None, imagen=None):
+        self.id = id
+        self.nombre = nombre
+        self.pais = pais
+        self.continente = continente
+        self.descripcion = descripcion
+        self.imagen = imagen
+
+
+class _ComentarioAntes:
+    def __init__(self, id, dinosaurio_id, usuario_id, contenido, fecha_creacion=None,
+                 comentario_padre_id=None, usuario_nombre=None, fecha_modificacion=None,
+                 votos_positivos=0, votos_negativos=0, voto_usuario=None):
+        self.id = id
+        self.dinosaurio_id = dinosaurio_id
+        self.usuario_id = usuario_id
+        self.contenido = contenido
+        self.fecha_creacion = fecha_creacion
+        self.fecha_modificacion = fecha_modificacion
+        self.comentario_padre_id = comentario_padre_id
+        self.usuario_nombre = usuario_nombre
+        self.votos_positivos = votos_positivos
+        self.votos_negativos = votos_negativos
+        self.voto_usuario = voto_usuario
+        self.respuestas = []
+
+
+def _dinosaurio_antes(fila):
+    dino = _DinosaurioAntes(fila[0], fila[1], fila[2], fila[3], fila[4], fila[5],
+                            fila[6], fila[7], fila[8], fila[9], fila[10], fila[11])
+    dino.era = _EraAntes(*fila[12:18]) if fila[12] is not None else None
+    dino.region = _RegionAntes(*fila[18:24]) if fila[18] is not None else None
+    return dino
+
+
+def _comentario_antes(com):
+    return _ComentarioAntes(
+        id=com[0], dinosaurio_id=com[1], usuario_id=com[2], contenido=com[3],
+        fecha_creacion=str(com[4]) if com[4] else None, comentario_padre_id=com[5],
+        usuario_nombre=com[6], fecha_modificacion=str(com[7]) if com[7] else None,
+        votos_positivos=com[8], votos_negativos=com[9], voto_usuario=com[10])
+
+
+def _filas_dinosaurios(n: int) -> list:
+    return [(i, f"Dino {i}", "Descripción", "Terópodo", 1000.0 + i, 4.5, 12.0, "Carnívoro", i % 3 + 1,
+             i % 7 + 1, 1, None,
+             i % 3 + 1, "Jurásico", 201, 145, "Era media", None,
+             i % 7 + 1, "Patagonia", "Argentina", "América", "Región", None)
+            for i in range(n)]
+
+
+def _filas_comentarios(n: int) -> list:
+    return [(i, 1, 1, f"Comentario {i}", "2024-01-01 10:00:00", None if i % 4 == 0 else i - i % 4,
+             "admin", None, i % 5, i % 2, None)
+            for i in range(n)]
+
+
+def _dinosaurios_antes(filas) -> list:
+    return [_dinosaurio_antes(fila) for fila in filas]
+
+
+def _comentarios_antes(filas) -> list:
+    return [_comentario_antes(fila) for fila in filas]
+
+
+def _comentarios_ahora(filas) -> list:
+    return [_a_comentario(fila) for fila in filas]
+
+
+def _medir(mapear, filas: list, repeticiones: int) -> tuple:
+    """(MB que ocupan los objetos, filas por segundo en la mejor repetición)"""
+    gc.collect()
+    tracemalloc.start()
+    objetos = mapear(filas)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objetos
+
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        objetos = mapear(filas)
+        mejor = min(mejor, time.perf_counter() - inicio)
+        del objetos
+    return memoria / 1024 / 1024, len(filas) / mejor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara la memoria y la velocidad del paso de filas a modelos")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    casos = [
+        ("dinosaurios con era y región", _filas_dinosaurios(args.filas),
+         _dinosaurios_antes, _a_dinosaurios_con_relaciones),
+        ("comentarios", _filas_comentarios(args.filas), _comentarios_antes, _comentarios_ahora),
+    ]
+    print(f"{args.filas} filas, mejor de {args.repeticiones} repeticiones")
+    for nombre, filas, antes, ahora in casos:
+        memoria_antes, velocidad_antes = _medir(antes, filas, args.repeticiones)
+        memoria_ahora, velocidad_ahora = _medir(ahora, filas, args.repeticiones)
+        print(f"\n{nombre}")
+        print(f"  antes (__dict__):           {memoria_antes:8.1f} MB  {velocidad_antes:12,.0f} filas/s")
+        print(f"  ahora (__slots__, mapeador): {memoria_ahora:7.1f} MB  {velocidad_ahora:12,.0f} filas/s")
+        print(f"  memoria x{memoria_antes / memoria_ahora:.2f} menos, velocidad x{velocidad_ahora / velocidad_antes:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Exporta el catálogo entero de dinosaurios (con era, región, habitats y número de
+comentarios) en CSV o NDJSON, fila a fila desde un cursor del servidor.
+
+Uso: python -m scripts.exportar_dinosaurios [--formato csv|ndjson] [--salida catalogo.csv]
+
+El CSV sale con las mismas columnas que lee scripts.importar_dinosaurios.
+"""
+import argparse
+import sys
+
+from data.database import pool
+from data.backend import DATABASE_BACKEND
+from data.dinosaurio_repository import DinosaurioRepository
+from utils.exportacion import FORMATOS_EXPORTACION
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta los dinosaurios en CSV o NDJSON")
+    parser.add_argument("--formato", choices=list(FORMATOS_EXPORTACION), default="csv")
+    parser.add_argument("--salida", help="Fichero de salida (por defecto, la salida estándar)")
+    args = parser.parse_args()
+
+    if DATABASE_BACKEND == "sqlite":
+        from data.backend import _preparar_sqlite
+        _preparar_sqlite()
+
+    _, cabecera, trozo = FORMATOS_EXPORTACION[args.formato]
+    salida = open(args.salida, "wb") if args.salida else sys.stdout.buffer
+    filas = 0
+    try:
+        salida.write(cabecera())
+        with pool.conexion() as db:
+            for trozo_filas in DinosaurioRepository().exportar(db):
+                salida.write(trozo(trozo_filas))
+                filas += len(trozo_filas)
+    finally:
+        if args.salida:
+            salida.close()
+    pool.cerrar()
+    print(f"✅ Dinosaurios exportados: {filas}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Genera las miniaturas WebP de las imágenes que ya están en uploads/.
+
+Uso: python -m scripts.generar_miniaturas [--procesos 4] [--forzar]
+
+Las imágenes que ya tienen variantes se saltan (salvo con --forzar).
+"""
+import argparse
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.imagenes import UPLOADS_DIR
+from utils.miniaturas import (MINIATURAS_PROCESOS, GeneradorMiniaturas, Image, anchos_generados,
+                              generar_variantes)
+
+# Las propias variantes (<nombre>_320w.webp) no se vuelven a reducir
+_RE_VARIANTE = re.compile(r"_\d+w\.webp$")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera las miniaturas WebP de uploads/")
+    parser.add_argument("--procesos", type=int, default=MINIATURAS_PROCESOS, help="Procesos en paralelo")
+    parser.add_argument("--forzar", action="store_true", help="Regenera también las que ya existen")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("⚠️ Pillow no está instalado (pip install Pillow)")
+        return
+    pendientes = [ruta for ruta in sorted(UPLOADS_DIR.iterdir())
+                  if ruta.is_file() and GeneradorMiniaturas.admite(ruta) and not _RE_VARIANTE.search(ruta.name)
+                  and (args.forzar or anchos_generados(ruta) is None)]
+    if not pendientes:
+        print("✅ Todas las imágenes tienen ya sus miniaturas")
+        return
+
+    hechas = errores = 0
+    with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+        futuros = {pool.submit(generar_variantes, str(ruta)): ruta for ruta in pendientes}
+        for futuro in as_completed(futuros):
+            try:
+                anchos = futuro.result()
+                hechas += 1
+                print(f"{futuros[futuro].name}: {', '.join(f'{a}w' for a in anchos)}")
+            except Exception as e:
+                errores += 1
+                print(f"⚠️ {futuros[futuro].name}: {e}")
+    print(f"✅ Imágenes con miniaturas: {hechas} (errores: {errores})")
+
+
+if __name__ == "__main__":
+    main()
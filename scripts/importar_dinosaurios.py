@@ -0,0 +1,52 @@
+"""Carga masiva de dinosaurios desde un fichero CSV o JSONL.
+
+Uso: python -m scripts.importar_dinosaurios coleccion.csv [--formato csv|jsonl] [--errores errores.jsonl]
+
+Columnas: nombre, descripcion, tipo, peso_kg, altura_metros, longitud_metros, dieta, imagen,
+era (nombre) o era_id, region (nombre) o region_id y habitats (nombres separados por |;
+en JSONL también una lista). Las filas que no se pueden importar se listan con su línea.
+"""
+import argparse
+import json
+import time
+
+from data.database import pool
+from data.backend import DATABASE_BACKEND
+from data.importacion import FORMATOS, ImportadorDinosaurios, formato_de
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa dinosaurios desde CSV o JSONL")
+    parser.add_argument("fichero", help="Fichero .csv, .jsonl o .ndjson")
+    parser.add_argument("--formato", choices=FORMATOS, help="Si la extensión no lo dice")
+    parser.add_argument("--errores", help="Guarda aquí los errores (JSONL) en lugar de mostrarlos")
+    args = parser.parse_args()
+
+    formato = args.formato or formato_de(args.fichero)
+    if formato is None:
+        parser.error("no se sabe el formato del fichero: usa --formato")
+
+    if DATABASE_BACKEND == "sqlite":
+        from data.backend import _preparar_sqlite
+        _preparar_sqlite()
+
+    inicio = time.perf_counter()
+    with open(args.fichero, "rb") as fichero, pool.conexion() as db:
+        informe = ImportadorDinosaurios().importar(db, fichero, formato)
+    pool.cerrar()
+
+    if args.errores:
+        with open(args.errores, "w", encoding="utf-8") as salida:
+            for error in informe.errores:
+                salida.write(json.dumps(error, ensure_ascii=False) + "\n")
+    else:
+        for error in informe.errores:
+            print(f"⚠️ Línea {error['linea']}: {error['error']}")
+    if informe.con_error > len(informe.errores):
+        print(f"⚠️ ... y {informe.con_error - len(informe.errores)} errores más")
+    print(f"✅ Importados {informe.importadas} de {informe.leidas} en {time.perf_counter() - inicio:.1f}s "
+          f"(con error: {informe.con_error})")
+
+
+if __name__ == "__main__":
+    main()
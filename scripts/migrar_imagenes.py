@@ -0,0 +1,40 @@
+"""Pasa las imágenes con nombre antiguo (uploads/dino_Antonio_4.jpg) a nombre con hash
+y actualiza las columnas imagen. Los ficheros antiguos se quedan hasta que
+scripts.barrer_imagenes los borre.
+
+Uso: python -m scripts.migrar_imagenes
+
+Los workers en marcha verán las URLs nuevas cuando caduquen sus cachés
+(REFERENCIA_CACHE_TTL, PAGINAS_CACHE_TTL) o al reiniciarlos.
+"""
+import argparse
+
+from data.database import pool
+from data.backend import DATABASE_BACKEND
+from data.imagen_repository import ImagenRepository
+from utils.imagenes import migrar_a_hash
+
+
+def main() -> None:
+    argparse.ArgumentParser(description="Renombra las imágenes subidas con el hash de su contenido").parse_args()
+
+    if DATABASE_BACKEND == "sqlite":
+        from data.backend import _preparar_sqlite
+        _preparar_sqlite()
+
+    imagen_repo = ImagenRepository()
+    migradas = 0
+    with pool.conexion() as db:
+        for imagen in sorted(imagen_repo.get_referenciadas(db)):
+            nueva = migrar_a_hash(imagen)
+            if nueva is None:
+                continue
+            filas = imagen_repo.reemplazar(db, imagen, nueva)
+            print(f"{imagen} -> {nueva} ({filas} filas)")
+            migradas += 1
+    pool.cerrar()
+    print(f"✅ Imágenes migradas: {migradas}")
+
+
+if __name__ == "__main__":
+    main()
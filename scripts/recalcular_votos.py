@@ -0,0 +1,29 @@
+"""Repara los contadores de votos de los comentarios.
+
+Uso: python -m scripts.recalcular_votos [--lote 1000]
+"""
+import argparse
+
+from data.database import pool
+from data.backend import DATABASE_BACKEND
+from data.comentario_repository import ComentarioRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula votos_positivos/votos_negativos de comentarios")
+    parser.add_argument("--lote", type=int, default=1000, help="Comentarios por transacción")
+    args = parser.parse_args()
+
+    if DATABASE_BACKEND == "sqlite":
+        # Asegura que existen las columnas de contadores
+        from data.backend import _preparar_sqlite
+        _preparar_sqlite()
+
+    with pool.conexion() as db:
+        reparados = ComentarioRepository().recalcular_votos(db, tamano_lote=args.lote)
+    pool.cerrar()
+    print(f"✅ Comentarios con contadores reparados: {reparados}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- ============================================
+-- MIGRACIÓN: Contadores de votos en comentarios
+-- ============================================
+
+-- Totales de votos guardados en el propio comentario (los mantiene ComentarioRepository)
+ALTER TABLE comentarios ADD COLUMN votos_positivos INT NOT NULL DEFAULT 0 COMMENT 'Votos positivos';
+ALTER TABLE comentarios ADD COLUMN votos_negativos INT NOT NULL DEFAULT 0 COMMENT 'Votos negativos';
+
+-- Inicializar los contadores con los votos que ya existen
+UPDATE comentarios
+SET votos_positivos = (SELECT COUNT(*) FROM comentario_votos v
+                       WHERE v.comentario_id = comentarios.id AND v.tipo_voto = 'positivo'),
+    votos_negativos = (SELECT COUNT(*) FROM comentario_votos v
+                       WHERE v.comentario_id = comentarios.id AND v.tipo_voto = 'negativo');
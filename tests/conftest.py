@@ -0,0 +1,51 @@
+import os
+import sqlite3
+
+# Antes de importar nada de data/: las pruebas usan el backend SQLite en memoria
+os.environ["DATABASE_BACKEND"] = "sqlite"
+os.environ["DATABASE_SQLITE_PATH"] = ":memory:"
+
+import pytest
+
+from data.busqueda import buscador
+from data.cache import estado_usuarios, paginas, referencia
+from data.facetas import facetas
+from data.sqlite_backend import SQLiteConnection, preparar_base_de_datos
+
+
+@pytest.fixture(autouse=True)
+def caches_vacias():
+    """Las cachés e índices son del proceso: cada prueba empieza sin nada guardado"""
+    def vaciar():
+        for tabla in ("eras", "regiones", "habitats"):
+            referencia.invalidar(tabla)
+        paginas.vaciar()
+        estado_usuarios.vaciar()
+        buscador.invalidar("dinosaurios")
+        facetas.invalidar()
+
+    vaciar()
+    yield
+    vaciar()
+
+
+@pytest.fixture
+def db():
+    """Una BD SQLite en memoria propia de la prueba, con el esquema de sql/ aplicado"""
+    conexion = sqlite3.connect(":memory:", check_same_thread=False)
+    conexion.execute("PRAGMA foreign_keys = ON")
+    db = SQLiteConnection(conexion)
+    preparar_base_de_datos(db)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def nuevo_usuario(db):
+    """nuevo_usuario("ana") -> id de un usuario recién creado"""
+    def crear(username: str) -> int:
+        cursor = db.cursor()
+        cursor.execute("INSERT INTO usuarios (username, password_hash) VALUES (%s, %s)", (username, b"x"))
+        db.commit()
+        return cursor.lastrowid
+    return crear
@@ -0,0 +1,59 @@
+from data.comentario_repository import ComentarioRepository
+from data.dinosaurio_repository import DinosaurioRepository
+from domain.model.Comentario import Comentario
+from domain.model.Dinosaurio import Dinosaurio
+
+
+def _comentario(db, usuario_id: int) -> int:
+    dino = DinosaurioRepository().insertar_dinosaurio(db, Dinosaurio(0, "Triceratops"))
+    return ComentarioRepository().insertar_comentario(db, Comentario(0, dino, usuario_id, "Hola"))
+
+
+def _contadores(db, comentario_id: int) -> tuple:
+    cursor = db.cursor()
+    cursor.execute("SELECT votos_positivos, votos_negativos FROM comentarios WHERE id = %s", (comentario_id,))
+    return cursor.fetchone()
+
+
+def _recuento_real(db, comentario_id: int) -> tuple:
+    cursor = db.cursor()
+    cursor.execute("SELECT SUM(tipo_voto = 'positivo'), SUM(tipo_voto = 'negativo') "
+                   "FROM comentario_votos WHERE comentario_id = %s", (comentario_id,))
+    positivos, negativos = cursor.fetchone()
+    return positivos or 0, negativos or 0
+
+
+def test_aplicar_votos_mantiene_los_contadores(db, nuevo_usuario):
+    repo = ComentarioRepository()
+    ana, luis, eva = nuevo_usuario("ana"), nuevo_usuario("luis"), nuevo_usuario("eva")
+    comentario = _comentario(db, ana)
+
+    repo.aplicar_votos(db, {(comentario, ana): "positivo", (comentario, luis): "positivo",
+                            (comentario, eva): "negativo"})
+    assert _contadores(db, comentario) == (2, 1)
+
+    # Cambio de voto, el mismo voto otra vez y un voto quitado, en el mismo lote
+    repo.aplicar_votos(db, {(comentario, ana): "negativo", (comentario, luis): "positivo",
+                            (comentario, eva): None})
+    assert _contadores(db, comentario) == (1, 1)
+    assert _contadores(db, comentario) == _recuento_real(db, comentario)
+
+
+def test_aplicar_votos_ignora_comentarios_borrados(db, nuevo_usuario):
+    repo = ComentarioRepository()
+    ana = nuevo_usuario("ana")
+    comentario = _comentario(db, ana)
+    repo.aplicar_votos(db, {(comentario, ana): "positivo", (comentario + 100, ana): "positivo"})
+    assert _contadores(db, comentario) == (1, 0)
+
+
+def test_aplicar_votos_y_agregar_voto_cuadran(db, nuevo_usuario):
+    repo = ComentarioRepository()
+    ana, luis = nuevo_usuario("ana"), nuevo_usuario("luis")
+    comentario = _comentario(db, ana)
+    repo.agregar_voto(db, comentario, ana, "positivo")
+    repo.aplicar_votos(db, {(comentario, ana): "negativo", (comentario, luis): "negativo"})
+    repo.eliminar_voto(db, comentario, luis)
+    assert _contadores(db, comentario) == (0, 1)
+    assert _contadores(db, comentario) == _recuento_real(db, comentario)
+    assert repo.recalcular_votos(db) == 0
@@ -0,0 +1,79 @@
+from data.dinosaurio_repository import DinosaurioRepository
+from data.transaccion import transaccion
+from domain.model.Dinosaurio import Dinosaurio
+
+
+def _habitats(db, dinosaurio_id: int) -> list:
+    return sorted(DinosaurioRepository().get_habitats(db, dinosaurio_id))
+
+
+def test_sincronizar_habitats(db):
+    repo = DinosaurioRepository()
+    dino = repo.insertar_dinosaurio(db, Dinosaurio(0, "Triceratops"))
+    otro = repo.insertar_dinosaurio(db, Dinosaurio(0, "Stegosaurus"))
+    repo.sincronizar_habitats(db, otro, [1])
+
+    repo.sincronizar_habitats(db, dino, [1, 2])
+    assert _habitats(db, dino) == [1, 2]
+    # Quita los que sobran, mantiene los que ya tenía y añade los nuevos (los repetidos, una vez)
+    repo.sincronizar_habitats(db, dino, [2, 3, 3])
+    assert _habitats(db, dino) == [2, 3]
+    repo.sincronizar_habitats(db, dino, [])
+    assert _habitats(db, dino) == []
+    # Los de otros dinosaurios no se tocan
+    assert _habitats(db, otro) == [1]
+
+
+def test_sincronizar_habitats_se_deshace_con_la_transaccion(db):
+    repo = DinosaurioRepository()
+    dino = repo.insertar_dinosaurio(db, Dinosaurio(0, "Triceratops"))
+    repo.sincronizar_habitats(db, dino, [1])
+    try:
+        with transaccion(db):
+            repo.sincronizar_habitats(db, dino, [2, 3])
+            raise RuntimeError("falla algo después")
+    except RuntimeError:
+        pass
+    assert _habitats(db, dino) == [1]
+
+
+def test_insertar_lote_devuelve_los_ids_en_orden(db):
+    repo = DinosaurioRepository()
+    repo.insertar_dinosaurio(db, Dinosaurio(0, "Previo"))
+    nombres = ["Zeta", "Alfa", "Mu"]
+    ids = repo.insertar_lote(db, [Dinosaurio(0, nombre) for nombre in nombres])
+    assert [repo.get_by_id(db, id).nombre for id in ids] == nombres
+
+
+def _insertar_desde_otro_proceso(db, nombre: str, era_id: int = None) -> None:
+    # SQL directo: no pasa por el repositorio, así que no actualiza los índices de este proceso
+    cursor = db.cursor()
+    cursor.execute("INSERT INTO dinosaurios (nombre, era_id) VALUES (%s, %s)", (nombre, era_id))
+    db.commit()
+
+
+def test_facetas_ven_las_altas_de_otros_procesos(db):
+    repo = DinosaurioRepository()
+    repo.insertar_dinosaurio(db, Dinosaurio(0, "Triceratops", era_id=3))
+    assert repo.contar_facetas(db)["era_id"] == {3: 1}
+    # Las escrituras de este proceso se aplican al índice sin reconstruirlo
+    repo.insertar_dinosaurio(db, Dinosaurio(0, "Stegosaurus", era_id=2))
+    assert repo.contar_facetas(db)["era_id"] == {2: 1, 3: 1}
+
+    _insertar_desde_otro_proceso(db, "Brachiosaurus", era_id=2)
+    recuentos = repo.contar_facetas(db)
+    assert recuentos["era_id"] == {2: 2, 3: 1}
+    assert recuentos["total"] == 3
+
+
+def test_busqueda_ve_las_altas_y_bajas_de_otros_procesos(db):
+    repo = DinosaurioRepository()
+    repo.insertar_dinosaurio(db, Dinosaurio(0, "Triceratops horridus"))
+    assert [d.nombre for d in repo.buscar(db, "tric")] == ["Triceratops horridus"]
+
+    _insertar_desde_otro_proceso(db, "Triceratops prorsus")
+    assert len(repo.buscar(db, "tric")) == 2
+    cursor = db.cursor()
+    cursor.execute("DELETE FROM dinosaurios WHERE nombre = %s", ("Triceratops horridus",))
+    db.commit()
+    assert [d.nombre for d in repo.buscar(db, "tric")] == ["Triceratops prorsus"]
@@ -0,0 +1,62 @@
+import io
+import json
+
+import data.importacion as importacion
+from data.dinosaurio_repository import DinosaurioRepository
+from data.importacion import ImportadorDinosaurios
+from domain.model.Dinosaurio import Dinosaurio
+
+
+def _csv(*lineas: str) -> io.BytesIO:
+    return io.BytesIO(("nombre,era,habitats,peso_kg\n" + "\n".join(lineas) + "\n").encode("utf-8"))
+
+
+def _dinosaurios(db) -> dict:
+    cursor = db.cursor()
+    cursor.execute("SELECT d.nombre, h.habitat_id FROM dinosaurios d "
+                   "LEFT JOIN dinosaurios_habitats h ON h.dinosaurio_id = d.id ORDER BY h.habitat_id")
+    resultado = {}
+    for nombre, habitat_id in cursor.fetchall():
+        resultado.setdefault(nombre, [])
+        if habitat_id is not None:
+            resultado[nombre].append(habitat_id)
+    return resultado
+
+
+def test_importa_csv_con_errores_de_validacion(db):
+    informe = ImportadorDinosaurios().importar(db, _csv(
+        "Rex,jurasico,Bosque Tropical|Llanura Aluvial,7000",
+        "Raptor,Precámbrico,,",
+        "Mini,,,abc",
+        "rex,,,",
+    ), "csv")
+    assert (informe.leidas, informe.importadas, informe.con_error) == (4, 1, 3)
+    assert [error["linea"] for error in informe.errores] == [3, 4, 5]
+    assert _dinosaurios(db) == {"Rex": [1, 2]}
+
+
+def test_jsonl(db):
+    lineas = [json.dumps({"nombre": "Rex", "habitats": [3]}), "{roto", json.dumps({"nombre": "Bronto"})]
+    informe = ImportadorDinosaurios().importar(db, io.BytesIO("\n".join(lineas).encode()), "jsonl")
+    assert (informe.importadas, informe.con_error) == (2, 1)
+    assert informe.errores[0]["linea"] == 2
+    assert _dinosaurios(db) == {"Rex": [3], "Bronto": []}
+
+
+def test_fallo_en_la_bd_repite_el_bloque_fila_a_fila(db, monkeypatch):
+    # Un dinosaurio creado por otro proceso después de comprobar los nombres existentes:
+    # el INSERT del bloque falla por el nombre único y se repite fila a fila
+    DinosaurioRepository().insertar_dinosaurio(db, Dinosaurio(0, "Intruso"))
+    monkeypatch.setattr(DinosaurioRepository, "nombres_existentes", lambda self, db, nombres: set())
+    monkeypatch.setattr(importacion, "IMPORTACION_FILAS_POR_TRANSACCION", 3)
+
+    informe = ImportadorDinosaurios().importar(db, _csv(
+        "Uno,,Sabana Seca,",
+        "Intruso,,Bosque Tropical,",
+        "Dos,,Ribera Fluvial|Sabana Seca,",
+        "Tres,,,",
+    ), "csv")
+    assert (informe.leidas, informe.importadas, informe.con_error) == (4, 3, 1)
+    assert informe.errores[0]["linea"] == 3
+    # Las filas buenas del bloque fallido entran con sus habitats; la mala no deja nada
+    assert _dinosaurios(db) == {"Intruso": [], "Uno": [3], "Dos": [3, 4], "Tres": []}
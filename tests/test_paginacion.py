@@ -0,0 +1,75 @@
+from data.dinosaurio_repository import DinosaurioRepository
+from data.era_repository import EraRepository
+from data.paginacion import Cursor, construir_pagina, sql_pagina
+from domain.model.Dinosaurio import Dinosaurio
+
+
+def test_cursor_ida_y_vuelta():
+    cursor = Cursor("Tyrannosaurus Ñ", 42, "anterior")
+    leido = Cursor.decodificar(cursor.codificar())
+    assert (leido.valor, leido.id, leido.sentido) == ("Tyrannosaurus Ñ", 42, "anterior")
+
+
+def test_cursor_no_valido_es_la_primera_pagina():
+    assert Cursor.decodificar(None) is None
+    assert Cursor.decodificar("") is None
+    assert Cursor.decodificar("esto no es un cursor") is None
+
+
+def test_sql_pagina_ascendente():
+    query, params = sql_pagina("SELECT * FROM t", " WHERE 1=1", [], Cursor("b", 7), 10)
+    assert "(nombre > %s OR (nombre = %s AND id > %s))" in query
+    assert query.endswith("ORDER BY nombre ASC, id ASC LIMIT %s")
+    assert params == ["b", "b", 7, 11]
+
+
+def test_sql_pagina_descendente_hacia_atras():
+    query, _ = sql_pagina("SELECT * FROM t", " WHERE 1=1", [], Cursor(5, 1, "anterior"), 10,
+                          columna="periodo", descendente=True)
+    # Hacia atrás en un orden descendente se recorre ascendente
+    assert "(periodo > %s OR (periodo = %s AND id > %s))" in query
+    assert "ORDER BY periodo ASC, id ASC" in query
+
+
+def _recorrer(obtener, tamano: int) -> list:
+    """Nombres de todas las páginas siguiendo los cursores hacia delante y luego hacia atrás"""
+    paginas, pagina = [], obtener(None, tamano)
+    paginas.append([e.nombre for e in pagina])
+    while pagina.siguiente:
+        pagina = obtener(Cursor.decodificar(pagina.siguiente), tamano)
+        paginas.append([e.nombre for e in pagina])
+    atras = [[e.nombre for e in pagina]]
+    while pagina.anterior:
+        pagina = obtener(Cursor.decodificar(pagina.anterior), tamano)
+        atras.append([e.nombre for e in pagina])
+    return paginas, atras[::-1]
+
+
+def test_paginas_de_dinosaurios_por_nombre(db):
+    repo = DinosaurioRepository()
+    nombres = [f"Dino {i:02d}" for i in range(7)]
+    repo.insertar_lote(db, [Dinosaurio(0, nombre) for nombre in reversed(nombres)])
+
+    adelante, atras = _recorrer(lambda desde, tamano: repo.get_pagina(db, desde=desde, tamano=tamano), 3)
+    assert adelante == [nombres[0:3], nombres[3:6], nombres[6:7]]
+    assert atras == adelante
+    assert repo.get_pagina(db, tamano=3).total == 7
+
+
+def test_paginas_de_eras_en_orden_cronologico(db):
+    repo = EraRepository()
+    cursor = db.cursor()
+    cursor.execute("INSERT INTO eras (nombre, periodo_inicio) VALUES (%s, %s)", ("Pérmico", 299))
+    cursor.execute("INSERT INTO eras (nombre) VALUES (%s)", ("Sin periodo",))
+    db.commit()
+
+    adelante, atras = _recorrer(lambda desde, tamano: repo.get_pagina(db, desde=desde, tamano=tamano), 2)
+    assert adelante == [["Pérmico", "Triásico"], ["Jurásico", "Cretácico"], ["Sin periodo"]]
+    assert atras == adelante
+
+
+def test_construir_pagina_sin_mas_filas():
+    elementos = [Dinosaurio(1, "a"), Dinosaurio(2, "b")]
+    pagina = construir_pagina(list(elementos), None, 5, lambda d: d.nombre, total=2)
+    assert pagina.siguiente is None and pagina.anterior is None
+    assert [d.id for d in pagina] == [1, 2]
@@ -0,0 +1,108 @@
+import sqlite3
+
+from data.dialect import SQLITE, dialecto
+from data.sqlite_backend import (
+    SQLiteConnection, _dividir_sentencias, _traducir_parametros, _traducir_sentencia, aplicar_script,
+    crear_conexion_sqlite, preparar_base_de_datos,
+)
+
+
+def _columnas(db, tabla: str) -> set:
+    return {fila[1] for fila in db._conexion.execute(f"PRAGMA table_info({tabla})")}
+
+
+def _tablas(db) -> set:
+    return {fila[0] for fila in db._conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_esquema_crea_todas_las_tablas(db):
+    assert {"usuarios", "eras", "regiones", "habitats", "dinosaurios", "dinosaurios_habitats",
+            "comentarios", "comentario_votos"} <= _tablas(db)
+
+
+def test_esquema_aplica_las_migraciones_de_columnas(db):
+    # Columnas que añaden los ALTER TABLE (también los de SET @sql := IF(...))
+    assert {"descripcion", "tipo", "peso_kg", "imagen", "creador_id"} <= _columnas(db, "dinosaurios")
+    assert {"rol", "activo"} <= _columnas(db, "usuarios")
+    assert {"votos_positivos", "votos_negativos"} <= _columnas(db, "comentarios")
+
+
+def test_esquema_es_idempotente(db):
+    eras = db._conexion.execute("SELECT COUNT(*) FROM eras").fetchone()[0]
+    preparar_base_de_datos(db)
+    assert db._conexion.execute("SELECT COUNT(*) FROM eras").fetchone()[0] == eras
+    assert eras > 0  # Los datos de prueba del script, una sola vez
+
+
+def test_sql_dinamico_de_las_migraciones(db):
+    db._conexion.execute("CREATE TABLE prueba (id INTEGER PRIMARY KEY)")
+    sentencia = ("SET @sql_x := IF(\n    @col_x = 0,\n"
+                 "    'ALTER TABLE prueba ADD COLUMN nota VARCHAR(10) COMMENT ''de prueba''',\n    'DO 1'\n)")
+    assert _traducir_sentencia(db, sentencia) == ["ALTER TABLE prueba ADD COLUMN nota VARCHAR(10)"]
+    aplicar_script(db, sentencia + ";")
+    assert "nota" in _columnas(db, "prueba")
+    # Si la columna ya existe no hace nada, como el 'DO 1' de MySQL
+    assert _traducir_sentencia(db, sentencia) == []
+
+
+def test_sentencias_de_mysql_sin_equivalente_se_omiten(db):
+    for sentencia in ("USE thomas", "SET @col := (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS)",
+                      "PREPARE stmt FROM @sql", "EXECUTE stmt", "DEALLOCATE PREPARE stmt"):
+        assert _traducir_sentencia(db, sentencia) == []
+
+
+def test_create_table_traducido(db):
+    traducidas = _traducir_sentencia(db, """CREATE TABLE IF NOT EXISTS t (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        rol ENUM('a', 'b') DEFAULT 'a' COMMENT 'Rol, con coma',
+        cambiado TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_rol (rol)
+    )""")
+    assert "INTEGER PRIMARY KEY AUTOINCREMENT" in traducidas[0]
+    assert "ENUM" not in traducidas[0] and "COMMENT" not in traducidas[0] and "ON UPDATE" not in traducidas[0]
+    assert traducidas[1] == "CREATE INDEX IF NOT EXISTS t_idx_rol ON t (rol)"
+
+
+def test_dividir_sentencias_respeta_comillas_y_comentarios():
+    script = "-- comentario; con punto y coma\nINSERT INTO t VALUES ('a;b');\nSELECT 1;"
+    assert _dividir_sentencias(script) == ["INSERT INTO t VALUES ('a;b')", "SELECT 1"]
+
+
+def test_traducir_parametros():
+    assert _traducir_parametros("SELECT * FROM t WHERE a = %s AND b LIKE %s") == \
+        "SELECT * FROM t WHERE a = ? AND b LIKE ?"
+    # %% es un % literal en el paramstyle de mysql-connector
+    assert _traducir_parametros("SELECT 'x%%' WHERE a = %s") == "SELECT 'x%' WHERE a = ?"
+
+
+def test_cursor_usa_el_paramstyle_de_mysql(db):
+    cursor = db.cursor()
+    cursor.execute("SELECT nombre FROM eras WHERE nombre LIKE %s AND id > %s", ("Jur%", 0))
+    assert cursor.fetchall() == [("Jurásico",)]
+    cursor.execute("SELECT 'cien %%'")
+    assert cursor.fetchone() == ("cien %",)
+
+
+def test_la_conexion_lleva_su_dialecto(db):
+    assert dialecto(db) is SQLITE
+
+
+def test_memoria_compartida_entre_conexiones_del_pool():
+    una, otra = crear_conexion_sqlite(), crear_conexion_sqlite()
+    try:
+        una._conexion.execute("CREATE TABLE IF NOT EXISTS compartida (x INTEGER)")
+        una._conexion.execute("INSERT INTO compartida VALUES (1)")
+        una.commit()
+        assert otra._conexion.execute("SELECT COUNT(*) FROM compartida").fetchone()[0] >= 1
+        una._conexion.execute("DROP TABLE compartida")
+        una.commit()
+    finally:
+        una.close()
+        otra.close()
+
+
+def test_is_connected(db):
+    assert db.is_connected()
+    conexion = SQLiteConnection(sqlite3.connect(":memory:"))
+    conexion.close()
+    assert not conexion.is_connected()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import Response
+
+from data.mapeo import atributos, es_modelo
+from data.paginacion import Pagina
+from utils.dependencies import get_db, require_auth, require_auth_admin
+
+try:
+    import orjson
+except ImportError:  # Sin orjson se usa json de la librería estándar (más lento)
+    orjson = None
+
+
+def _por_defecto(valor):
+    """Tipos que ni orjson ni json saben escribir: DECIMAL de MySQL, fechas (json) y modelos"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if es_modelo(valor):
+        return atributos(valor)
+    raise TypeError(f"No se puede convertir a JSON: {type(valor).__name__}")
+
+
+def a_json(datos) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(datos, default=_por_defecto)
+    return json.dumps(datos, default=_por_defecto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def a_dict(objeto) -> dict:
+    """Modelo de dominio -> dict con sus relaciones (era, region, habitats, respuestas) también
+    como dicts. Los atributos de presentación de la búsqueda (fragmento...) se quedan fuera."""
+    resultado = {}
+    for clave, valor in atributos(objeto).items():
+        if clave in ("nombre_resaltado", "fragmento"):
+            continue
+        if isinstance(valor, list):
+            valor = [a_dict(v) if es_modelo(v) else v for v in valor]
+        elif es_modelo(valor):
+            valor = a_dict(valor)
+        resultado[clave] = valor
+    return resultado
+
+
+def leer_campos(campos: Optional[str]) -> dict:
+    """"id,nombre,era.nombre" -> {"id": {}, "nombre": {}, "era": {"nombre": {}}}"""
+    arbol: dict = {}
+    for campo in (campos or "").split(","):
+        nodo = arbol
+        for parte in campo.strip().split("."):
+            if parte:
+                nodo = nodo.setdefault(parte, {})
+    return arbol
+
+
+def seleccionar(valor, arbol: dict):
+    """Deja solo los campos pedidos (los que no existen se ignoran); sin campos, todo"""
+    if not arbol:
+        return valor
+    if isinstance(valor, list):
+        return [seleccionar(v, arbol) for v in valor]
+    if isinstance(valor, dict):
+        return {clave: seleccionar(valor[clave], sub) for clave, sub in arbol.items() if clave in valor}
+    return valor
+
+
+def datos_pagina(pagina: Pagina, campos: Optional[str]) -> dict:
+    arbol = leer_campos(campos)
+    return {
+        "datos": [seleccionar(a_dict(elemento), arbol) for elemento in pagina.elementos],
+        "paginacion": {
+            "siguiente": pagina.siguiente,
+            "anterior": pagina.anterior,
+            "total": pagina.total,
+            "tamano": pagina.tamano,
+        },
+    }
+
+
+def calcular_etag(cuerpo: bytes) -> str:
+    """ETag fuerte: hash del cuerpo exacto de la respuesta"""
+    return '"' + hashlib.blake2b(cuerpo, digest_size=16).hexdigest() + '"'
+
+
+def coincide_etag(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    etiquetas = [e.strip() for e in if_none_match.split(",")]
+    # Comparación débil: W/"x" y "x" son la misma versión
+    return "*" in etiquetas or etag in (e[2:] if e.startswith("W/") else e for e in etiquetas)
+
+
+def respuesta_json(request: Request, datos, status_code: int = status.HTTP_200_OK) -> Response:
+    """Respuesta JSON con ETag (hash del cuerpo): si el cliente ya la tiene, 304 sin cuerpo"""
+    cuerpo = a_json(datos)
+    etag = calcular_etag(cuerpo)
+    # Las respuestas dependen del usuario de la sesión: solo las puede guardar su navegador
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.method == "GET" and coincide_etag(etag, request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+    return Response(cuerpo, status_code=status_code, media_type="application/json", headers=cabeceras)
+
+
+async def require_auth_api(request: Request, db=Depends(get_db)) -> dict:
+    """require_auth para la API: en lugar de redirigir al login responde 401"""
+    try:
+        return await require_auth(request, db)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_307_TEMPORARY_REDIRECT:
+            raise
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
+
+
+async def require_admin_api(request: Request, db=Depends(get_db)) -> dict:
+    """require_auth_admin para la API: 401 sin sesión, 403 si no es admin"""
+    try:
+        return await require_auth_admin(request, db)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_307_TEMPORARY_REDIRECT:
+            raise
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado")
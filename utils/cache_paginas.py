@@ -0,0 +1,34 @@
+from fastapi import Request, status
+from fastapi.responses import Response
+
+from data.cache import paginas
+from utils.api import calcular_etag, coincide_etag
+
+
+def clave_pagina(request: Request, usuario: dict) -> tuple:
+    """Una página depende de la ruta, de los parámetros y de quién la ve: la cabecera usa
+    el nombre y el rol, y el detalle los votos del usuario (por eso va su id)"""
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())),
+            usuario.get("id"), usuario.get("username"), usuario.get("rol"))
+
+
+async def respuesta_cacheada(request: Request, usuario: dict, etiquetas, generar) -> Response:
+    """Devuelve la página de la caché o la genera con generar() (async, devuelve la
+    TemplateResponse) y la guarda con sus etiquetas. Solo se guardan las respuestas 200.
+    Si el navegador manda un If-None-Match con el mismo ETag, 304 sin cuerpo."""
+    clave = clave_pagina(request, usuario)
+    guardada = paginas.obtener(clave)
+    if guardada is None:
+        version = paginas.version
+        respuesta = await generar()
+        if respuesta.status_code != status.HTTP_200_OK:
+            return respuesta
+        guardada = (respuesta.body, respuesta.media_type, calcular_etag(respuesta.body))
+        paginas.guardar(clave, guardada, version, etiquetas)
+
+    cuerpo, media_type, etag = guardada
+    # private: lleva datos del usuario; no-cache: el navegador revalida siempre (y recibe 304)
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if coincide_etag(etag, request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+    return Response(cuerpo, media_type=media_type, headers=cabeceras)
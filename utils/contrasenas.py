@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+# Factor de trabajo de bcrypt (2^coste rondas): cada +1 duplica lo que tarda un login
+BCRYPT_COSTE = int(os.getenv("BCRYPT_COST", "12"))
+# Procesos dedicados a bcrypt: como mucho tantos hashes a la vez, el resto espera su turno
+BCRYPT_PROCESOS = int(os.getenv("BCRYPT_PROCESOS", "2"))
+
+
+def hashear_sincrono(password: str, coste: int = BCRYPT_COSTE) -> bytes:
+    """bcrypt.hashpw con el coste configurado. Es CPU pura: se ejecuta en los procesos de
+    Contrasenas (o directamente en scripts, donde no hay event loop que bloquear)"""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=coste))
+
+
+def verificar_sincrono(password: str, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), bytes(password_hash))
+
+
+def coste_de(password_hash: bytes) -> Optional[int]:
+    """Coste con el que se generó un hash ($2b$12$...), o None si no tiene ese formato"""
+    try:
+        return int(bytes(password_hash).split(b"$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class Contrasenas:
+    """Hashea y verifica contraseñas en un pool de procesos para que un aluvión de logins
+    no congele el event loop (cada checkpw tarda decenas de ms con el GIL tomado)"""
+
+    def __init__(self, procesos: int = BCRYPT_PROCESOS, coste: int = BCRYPT_COSTE):
+        self.procesos = procesos
+        self.coste = coste
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._hasheadas = 0
+        self._verificadas = 0
+        self._rehasheadas = 0
+        self._tiempo_total = 0.0
+        self._tiempo_maximo = 0.0
+
+    def _ejecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: el proceso del servidor tiene hilos (pool de BD, executor) y fork no es seguro
+                self._pool = ProcessPoolExecutor(max_workers=self.procesos,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    async def _ejecutar(self, func, *args):
+        inicio = time.monotonic()
+        with self._lock:
+            self._en_curso += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._ejecutor(), func, *args)
+        finally:
+            duracion = time.monotonic() - inicio
+            with self._lock:
+                self._en_curso -= 1
+                self._tiempo_total += duracion
+                self._tiempo_maximo = max(self._tiempo_maximo, duracion)
+
+    async def hashear(self, password: str) -> bytes:
+        """Hash de la contraseña con el coste configurado"""
+        password_hash = await self._ejecutar(hashear_sincrono, password, self.coste)
+        with self._lock:
+            self._hasheadas += 1
+        return password_hash
+
+    async def verificar(self, password: str, password_hash: bytes) -> bool:
+        """Si la contraseña coincide con el hash"""
+        correcta = await self._ejecutar(verificar_sincrono, password, bytes(password_hash))
+        with self._lock:
+            self._verificadas += 1
+        return correcta
+
+    def necesita_rehash(self, password_hash: bytes) -> bool:
+        """El hash se generó con otro coste: hay que rehashear en el próximo login correcto,
+        que es el único momento en que se tiene la contraseña en claro"""
+        return coste_de(password_hash) != self.coste
+
+    def rehasheada(self) -> None:
+        with self._lock:
+            self._rehasheadas += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            operaciones = self._hasheadas + self._verificadas
+            return {
+                "procesos": self.procesos,
+                "coste": self.coste,
+                "en_curso": self._en_curso,
+                "hasheadas": self._hasheadas,
+                "verificadas": self._verificadas,
+                "rehasheadas": self._rehasheadas,
+                "tiempo_medio_ms": round(self._tiempo_total / operaciones * 1000, 3) if operaciones else 0.0,
+                "tiempo_maximo_ms": round(self._tiempo_maximo * 1000, 3),
+            }
+
+    def cerrar(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+contrasenas = Contrasenas()
@@ -0,0 +1,80 @@
+import asyncio
+import csv
+import inspect
+import io
+
+from data.backend import conexion, repositorio
+from data.dinosaurio_repository import COLUMNAS_EXPORTACION, DinosaurioRepository
+from data.executor import run_db
+from utils.api import a_json
+
+
+def trozo_csv(filas) -> bytes:
+    salida = io.StringIO()
+    csv.writer(salida, lineterminator="\n").writerows(filas)
+    return salida.getvalue().encode("utf-8")
+
+
+def cabecera_csv() -> bytes:
+    return trozo_csv([COLUMNAS_EXPORTACION])
+
+
+def trozo_ndjson(filas) -> bytes:
+    """Un objeto JSON por línea; los habitats como lista"""
+    lineas = []
+    for fila in filas:
+        registro = dict(zip(COLUMNAS_EXPORTACION, fila))
+        registro["habitats"] = registro["habitats"].split("|") if registro["habitats"] else []
+        lineas.append(a_json(registro))
+    return b"\n".join(lineas) + b"\n"
+
+
+# formato -> (tipo MIME, cabecera, trozo)
+FORMATOS_EXPORTACION = {
+    "csv": ("text/csv; charset=utf-8", cabecera_csv, trozo_csv),
+    "ndjson": ("application/x-ndjson", lambda: b"", trozo_ndjson),
+}
+
+
+async def _trozos():
+    """Trozos de filas del catálogo con una conexión propia (la de la petición se devuelve
+    antes de que empiece a enviarse la respuesta)"""
+    dino_repo = repositorio(DinosaurioRepository)
+    asincrono = inspect.isasyncgenfunction(dino_repo.exportar)
+    async with conexion() as db:
+        completa = False
+        siguiente = None
+        try:
+            if asincrono:
+                async for filas in dino_repo.exportar(db):
+                    yield filas
+            else:
+                # Cada trozo se lee en un hilo del executor de BD
+                trozos = dino_repo.exportar(db)
+                while True:
+                    siguiente = asyncio.ensure_future(run_db(next, trozos, None))
+                    filas = await asyncio.shield(siguiente)
+                    if filas is None:
+                        break
+                    yield filas
+            completa = True
+        finally:
+            if not completa:
+                # El cliente se fue a medias: quedan filas sin leer en el cursor del servidor y
+                # la conexión no se puede reutilizar. Se cierra y el pool la descarta al devolverla
+                if asincrono:
+                    db.close()
+                else:
+                    if siguiente is not None:
+                        await asyncio.wait([siguiente])
+                    await run_db(db.close)
+
+
+async def exportar_catalogo(formato: str):
+    """Cuerpo de la respuesta de la exportación: bytes a medida que salen de la BD"""
+    _, cabecera, trozo = FORMATOS_EXPORTACION[formato]
+    inicio = cabecera()
+    if inicio:
+        yield inicio
+    async for filas in _trozos():
+        yield trozo(filas)
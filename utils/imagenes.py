@@ -0,0 +1,273 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from utils.miniaturas import miniaturas
+
+# Carpeta de las imágenes subidas (se sirve en /uploads)
+UPLOADS_DIR = Path(os.getenv("UPLOADS_DIR", "uploads"))
+UPLOADS_URL = "/uploads"
+# Un nombre con hash no cambia nunca de contenido: el navegador lo guarda un año sin preguntar
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+# Los nombres antiguos (dino_Antonio_4.jpg) se pueden sobrescribir: se revalidan siempre
+CACHE_REVALIDAR = "no-cache"
+# Formatos de texto que merece la pena guardar también comprimidos (jpg, png o webp ya lo están)
+EXTENSIONES_COMPRIMIBLES = {".svg"}
+# Un SVG puede llevar <script> y se sirve desde nuestro origen: abierto directamente, el
+# navegador lo trata como un documento sin scripts ni acceso al origen (en <img> no cambia nada)
+CSP_SVG = "default-src 'none'; style-src 'unsafe-inline'; img-src data:; sandbox"
+
+_MB = 1024 * 1024
+_RASTER = {".jpg", ".png", ".webp", ".gif"}
+# Tamaño máximo (bytes) y tipos admitidos de la imagen de cada entidad
+# (las eras, regiones y hábitats pueden llevar mapas o esquemas en SVG)
+LIMITES_IMAGEN = {
+    "dinosaurio": (int(os.getenv("IMAGEN_MAXIMO_DINOSAURIO", str(8 * _MB))), _RASTER),
+    "era": (int(os.getenv("IMAGEN_MAXIMO_ERA", str(4 * _MB))), _RASTER | {".svg"}),
+    "region": (int(os.getenv("IMAGEN_MAXIMO_REGION", str(4 * _MB))), _RASTER | {".svg"}),
+    "habitat": (int(os.getenv("IMAGEN_MAXIMO_HABITAT", str(4 * _MB))), _RASTER | {".svg"}),
+}
+# Ninguna petición con ficheros puede pasar de esto: se corta antes de leer el cuerpo
+SUBIDAS_MAXIMO_PETICION = max(maximo for maximo, _ in LIMITES_IMAGEN.values()) + _MB
+
+# Primeros bytes de cada tipo: la extensión tiene que coincidir con el contenido
+_FIRMAS = {
+    ".jpg": lambda cabecera: cabecera.startswith(b"\xff\xd8\xff"),
+    ".png": lambda cabecera: cabecera.startswith(b"\x89PNG\r\n\x1a\n"),
+    ".gif": lambda cabecera: cabecera[:6] in (b"GIF87a", b"GIF89a"),
+    ".webp": lambda cabecera: cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP",
+    ".svg": lambda cabecera: b"<svg" in cabecera.lower(),
+}
+_SINONIMOS = {".jpeg": ".jpg"}
+# Una imagen sin referencias no se borra hasta pasado este tiempo (s): la subida se
+# guarda antes de que la fila que la usa llegue a la BD
+IMAGENES_GRACIA = float(os.getenv("IMAGENES_GRACIA", "3600"))
+
+_TROZO = _MB
+# <hash>.jpg y sus variantes <hash>_320w.webp
+_RE_NOMBRE_HASH = re.compile(r"^([0-9a-f]{32})(_\d+w)?(\.\w+)?$")
+# Ficheros que salen de una imagen: variantes WebP y manifiesto (de su nombre sin extensión)
+_RE_DERIVADO = re.compile(r"^(.+)(?:_\d+w\.webp|_variantes\.json)$")
+
+
+def es_nombre_hash(nombre: str) -> bool:
+    return _RE_NOMBRE_HASH.match(nombre) is not None
+
+
+def _copiar_con_hash(entrada) -> tuple:
+    """Copia el fichero a un temporal de uploads/ calculando el hash a la vez: (temporal, hash)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with tempfile.NamedTemporaryFile(dir=UPLOADS_DIR, suffix=".tmp", delete=False) as temporal:
+        for trozo in iter(lambda: entrada.read(_TROZO), b""):
+            digest.update(trozo)
+            temporal.write(trozo)
+    return temporal.name, digest.hexdigest()
+
+
+def _colocar(temporal: str, extension: str, digest: str) -> str:
+    """Mueve el temporal a <hash><ext> (rename atómico) y devuelve la URL.
+    Si ya existe, es la misma imagen: se descarta el temporal."""
+    nombre = digest + extension
+    destino = UPLOADS_DIR / nombre
+    if destino.exists():
+        os.unlink(temporal)
+        # Vuelve a estar en uso: que el barrido no la tome por huérfana antigua
+        os.utime(destino)
+    else:
+        os.replace(temporal, destino)
+    if extension in EXTENSIONES_COMPRIMIBLES:
+        precomprimir(destino)
+    return f"{UPLOADS_URL}/{nombre}"
+
+
+class ImagenNoValida(ValueError):
+    """La imagen subida no es de un tipo admitido o pasa del tamaño máximo"""
+
+
+def _en_mb(tamano: int) -> str:
+    return f"{tamano / _MB:.3g} MB"
+
+
+def _escribir(temporal, digest, trozo: bytes) -> None:
+    # hashlib suelta el GIL con trozos grandes: hash y escritura van juntos en el hilo
+    digest.update(trozo)
+    temporal.write(trozo)
+
+
+def _descartar(temporal) -> None:
+    temporal.close()
+    os.unlink(temporal.name)
+
+
+async def guardar_imagen(imagen: UploadFile, entidad: str) -> str:
+    """Guarda la imagen subida de una entidad (dinosaurio, era, region, habitat) y devuelve
+    su URL. Se copia por trozos a un temporal sin bloquear el event loop, calculando el
+    hash a la vez, y se mueve a uploads/<hash><ext> con un rename atómico: cambiar la
+    imagen cambia la URL. Lanza ImagenNoValida si el tipo o el tamaño no se admiten."""
+    maximo, tipos = LIMITES_IMAGEN[entidad]
+    extension = Path(imagen.filename).suffix.lower()
+    extension = _SINONIMOS.get(extension, extension)
+    if extension not in tipos:
+        raise ImagenNoValida(f"Tipo de imagen no admitido ({extension or 'sin extensión'}); "
+                             f"se admiten {', '.join(sorted(tipos))}")
+    # Starlette ya sabe el tamaño del fichero: si se pasa, ni se copia
+    if imagen.size is not None and imagen.size > maximo:
+        raise ImagenNoValida(f"La imagen pasa del máximo de {_en_mb(maximo)}")
+
+    await asyncio.to_thread(UPLOADS_DIR.mkdir, exist_ok=True)
+    temporal = await asyncio.to_thread(tempfile.NamedTemporaryFile, dir=UPLOADS_DIR, suffix=".tmp", delete=False)
+    digest = hashlib.blake2b(digest_size=16)
+    copiados = 0
+    try:
+        while trozo := await imagen.read(_TROZO):
+            if copiados == 0 and not _FIRMAS[extension](trozo):
+                raise ImagenNoValida(f"El contenido de {imagen.filename} no es una imagen {extension}")
+            copiados += len(trozo)
+            if copiados > maximo:
+                raise ImagenNoValida(f"La imagen pasa del máximo de {_en_mb(maximo)}")
+            await asyncio.to_thread(_escribir, temporal, digest, trozo)
+        if copiados == 0:
+            raise ImagenNoValida(f"{imagen.filename} está vacío")
+        await asyncio.to_thread(temporal.close)
+        url = await asyncio.to_thread(_colocar, temporal.name, extension, digest.hexdigest())
+    except BaseException:
+        await asyncio.to_thread(_descartar, temporal)
+        raise
+    # Miniaturas y WebP en segundo plano: mientras tanto las páginas usan la original
+    miniaturas.programar(ruta_de(url))
+    return url
+
+
+def ruta_de(url: str) -> Path:
+    """/uploads/<nombre> -> uploads/<nombre>"""
+    return UPLOADS_DIR / url[len(UPLOADS_URL) + 1:]
+
+
+def srcset(url: Optional[str]) -> Optional[str]:
+    """srcset con las variantes WebP de una imagen subida, o None si aún no tiene
+    (para las plantillas, ver template/imagen.html)"""
+    if not url or not url.startswith(UPLOADS_URL + "/"):
+        return None
+    return miniaturas.srcset(url, ruta_de(url))
+
+
+def migrar_a_hash(url: Optional[str]) -> Optional[str]:
+    """URL de una imagen con nombre antiguo -> URL con hash (copia el fichero; el antiguo
+    se deja para los enlaces que ya existan). None si no hay que cambiar nada."""
+    if not url or not url.startswith(UPLOADS_URL + "/"):
+        return None
+    origen = ruta_de(url)
+    if es_nombre_hash(origen.name) or not origen.is_file():
+        return None
+    with origen.open("rb") as entrada:
+        temporal, digest = _copiar_con_hash(entrada)
+    return _colocar(temporal, origen.suffix.lower(), digest)
+
+
+def precomprimir(ruta: Path) -> None:
+    """Deja al lado <fichero>.gz para servirlo sin comprimir en cada petición"""
+    comprimido = ruta.with_name(ruta.name + ".gz")
+    if comprimido.exists():
+        return
+    with tempfile.NamedTemporaryFile(dir=ruta.parent, suffix=".tmp", delete=False) as temporal:
+        temporal.write(gzip.compress(ruta.read_bytes(), compresslevel=9, mtime=0))
+    os.replace(temporal.name, comprimido)
+
+
+def barrer_huerfanas(referenciadas, gracia: float = IMAGENES_GRACIA, simular: bool = False) -> dict:
+    """Borra de uploads/ las imágenes que no usa ninguna fila (referenciadas: sus URLs),
+    con sus variantes y su .gz, y los temporales abandonados. Nada de lo modificado en
+    los últimos `gracia` segundos se toca. Devuelve cuántos ficheros y bytes se liberan."""
+    if not UPLOADS_DIR.is_dir():
+        return {"conservadas": 0, "borrados": 0, "bytes": 0}
+    limite = time.time() - gracia
+    usadas = {url[len(UPLOADS_URL) + 1:] for url in referenciadas if url.startswith(UPLOADS_URL + "/")}
+    ficheros = {ruta.name: ruta.stat() for ruta in UPLOADS_DIR.iterdir() if ruta.is_file()}
+
+    def es_derivado(nombre: str) -> bool:
+        return nombre.endswith((".gz", ".tmp")) or _RE_DERIVADO.match(nombre) is not None
+
+    conservadas = {nombre for nombre, datos in ficheros.items() if not es_derivado(nombre)
+                   and (nombre in usadas or datos.st_mtime > limite)}
+    raices = {Path(nombre).stem for nombre in conservadas}
+    borrados = liberados = 0
+    for nombre, datos in sorted(ficheros.items()):
+        if nombre in conservadas or datos.st_mtime > limite:
+            continue
+        derivado = _RE_DERIVADO.match(nombre)
+        if (nombre.endswith(".gz") and nombre[:-3] in conservadas) or (derivado and derivado.group(1) in raices):
+            continue
+        if not simular:
+            (UPLOADS_DIR / nombre).unlink(missing_ok=True)
+        borrados += 1
+        liberados += datos.st_size
+    return {"conservadas": len(conservadas), "borrados": borrados, "bytes": liberados}
+
+
+class LimiteSubidas:
+    """Middleware ASGI: los formularios con ficheros cuyo Content-Length pasa de
+    SUBIDAS_MAXIMO_PETICION se rechazan con 413 antes de leer (y guardar) el cuerpo"""
+
+    def __init__(self, app, maximo: int = SUBIDAS_MAXIMO_PETICION):
+        self.app = app
+        self.maximo = maximo
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            cabeceras = Headers(scope=scope)
+            longitud = cabeceras.get("content-length", "")
+            if (cabeceras.get("content-type", "").startswith("multipart/form-data")
+                    and longitud.isdigit() and int(longitud) > self.maximo):
+                respuesta = PlainTextResponse(f"La subida pasa del máximo de {_en_mb(self.maximo)}",
+                                              status_code=413)
+                await respuesta(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class ImagenesEstaticas(StaticFiles):
+    """StaticFiles para uploads/: los ficheros con hash en el nombre llevan Cache-Control
+    immutable y ETag fuerte (el propio nombre); si el navegador acepta gzip y existe la
+    versión .gz, se sirve esa. Los Range los resuelve FileResponse."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        peticion = Headers(scope=scope)
+        nombre = os.path.basename(full_path)
+        con_hash = _RE_NOMBRE_HASH.match(nombre)
+        cabeceras = {"Cache-Control": CACHE_INMUTABLE if con_hash else CACHE_REVALIDAR,
+                     # Que el navegador no adivine otro tipo (un "jpg" que en realidad es HTML)
+                     "X-Content-Type-Options": "nosniff"}
+        ruta, media_type = full_path, None
+        extension = os.path.splitext(nombre)[1].lower()
+
+        if extension == ".svg":
+            cabeceras["Content-Security-Policy"] = CSP_SVG
+        if extension in EXTENSIONES_COMPRIMIBLES:
+            cabeceras["Vary"] = "Accept-Encoding"
+            comprimido = f"{full_path}.gz"
+            if "gzip" in peticion.get("accept-encoding", "") and os.path.isfile(comprimido):
+                ruta, stat_result = comprimido, os.stat(comprimido)
+                media_type = mimetypes.guess_type(nombre)[0]
+                cabeceras["Content-Encoding"] = "gzip"
+        if con_hash:
+            # El nombre identifica el contenido: sirve de ETag fuerte
+            sufijo = "-gzip" if ruta != full_path else ""
+            cabeceras["ETag"] = f'"{nombre}{sufijo}"'
+
+        respuesta = FileResponse(ruta, status_code=status_code, headers=cabeceras, media_type=media_type,
+                                 stat_result=stat_result)
+        if self.is_not_modified(respuesta.headers, peticion):
+            return NotModifiedResponse(respuesta.headers)
+        return respuesta
@@ -0,0 +1,139 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Sin Pillow no hay miniaturas: las páginas usan la imagen original
+    Image = None
+
+from data.cache import TTLCache, paginas
+
+# Anchos (px) de las versiones WebP de cada imagen; nunca se amplía la original
+ANCHOS_MINIATURA = tuple(sorted(int(a) for a in os.getenv("MINIATURAS_ANCHOS", "320,640,1280").split(",")))
+MINIATURAS_PROCESOS = int(os.getenv("MINIATURAS_PROCESOS", "2"))
+CALIDAD_WEBP = int(os.getenv("MINIATURAS_CALIDAD_WEBP", "80"))
+# Formatos que sabe abrir Pillow (SVG no: ya es vectorial)
+EXTENSIONES_CON_MINIATURAS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+
+
+def nombre_variante(ruta: Path, ancho: int) -> Path:
+    return ruta.with_name(f"{ruta.stem}_{ancho}w.webp")
+
+
+def _manifiesto(ruta: Path) -> Path:
+    """Fichero con los anchos generados: se escribe el último, así que si existe están todos"""
+    return ruta.with_name(f"{ruta.stem}_variantes.json")
+
+
+def _guardar_atomico(destino: Path, escribir) -> None:
+    with tempfile.NamedTemporaryFile(dir=destino.parent, suffix=".tmp", delete=False) as temporal:
+        escribir(temporal)
+    os.replace(temporal.name, destino)
+
+
+def generar_variantes(ruta: str, anchos=ANCHOS_MINIATURA) -> list:
+    """Crea <nombre>_<ancho>w.webp por cada ancho y el manifiesto. Devuelve los anchos.
+    Es CPU pura: se ejecuta en los procesos de GeneradorMiniaturas (o en el backfill)."""
+    origen = Path(ruta)
+    with Image.open(origen) as abierta:
+        imagen = ImageOps.exif_transpose(abierta)  # Fotos de móvil guardadas giradas
+        if imagen.mode not in ("RGB", "RGBA"):
+            transparente = imagen.mode in ("LA", "PA") or "transparency" in imagen.info
+            imagen = imagen.convert("RGBA" if transparente else "RGB")
+        hechos = sorted({min(ancho, imagen.width) for ancho in anchos})
+        for ancho in hechos:
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            reducida = imagen if ancho == imagen.width else imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+            _guardar_atomico(nombre_variante(origen, ancho),
+                             lambda f: reducida.save(f, format="WEBP", quality=CALIDAD_WEBP, method=4))
+    _guardar_atomico(_manifiesto(origen), lambda f: f.write(json.dumps({"webp": hechos}).encode()))
+    return hechos
+
+
+def anchos_generados(ruta: Path) -> Optional[list]:
+    """Anchos de las variantes ya generadas de una imagen, o None si aún no están"""
+    try:
+        return json.loads(_manifiesto(ruta).read_text())["webp"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class GeneradorMiniaturas:
+    """Genera las variantes de las imágenes subidas en un pool de procesos, sin que la
+    petición espere. Las páginas las usan en cuanto aparece su manifiesto."""
+
+    def __init__(self, procesos: int = MINIATURAS_PROCESOS):
+        self.procesos = procesos
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # url -> srcset, solo de las imágenes que ya tienen variantes (no cambian nunca)
+        self._srcsets = TTLCache(3600, 10000)
+        self._enviadas = 0
+        self._generadas = 0
+        self._errores = 0
+
+    @staticmethod
+    def admite(ruta: Path) -> bool:
+        return Image is not None and ruta.suffix.lower() in EXTENSIONES_CON_MINIATURAS
+
+    def _ejecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: el proceso del servidor tiene hilos (pool de BD, executor) y fork no es seguro
+                self._pool = ProcessPoolExecutor(max_workers=self.procesos,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def programar(self, ruta: Path) -> None:
+        """Encola la generación de las variantes de la imagen (no espera)"""
+        if not self.admite(ruta) or anchos_generados(ruta) is not None:
+            return
+        futuro = self._ejecutor().submit(generar_variantes, str(ruta))
+        with self._lock:
+            self._enviadas += 1
+        futuro.add_done_callback(lambda f: self._terminada(ruta, f))
+
+    def _terminada(self, ruta: Path, futuro) -> None:
+        error = None if futuro.cancelled() else futuro.exception()
+        with self._lock:
+            if error is None:
+                self._generadas += 1
+            else:
+                self._errores += 1
+        if error is not None:
+            print(f"⚠️ No se pudieron generar las miniaturas de {ruta}: {error}")
+        else:
+            # Las páginas guardadas se generaron sin las variantes
+            paginas.invalidar_etiquetas("dinosaurios", "eras", "regiones", "habitats")
+
+    def srcset(self, url: str, ruta: Path) -> Optional[str]:
+        """"a_320w.webp 320w, a_640w.webp 640w" para la imagen, o None si no tiene variantes"""
+        srcset = self._srcsets.obtener(url)
+        if srcset is None:
+            anchos = anchos_generados(ruta)
+            if not anchos:
+                return None
+            base = url.rsplit("/", 1)[0]
+            srcset = ", ".join(f"{base}/{nombre_variante(ruta, ancho).name} {ancho}w" for ancho in anchos)
+            self._srcsets.guardar(url, srcset)
+        return srcset
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"procesos": self.procesos, "pillow": Image is not None, "enviadas": self._enviadas,
+                    "generadas": self._generadas, "errores": self._errores}
+
+    def cerrar(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+miniaturas = GeneradorMiniaturas()
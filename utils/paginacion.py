@@ -0,0 +1,26 @@
+from urllib.parse import urlencode
+from typing import Optional
+
+from fastapi import Request
+
+from data.paginacion import Cursor, Pagina, limitar_tamano
+
+
+def leer_paginacion(cursor: Optional[str], tamano: Optional[int]) -> tuple:
+    """Convierte los parámetros ?cursor=&tamano= en (Cursor o None, tamaño válido)"""
+    return Cursor.decodificar(cursor), limitar_tamano(tamano)
+
+
+def enlaces_pagina(request: Request, pagina: Pagina) -> dict:
+    """Datos para template/paginacion.html: URLs de la página anterior y siguiente
+    conservando los filtros de la petición, y el total si se ha contado"""
+    def url(cursor: str) -> str:
+        params = dict(request.query_params)
+        params["cursor"] = cursor
+        return f"{request.url.path}?{urlencode(params)}"
+
+    return {
+        "anterior": url(pagina.anterior) if pagina.anterior else None,
+        "siguiente": url(pagina.siguiente) if pagina.siguiente else None,
+        "total": pagina.total,
+    }